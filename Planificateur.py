@@ -5,23 +5,55 @@ Planificateur IA (CLI) – SQLite
 
 - Génère un planning sur 4 semaines (par défaut), pas de 30 minutes
 - Appelle Azure OpenAI (chat/completions) si configuré, sinon heuristique locale
+- Moteur exact optionnel (--engine flow) : flot maximal par priorité, sans appel IA
 - Valide toutes les contraintes puis produit un fichier SQL (.txt) pour revue humaine
-- Option d'application du SQL après validation (commande séparée)
+- Application du plan revu : apply-plan (executemany paramétré, transaction unique ou par lots),
+  ou du fichier SQL (apply-sql)
+- Requêtes « qui est libre ? » (availability) : index des blocs libres par jour x compétences
+- Démon HTTP/JSON (serve, planner_server.py) : contexte chaud en mémoire, rafraîchi à chaque écriture en base
 
 Commandes:
     python Planificateur.py generate --db hackaton.db --schema-sql main.sql --seed-sql data.sql --sql-out SQLCommands.txt
+    python Planificateur.py generate --db hackaton.db --engine flow --time-limit 30
+    python Planificateur.py generate --db hackaton.db --engine greedy --profile profiles/
+    python Planificateur.py generate --db hackaton.db --engine greedy --stream --plan-json plan_preview.ndjson
     python Planificateur.py validate --db hackaton.db --plan-json plan_preview.json
+    python Planificateur.py replan --db hackaton.db --snapshot plan_snapshot.json --delta-out PlanningDelta.txt
+    python Planificateur.py apply-plan --db hackaton.db --plan-json plan_preview.json --chunk-size 5000
     python Planificateur.py apply-sql --db hackaton.db --sql-file SQLCommands.txt
+    python Planificateur.py availability --db hackaton.db --date 2025-09-03 --skills 2,5 --min-hours 3
+    python Planificateur.py availability --db hackaton.db --task-id 12 --hours 2 --plan-json plan_preview.json
+    python Planificateur.py serve --db hackaton.db --port 5000 --workers 2
 """
 
 import argparse
 import os
+import sys
 import json
 import sqlite3
 from datetime import datetime, date, time, timedelta
+from time import monotonic, perf_counter, process_time
+from array import array
+from bisect import bisect_left, insort
 from collections import defaultdict
+from itertools import islice
+from collections.abc import Mapping
+from contextlib import contextmanager, nullcontext
 from typing import List, Dict, Any
 
+import db
+from llm_cache import cache_key, get_default_cache
+
+try:  # optionnel : validation vectorisée des gros plans
+    import numpy as np
+except ImportError:  # pragma: no cover - repli pur Python
+    np = None
+
+try:  # RSS max du processus (absent sous Windows)
+    import resource
+except ImportError:  # pragma: no cover
+    resource = None
+
 WEEKDAYS = ['Mon','Tue','Wed','Thu','Fri','Sat','Sun']
 
 
@@ -68,6 +100,155 @@ def weekday_str(d: date) -> str:
     return WEEKDAYS[d.weekday()]
 
 
+def hm_to_min(t: str) -> int:
+    """'HH:MM' -> minutes depuis minuit (sans passer par strptime)."""
+    h, m = t.split(':')[:2]
+    return int(h) * 60 + int(m)
+
+def min_to_hm(m: int) -> str:
+    return f"{m // 60:02d}:{m % 60:02d}"
+
+
+# ---------- Moteur d'intervalles (minutes entières) ----------
+def merge_intervals(intervals):
+    """Trie et fusionne des intervalles [s, e) en minutes (chevauchants ou contigus)."""
+    merged = []
+    for s, e in sorted(intervals):
+        if e <= s:
+            continue
+        if merged and s <= merged[-1][1]:
+            if e > merged[-1][1]:
+                merged[-1][1] = e
+        else:
+            merged.append([s, e])
+    return [(s, e) for s, e in merged]
+
+def subtract_intervals(free, busy, granularity_min=30):
+    """
+    Balayage : retire les intervalles occupés `busy` (triés, fusionnés) des intervalles
+    libres `free` (triés, fusionnés). Chaque morceau restant est recalé sur la grille
+    ancrée au début de son intervalle libre d'origine (pas de `granularity_min`), de
+    sorte que le résultat soit exactement l'union des créneaux de 30 min autorisés.
+    """
+    out = []
+    j, nb = 0, len(busy)
+    for fs, fe in free:
+        while j < nb and busy[j][1] <= fs:
+            j += 1
+        cur = fs
+        k = j
+        while cur < fe:
+            if k < nb and busy[k][0] < fe:
+                piece_end = busy[k][0]
+                next_cur = busy[k][1]
+                k += 1
+            else:
+                piece_end = fe
+                next_cur = fe
+            if piece_end > cur:
+                # recalage sur la grille : début arrondi au pas supérieur, fin au pas inférieur
+                s = fs + -(-(cur - fs) // granularity_min) * granularity_min
+                e = fs + ((piece_end - fs) // granularity_min) * granularity_min
+                if e - s >= granularity_min:
+                    out.append((s, e))
+            cur = max(cur, next_cur)
+    return out
+
+def load_schedule_rows(conn: sqlite3.Connection, from_date: date, to_date: date) -> Dict[str, List[tuple]]:
+    """
+    Lecture unique (en tuples) des tables partagées par load_context et compute_free_intervals :
+      - 'availability' : (employee_id, day_of_week, start_time, end_time), ordre d'insertion conservé,
+      - 'absences' : (employee_id, start_date, end_date) approuvées CHEVAUCHANT la fenêtre
+        (index partiel idx_absences_approved),
+      - 'planning' : (employee_id, task_id, date, start_time, end_time) de la fenêtre
+        (index couvrant idx_planning_date_cover : plus de parcours complet de la table).
+    """
+    f, t = dstr(from_date), dstr(to_date)
+    return {
+        'availability': list(db.iter_rows(conn, """
+            SELECT employee_id, day_of_week, start_time, end_time
+            FROM employee_availability ORDER BY rowid
+        """)),
+        'absences': list(db.iter_rows(conn, """
+            SELECT employee_id, start_date, end_date
+            FROM absences
+            WHERE status = 'Approved' AND end_date >= ? AND start_date <= ?
+        """, (f, t))),
+        'planning': list(db.iter_rows(conn, """
+            SELECT employee_id, task_id, date, start_time, end_time
+            FROM planning
+            WHERE date BETWEEN ? AND ?
+            ORDER BY rowid
+        """, (f, t))),
+    }
+
+def compute_free_intervals(conn: sqlite3.Connection, from_date: date, to_date: date, granularity_min=30,
+                           rows: Dict[str, List[tuple]] = None):
+    """
+    Intervalles libres par employé et par jour sur [from_date..to_date], en minutes :
+      - disponibilités par jour de semaine (triées/fusionnées une seule fois),
+      - absences approuvées (index employé -> ordinaux de dates),
+      - planning existant soustrait par balayage.
+    rows : résultat de load_schedule_rows déjà lu (load_context), sinon lu ici.
+    Retour: {employee_id: {'YYYY-MM-DD': [(start_min, end_min), ...]}}
+    """
+    if rows is None:
+        rows = load_schedule_rows(conn, from_date, to_date)
+    avail_raw = defaultdict(list)  # (emp, dow) -> [(s,e)]
+    for emp_id, dow, st, en in rows['availability']:
+        avail_raw[(emp_id, dow)].append((hm_to_min(st), hm_to_min(en)))
+    avail_by_dow = defaultdict(dict)  # dow -> emp -> fenêtres fusionnées
+    for (emp_id, dow), ivs in avail_raw.items():
+        avail_by_dow[dow][emp_id] = merge_intervals(ivs)
+
+    # Index des absences : emp -> {ordinal de date}, restreint à la fenêtre
+    lo, hi = from_date.toordinal(), to_date.toordinal()
+    absent = defaultdict(set)
+    for emp_id, sd, ed in rows['absences']:
+        try:
+            s = max(date.fromisoformat(sd).toordinal(), lo)
+            e = min(date.fromisoformat(ed).toordinal(), hi)
+        except (TypeError, ValueError):
+            continue
+        absent[emp_id].update(range(s, e + 1))
+
+    busy_raw = defaultdict(list)  # (emp, date) -> [(s,e)]
+    for emp_id, _, ds, st, en in rows['planning']:
+        busy_raw[(emp_id, ds)].append((hm_to_min(st), hm_to_min(en)))
+
+    free = defaultdict(dict)
+    for d in daterange(from_date, to_date):
+        ds, od = dstr(d), d.toordinal()
+        for emp_id, windows in avail_by_dow.get(weekday_str(d), {}).items():
+            if od in absent.get(emp_id, ()):
+                continue
+            busy = busy_raw.get((emp_id, ds))
+            ivs = subtract_intervals(windows, merge_intervals(busy) if busy else [], granularity_min)
+            if ivs:
+                free[emp_id][ds] = ivs
+    return dict(free)
+
+def iter_allowed_slots(free_intervals: Dict[int, Dict[str, List]], granularity_min=30):
+    """Déroule paresseusement les intervalles libres en créneaux {employee_id, date, start_time, end_time}."""
+    for emp_id, days in free_intervals.items():
+        for ds, ivs in days.items():
+            for s, e in ivs:
+                cur = s
+                while cur + granularity_min <= e:
+                    yield {
+                        "employee_id": emp_id,
+                        "date": ds,
+                        "start_time": min_to_hm(cur),
+                        "end_time": min_to_hm(cur + granularity_min)
+                    }
+                    cur += granularity_min
+
+def free_intervals_to_json(free_intervals: Dict[int, Dict[str, List]]) -> Dict[int, Dict[str, List[List[str]]]]:
+    """Forme compacte pour le contexte JSON : {emp_id: {date: [["HH:MM","HH:MM"], ...]}}."""
+    return {emp_id: {ds: [[min_to_hm(s), min_to_hm(e)] for s, e in ivs] for ds, ivs in days.items()}
+            for emp_id, days in free_intervals.items()}
+
+
 # ---------- Accès DB et extraction ----------
 def compute_allowed_slots(conn: sqlite3.Connection, from_date: date, to_date: date, granularity_min=30):
     """
@@ -77,65 +258,10 @@ def compute_allowed_slots(conn: sqlite3.Connection, from_date: date, to_date: da
       - absences approuvées,
       - planning existant (aucun chevauchement).
     Retour: liste de dicts {employee_id, date, start_time, end_time}
+    (préférer compute_free_intervals, beaucoup plus compact).
     """
-    # Dispos
-    avails = fetch_all(conn, "SELECT employee_id, day_of_week, start_time, end_time FROM employee_availability")
-    avail_map = defaultdict(list)
-    for a in avails:
-        avail_map[(a['employee_id'], a['day_of_week'])].append((a['start_time'], a['end_time']))
-    # Absences
-    abs_rows = fetch_all(conn, "SELECT employee_id, start_date, end_date FROM absences WHERE status='Approved'")
-    abs_map = defaultdict(list)
-    for r in abs_rows:
-        abs_map[r['employee_id']].append((r['start_date'], r['end_date']))
-    # Planning existant
-    planned = fetch_all(conn, "SELECT employee_id, date, start_time, end_time FROM planning WHERE date BETWEEN ? AND ?",
-                        (dstr(from_date), dstr(to_date)))
-    occ = defaultdict(lambda: defaultdict(list))  # emp -> date -> [(s,e)]
-    for p in planned:
-        occ[p['employee_id']][p['date']].append((p['start_time'], p['end_time']))
-
-    def is_absent(emp_id, d: date) -> bool:
-        for s,e in abs_map.get(emp_id, []):
-            if s <= dstr(d) <= e:
-                return True
-        return False
-
-    allowed = []
-    cur = from_date
-    while cur <= to_date:
-        dow = weekday_str(cur)
-        ds = dstr(cur)
-        # pour chaque employé avec dispo ce jour
-        emp_ids = set([k[0] for k in avail_map.keys() if k[1] == dow])
-        for emp_id in emp_ids:
-            if is_absent(emp_id, cur):
-                continue
-            # fenêtres dispo du jour
-            for (st, en) in avail_map[(emp_id, dow)]:
-                # soustraire le planning existant
-                # on discretise en pas de 30 min et on garde seulement ce qui n'est pas occupé
-                def to_time(t): return datetime.strptime(t, "%H:%M").time()
-                tcur = to_time(st)
-                tend = to_time(en)
-                while (datetime.combine(date.today(), tcur) + timedelta(minutes=granularity_min)).time() <= tend:
-                    tnext = (datetime.combine(date.today(), tcur) + timedelta(minutes=granularity_min)).time()
-                    # vérifier chevauchement avec occ
-                    free = True
-                    for (os, oe) in occ.get(emp_id, {}).get(ds, []):
-                        s0 = to_time(os); e0 = to_time(oe)
-                        if not (tnext <= s0 or tcur >= e0):
-                            free = False; break
-                    if free:
-                        allowed.append({
-                            "employee_id": emp_id,
-                            "date": ds,
-                            "start_time": tcur.strftime("%H:%M"),
-                            "end_time": tnext.strftime("%H:%M")
-                        })
-                    tcur = tnext
-        cur += timedelta(days=1)
-    return allowed
+    free = compute_free_intervals(conn, from_date, to_date, granularity_min)
+    return list(iter_allowed_slots(free, granularity_min))
 
 def ensure_db(conn: sqlite3.Connection, schema_sql_path: str, seed_sql_path: str=None):
     with open(schema_sql_path, 'r', encoding='utf-8') as f:
@@ -148,99 +274,388 @@ def ensure_db(conn: sqlite3.Connection, schema_sql_path: str, seed_sql_path: str
         conn.executescript(seed_sql)
     conn.commit()
 
-def fetch_all(conn: sqlite3.Connection, q: str, params: tuple=()):
-    cur = conn.execute(q, params)
-    cols = [c[0] for c in cur.description]
-    rows = [dict(zip(cols, r)) for r in cur.fetchall()]
-    return rows
+# ---------- Contexte compact (colonnes) ----------
+def _num_in(v) -> float:
+    return float('nan') if v is None else float(v)
 
-def load_context(conn: sqlite3.Connection, from_date: date, to_date: date) -> Dict[str, Any]:
-    employees = fetch_all(conn, """
-        SELECT id, first_name, last_name, contract_type, weekly_hours_max, accept_replacement, supervisor_id
+def _num_out(x: float):
+    """Inverse de _num_in : NaN -> None, entier -> int (affinité INTEGER de SQLite)."""
+    if x != x:
+        return None
+    return int(x) if x.is_integer() else x
+
+
+class CompactContext(Mapping):
+    """
+    Contexte de planification en colonnes (array) au lieu d'un arbre de dicts :
+      - dates en ordinaux (date.toordinal, 0 = pas de date), heures en minutes depuis minuit,
+      - compétences en bitmasks (bit i = skill_ids[i]) par employé et par tâche,
+      - disponibilités, absences, planning existant et intervalles libres en colonnes parallèles
+        (une entrée par ligne, ordre de lecture conservé).
+    Se lit comme l'ancien dict (Mapping) : chaque clé ('employees', 'allowed_slots'...) n'est matérialisée
+    qu'à sa première lecture, puis mémoïsée. PlannerState lit directement les colonnes : greedy et flow ne
+    construisent jamais le planning existant ni les intervalles libres sous forme de dicts.
+    Les heures sont restituées au format HH:MM, les compétences triées par id.
+    """
+
+    KEYS = ('time_window', 'slot_granularity_minutes', 'rules', 'objective', 'employees', 'tasks',
+            'preexisting_assignments', 'absences', 'allowed_slots')
+
+    __slots__ = ('from_ord', 'to_ord', 'granularity', 'rules', 'objective', 'skill_ids',
+                 'emp_ids', 'emp_names', 'emp_weekly_max', 'emp_replacement', 'emp_skills',
+                 'avail_emp', 'avail_dow', 'avail_start', 'avail_end',
+                 'abs_emp', 'abs_start', 'abs_end',
+                 'task_ids', 'task_titles', 'task_hours', 'task_deadline', 'task_priority',
+                 'priority_names', 'task_assigned', 'task_skills', 'task_locations',
+                 'pre_emp', 'pre_task', 'pre_day', 'pre_start', 'pre_end',
+                 'free_emp', 'free_day', 'free_start', 'free_end', '_cache')
+
+    def __init__(self, from_date: date, to_date: date, granularity_min: int = 30,
+                 rules: Dict[str, Any] = None, objective: Dict[str, Any] = None):
+        self.from_ord, self.to_ord = from_date.toordinal(), to_date.toordinal()
+        self.granularity = granularity_min
+        self.rules = rules or {}
+        self.objective = objective or {}
+        self.skill_ids = []
+        # employés
+        self.emp_ids = array('q')
+        self.emp_names = []
+        self.emp_weekly_max = array('d')      # NaN = NULL
+        self.emp_replacement = bytearray()
+        self.emp_skills = []                  # bitmasks (entiers Python)
+        # disponibilités (employee_id, jour de semaine 0=Mon, début, fin)
+        self.avail_emp, self.avail_dow = array('q'), array('b')
+        self.avail_start, self.avail_end = array('h'), array('h')
+        # absences approuvées (employee_id, premier et dernier jour en ordinaux)
+        self.abs_emp, self.abs_start, self.abs_end = array('q'), array('l'), array('l')
+        # tâches
+        self.task_ids = array('q')
+        self.task_titles = []
+        self.task_hours = array('d')          # NaN = NULL
+        self.task_deadline = array('l')       # 0 = pas de deadline
+        self.task_priority = array('b')       # index dans priority_names
+        self.priority_names = []
+        self.task_assigned = array('q')       # 0 = non assignée
+        self.task_skills = []
+        self.task_locations = []
+        # planning existant de la fenêtre
+        self.pre_emp, self.pre_task, self.pre_day = array('q'), array('q'), array('l')
+        self.pre_start, self.pre_end = array('h'), array('h')
+        # intervalles libres (employee_id, jour, début, fin)
+        self.free_emp, self.free_day = array('q'), array('l')
+        self.free_start, self.free_end = array('h'), array('h')
+        self._cache = {}
+
+    def skills_of(self, mask: int) -> List[int]:
+        out = []
+        while mask:
+            low = mask & -mask
+            out.append(self.skill_ids[low.bit_length() - 1])
+            mask ^= low
+        return out
+
+    def iter_availability(self):
+        """(employee_id, 'Mon'..'Sun', début, fin) en minutes."""
+        for emp_id, dow, s, e in zip(self.avail_emp, self.avail_dow, self.avail_start, self.avail_end):
+            yield emp_id, WEEKDAYS[dow], s, e
+
+    def iter_absences(self):
+        """(employee_id, premier jour, dernier jour) en ordinaux."""
+        return zip(self.abs_emp, self.abs_start, self.abs_end)
+
+    def iter_preexisting(self):
+        """(employee_id, task_id, ordinal du jour, début, fin) en minutes."""
+        return zip(self.pre_emp, self.pre_task, self.pre_day, self.pre_start, self.pre_end)
+
+    # --- adaptateur vers la forme JSON historique ---
+    def __getitem__(self, key):
+        value = self._cache.get(key)
+        if value is None:
+            if key not in self.KEYS:
+                raise KeyError(key)
+            value = self._cache[key] = getattr(self, '_build_' + key)()
+        return value
+
+    def __iter__(self):
+        return iter(self.KEYS)
+
+    def __len__(self):
+        return len(self.KEYS)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {k: self[k] for k in self.KEYS}
+
+    def _build_time_window(self):
+        return {'from': dstr(date.fromordinal(self.from_ord)), 'to': dstr(date.fromordinal(self.to_ord))}
+
+    def _build_slot_granularity_minutes(self):
+        return self.granularity
+
+    def _build_rules(self):
+        return self.rules
+
+    def _build_objective(self):
+        return self.objective
+
+    def _build_employees(self):
+        avail = defaultdict(list)
+        for emp_id, dow, s, e in self.iter_availability():
+            avail[emp_id].append({'day': dow, 'start': min_to_hm(s), 'end': min_to_hm(e)})
+        return [{
+            'id': emp_id,
+            'name': name,
+            'weekly_hours_max': _num_out(wmax),
+            'accept_replacement': bool(repl),
+            'availability': avail[emp_id],
+            'skills': self.skills_of(mask)
+        } for emp_id, name, wmax, repl, mask in zip(self.emp_ids, self.emp_names, self.emp_weekly_max,
+                                                    self.emp_replacement, self.emp_skills)]
+
+    def _build_tasks(self):
+        return [{
+            'id': task_id,
+            'title': title,
+            'duration_hours': _num_out(hours),
+            'deadline': dstr(date.fromordinal(deadline)) if deadline else None,
+            'priority': self.priority_names[prio],
+            'assigned_to': assigned or None,
+            'required_skills': self.skills_of(mask),
+            'location': location
+        } for task_id, title, hours, deadline, prio, assigned, mask, location in zip(
+            self.task_ids, self.task_titles, self.task_hours, self.task_deadline, self.task_priority,
+            self.task_assigned, self.task_skills, self.task_locations)]
+
+    def _build_preexisting_assignments(self):
+        days = {}
+        out = []
+        for emp_id, task_id, od, s, e in self.iter_preexisting():
+            ds = days.get(od)
+            if ds is None:
+                ds = days[od] = dstr(date.fromordinal(od))
+            out.append({'employee_id': emp_id, 'task_id': task_id, 'date': ds,
+                        'start_time': min_to_hm(s), 'end_time': min_to_hm(e)})
+        return out
+
+    def _build_absences(self):
+        abs_map = defaultdict(list)
+        for emp_id, s, e in self.iter_absences():
+            abs_map[emp_id].append({'start': dstr(date.fromordinal(s)), 'end': dstr(date.fromordinal(e))})
+        return abs_map
+
+    def _build_allowed_slots(self):
+        free = defaultdict(dict)
+        days = {}
+        for emp_id, od, s, e in zip(self.free_emp, self.free_day, self.free_start, self.free_end):
+            ds = days.get(od)
+            if ds is None:
+                ds = days[od] = dstr(date.fromordinal(od))
+            free[emp_id].setdefault(ds, []).append([min_to_hm(s), min_to_hm(e)])
+        return dict(free)
+
+
+def load_compact_context(conn: sqlite3.Connection, from_date: date, to_date: date,
+                         granularity_min: int = 30, metrics: 'StageMetrics' = None) -> CompactContext:
+    """
+    Lit le contexte de planification directement en colonnes (voir CompactContext).
+    metrics : le calcul des intervalles libres y est mesuré comme étape 'load_context/compute_allowed_slots'.
+    Valeurs illisibles (signalées par un [WARN]) : deadline ignorée, ligne de planning écartée (comme les absences).
+    """
+    ctx = CompactContext(from_date, to_date, granularity_min, rules={
+        'must_match_skills': True,
+        'respect_availability': True,
+        'respect_absences': True,
+        'respect_weekly_hours_max': True,  # exception si remplacement autorisé
+        'allow_task_splitting': True,
+        'max_continuous_hours': 6,
+        'working_days': ['Mon','Tue','Wed','Thu','Fri','Sat','Sun']
+    }, objective={
+        'order': ['no_deadline_delay','priority_weighted_coverage','minimize_unplanned_hours']
+    })
+    # disponibilités, absences et planning sont lus une seule fois pour le contexte ET les intervalles libres
+    rows = load_schedule_rows(conn, from_date, to_date)
+
+    # compétences : bit i = i-ème id de compétence par ordre croissant
+    emp_skill_rows = list(db.iter_rows(conn, "SELECT employee_id, skill_id FROM employee_skills"))
+    task_skill_rows = list(db.iter_rows(conn, "SELECT task_id, skill_id FROM task_required_skills"))
+    ctx.skill_ids = sorted({sk for _, sk in emp_skill_rows} | {sk for _, sk in task_skill_rows})
+    bit = {sk: 1 << i for i, sk in enumerate(ctx.skill_ids)}
+    emp_mask, task_mask = defaultdict(int), defaultdict(int)
+    for emp_id, sk in emp_skill_rows:
+        emp_mask[emp_id] |= bit[sk]
+    for task_id, sk in task_skill_rows:
+        task_mask[task_id] |= bit[sk]
+
+    dow_code = {d: i for i, d in enumerate(WEEKDAYS)}
+    for emp_id, dow, st, en in rows['availability']:
+        if dow in dow_code:  # CHECK du schéma : les autres valeurs ne correspondent à aucun jour
+            ctx.avail_emp.append(emp_id)
+            ctx.avail_dow.append(dow_code[dow])
+            ctx.avail_start.append(hm_to_min(st))
+            ctx.avail_end.append(hm_to_min(en))
+    for emp_id, sd, ed in rows['absences']:
+        try:
+            s, e = date.fromisoformat(sd).toordinal(), date.fromisoformat(ed).toordinal()
+        except (TypeError, ValueError):
+            continue
+        ctx.abs_emp.append(emp_id)
+        ctx.abs_start.append(s)
+        ctx.abs_end.append(e)
+    days = {}
+    kept, bad_planning = [], []
+    for row in rows['planning']:
+        emp_id, task_id, ds, st, en = row
+        try:
+            od = days.get(ds)
+            if od is None:
+                od = date.fromisoformat(ds).toordinal()
+            s, e = hm_to_min(st), hm_to_min(en)
+        except (TypeError, ValueError, AttributeError):
+            bad_planning.append(row)
+            continue
+        days[ds] = od
+        kept.append(row)
+        ctx.pre_emp.append(emp_id)
+        ctx.pre_task.append(task_id)
+        ctx.pre_day.append(od)
+        ctx.pre_start.append(s)
+        ctx.pre_end.append(e)
+    if bad_planning:
+        rows['planning'] = kept  # compute_free_intervals relit ces lignes
+        print(f"[WARN] {len(bad_planning)} ligne(s) de planning ignorée(s) (date ou heure invalide), "
+              f"ex. {bad_planning[0]}")
+
+    for emp_id, first_name, last_name, weekly_hours_max, accept_replacement in db.iter_rows(conn, """
+        SELECT id, first_name, last_name, weekly_hours_max, accept_replacement
         FROM employees
-    """)
-    # compétences
-    emp_skills_rows = fetch_all(conn, "SELECT employee_id, skill_id FROM employee_skills")
-    emp_skills = defaultdict(list)
-    for r in emp_skills_rows:
-        emp_skills[r['employee_id']].append(r['skill_id'])
-    # disponibilités
-    avail_rows = fetch_all(conn, "SELECT employee_id, day_of_week, start_time, end_time FROM employee_availability")
-    emp_avail = defaultdict(list)
-    for r in avail_rows:
-        emp_avail[r['employee_id']].append({'day': r['day_of_week'], 'start': r['start_time'], 'end': r['end_time']})
-    # absences approuvées
-    abs_rows = fetch_all(conn, "SELECT employee_id, start_date, end_date FROM absences WHERE status='Approved'")
-    abs_map = defaultdict(list)
-    for r in abs_rows:
-        abs_map[r['employee_id']].append({'start': r['start_date'], 'end': r['end_date']})
-    # tâches
-    tasks = fetch_all(conn, """
-        SELECT id, title, description, duration_hours, deadline, priority, assigned_to, status, location
+    """):
+        ctx.emp_ids.append(emp_id)
+        ctx.emp_names.append(f"{first_name} {last_name}")
+        ctx.emp_weekly_max.append(_num_in(weekly_hours_max))
+        ctx.emp_replacement.append(1 if accept_replacement else 0)
+        ctx.emp_skills.append(emp_mask[emp_id])
+
+    prio_code = {}
+    bad_deadlines = []
+    for task_id, title, duration_hours, deadline, priority, assigned_to, location in db.iter_rows(conn, """
+        SELECT id, title, duration_hours, deadline, priority, assigned_to, location
         FROM tasks
         WHERE status IN ('Pending','In progress')
-    """)
-    # compétences requises
-    req_rows = fetch_all(conn, "SELECT task_id, skill_id FROM task_required_skills")
-    req_skills = defaultdict(list)
-    for r in req_rows:
-        req_skills[r['task_id']].append(r['skill_id'])
-    # planning existant dans la fenêtre
-    plan_rows = fetch_all(conn, """
-        SELECT employee_id, task_id, date, start_time, end_time
-        FROM planning
-        WHERE date BETWEEN ? AND ?
-    """, (dstr(from_date), dstr(to_date)))
-
-    employees_out = []
-    for e in employees:
-        employees_out.append({
-            'id': e['id'],
-            'name': f"{e['first_name']} {e['last_name']}",
-            'weekly_hours_max': e['weekly_hours_max'],
-            'accept_replacement': bool(e['accept_replacement']),
-            'availability': emp_avail[e['id']],
-            'skills': emp_skills[e['id']]
-        })
-    tasks_out = []
-    for t in tasks:
-        tasks_out.append({
-            'id': t['id'],
-            'title': t['title'],
-            'duration_hours': t['duration_hours'],
-            'deadline': t['deadline'],
-            'priority': t['priority'],
-            'assigned_to': t['assigned_to'],
-            'required_skills': req_skills[t['id']],
-            'location': t['location']
-        })
-
-    allowed_slots = compute_allowed_slots(conn, from_date, to_date, granularity_min=30)
-
-    context = {
-        'time_window': {'from': dstr(from_date), 'to': dstr(to_date)},
-        'slot_granularity_minutes': 30,
-        'rules': {
-            'must_match_skills': True,
-            'respect_availability': True,
-            'respect_absences': True,
-            'respect_weekly_hours_max': True,  # exception si remplacement autorisé
-            'allow_task_splitting': True,
-            'max_continuous_hours': 6,
-            'working_days': ['Mon','Tue','Wed','Thu','Fri','Sat','Sun']
-        },
-        'objective': {
-            'order': ['no_deadline_delay','priority_weighted_coverage','minimize_unplanned_hours']
-        },
-        'employees': employees_out,
-        'tasks': tasks_out,
-        'preexisting_assignments': plan_rows,
-        'absences': abs_map
-    }
-    return context
+    """):
+        if priority not in prio_code:
+            prio_code[priority] = len(ctx.priority_names)
+            ctx.priority_names.append(priority)
+        ctx.task_ids.append(task_id)
+        ctx.task_titles.append(title)
+        ctx.task_hours.append(_num_in(duration_hours))
+        try:
+            ctx.task_deadline.append(date.fromisoformat(deadline).toordinal() if deadline else 0)
+        except (TypeError, ValueError):
+            bad_deadlines.append(task_id)
+            ctx.task_deadline.append(0)  # planifiée comme une tâche sans deadline
+        ctx.task_priority.append(prio_code[priority])
+        ctx.task_assigned.append(assigned_to or 0)
+        ctx.task_skills.append(task_mask[task_id])
+        ctx.task_locations.append(location)
+    if bad_deadlines:
+        print(f"[WARN] Deadline invalide ignorée pour {len(bad_deadlines)} tâche(s) : {bad_deadlines[:10]}")
+
+    with (metrics or NO_METRICS).stage('load_context/compute_allowed_slots') as st:
+        free = compute_free_intervals(conn, from_date, to_date, granularity_min=granularity_min, rows=rows)
+        for emp_id, by_day in free.items():
+            for ds, ivs in by_day.items():
+                od = days.get(ds)
+                if od is None:
+                    od = days[ds] = date.fromisoformat(ds).toordinal()
+                for s, e in ivs:
+                    ctx.free_emp.append(emp_id)
+                    ctx.free_day.append(od)
+                    ctx.free_start.append(s)
+                    ctx.free_end.append(e)
+        if metrics is not None and metrics.enabled:
+            st['free_intervals'] = len(ctx.free_emp)
+            st['slots'] = sum((e - s) // granularity_min for s, e in zip(ctx.free_start, ctx.free_end))
+    return ctx
+
+def load_context(conn: sqlite3.Connection, from_date: date, to_date: date) -> Dict[str, Any]:
+    """Contexte sous sa forme JSON historique (dicts et listes), voir load_compact_context."""
+    return load_compact_context(conn, from_date, to_date).to_dict()
 
 
 # ---------- Appel Azure OpenAI (optionnel) ----------
+LLM_SYSTEM_PROMPT = (
+    "Vous êtes un planificateur. Répondez EXCLUSIVEMENT au format JSON: "
+    "{\"plan\": [{\"employee_id\": int, \"task_id\": int, \"date\": \"YYYY-MM-DD\", \"start_time\": \"HH:MM\", "
+    "\"end_time\": \"HH:MM\", \"pause\": \"HH:MM\" | null } ... ], \"notes\": string } "
+    "Format du contexte (compact): 'employees' = [id, heures hebdo max, remplacement accepté (0/1), "
+    "{semaine ISO: heures déjà planifiées}]; 'candidate_sets' = listes d'ids d'employés compétents; "
+    "'tasks' = [id, durée (h), deadline, priorité, assigned_to, index dans candidate_sets]; "
+    "'free' = {employee_id: {date: \"HH:MM-HH:MM HH:MM-HH:MM\"}} intervalles libres (dispo, absences et planning "
+    "existant déjà déduits). "
+    "CONTRAINTE ABSOLUE: chaque créneau retourné doit être inclus dans un intervalle de 'free' du même employé "
+    "et de la même date, aligné sur la granularité, et l'employé doit appartenir au candidate_set de la tâche. "
+    "N'utilisez AUCUN autre horaire. "
+    "Respect strict: ≤6h d'affilée, pas de chevauchement, heures hebdo max (heures déjà planifiées comprises), "
+    "granularité 30 minutes, semaine complète possible. Objectifs: 1) aucune tâche en retard à sa deadline; "
+    "2) priorités (Critical>High>Medium>Low); 3) minimiser les heures non planifiées."
+)
+
+def compact_llm_context(context: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Contexte réduit envoyé au LLM : intervalles libres en chaînes courtes (pas de créneaux de 30 min),
+    candidats pré-filtrés par tâche et internés (un même ensemble n'est envoyé qu'une fois),
+    heures déjà consommées par semaine au lieu du planning et des absences bruts.
+    Ne garde que les employés, dates et tâches du contexte (utilisable tel quel sur un shard).
+    """
+    skills = SkillIndex(context['employees'])
+    state = PlannerState(context)
+    tw_from, tw_to = context['time_window']['from'], context['time_window']['to']
+    emp_ids = {e['id'] for e in context['employees']}
+
+    used = defaultdict(dict)
+    for (emp_id, y, w), mins in state.week_min.items():
+        if mins:
+            used[emp_id][f"{y}-W{w:02d}"] = round(mins / 60.0, 2)
+    employees = [[e['id'], e['weekly_hours_max'], int(bool(e['accept_replacement'])), used.get(e['id'], {})]
+                 for e in context['employees']]
+
+    candidate_sets, set_index, tasks = [], {}, []
+    for t in context['tasks']:
+        cands = tuple(e['id'] for e in skills.candidates(t.get('required_skills', [])))
+        if not cands:
+            continue
+        if cands not in set_index:
+            set_index[cands] = len(candidate_sets)
+            candidate_sets.append(list(cands))
+        tasks.append([t['id'], t['duration_hours'], t['deadline'], t['priority'], t['assigned_to'], set_index[cands]])
+
+    free = {}
+    for emp_id, days in context.get('allowed_slots', {}).items():
+        if int(emp_id) not in emp_ids:
+            continue
+        kept = {ds: " ".join(f"{s}-{e}" for s, e in ivs) for ds, ivs in days.items() if tw_from <= ds <= tw_to}
+        if kept:
+            free[emp_id] = kept
+
+    return {
+        'time_window': context['time_window'],
+        'slot_granularity_minutes': context['slot_granularity_minutes'],
+        'rules': context['rules'],
+        'objective': context['objective'],
+        'employees': employees,
+        'candidate_sets': candidate_sets,
+        'tasks': tasks,
+        'free': free,
+    }
+
+def post_llm_request(api_url: str, api_key: str, body: bytes, timeout: float) -> Dict[str, Any]:
+    import urllib.request
+
+    req = urllib.request.Request(api_url, data=body, method='POST')
+    req.add_header('Content-Type', 'application/json')
+    req.add_header('api-key', api_key)
+    with urllib.request.urlopen(req, timeout=timeout) as resp:
+        return json.loads(resp.read().decode('utf-8'))
+
 def call_azure_openai(context: Dict[str, Any]) -> Dict[str, Any]:
     """
     Ordre de recherche de la config :
@@ -248,6 +663,14 @@ def call_azure_openai(context: Dict[str, Any]) -> Dict[str, Any]:
       2) variables d'env namespacées SCHED_*
       3) fallback AI_*
     Sinon, renvoie {} pour déclencher l'heuristique locale.
+
+    Le contexte est compacté (compact_llm_context). S'il dépasse SCHED_AI_MAX_REQUEST_BYTES, il est
+    découpé en shards composante x semaine, envoyés en parallèle (SCHED_AI_CONCURRENCY) puis fusionnés ;
+    chaque tâche n'est envoyée qu'une fois, avec toute sa durée, dans la semaine où le greedy la commencerait.
+    La taille (octets, tokens estimés/facturés) et la latence de chaque requête sont affichées et
+    renvoyées dans 'llm_requests'. Si une requête échoue, renvoie {} (heuristique locale).
+    Les réponses valides passent par le cache persistant llm_cache (même déploiement, prompt et contexte
+    => aucune requête).
     """
     load_scheduler_env(".env.scheduler")
 
@@ -262,37 +685,63 @@ def call_azure_openai(context: Dict[str, Any]) -> Dict[str, Any]:
     if not call_enabled or not api_url or not api_key:
         return {}
 
-    import urllib.request
-
-    system_msg = {
-    "role": "system",
-    "content": (
-        "Vous êtes un planificateur. Répondez EXCLUSIVEMENT au format JSON: "
-        "{\"plan\": [{\"employee_id\": int, \"task_id\": int, \"date\": \"YYYY-MM-DD\", \"start_time\": \"HH:MM\", "
-        "\"end_time\": \"HH:MM\", \"pause\": \"HH:MM\" | null } ... ], \"notes\": string } "
-        "CONTRAINTE ABSOLUE: tous les créneaux retournés doivent être un assemblage de créneaux présents dans 'allowed_slots' "
-        "fournis dans le contexte (même date/employé et segments contigus). N'utilisez AUCUN autre horaire. "
-        "Respect strict: compétences requises, disponibilités, absences, ≤6h d'affilée, pas de chevauchement, "
-        "granularité 30 minutes, semaine complète possible. Objectifs: 1) aucune tâche en retard à sa deadline; "
-        "2) priorités (Critical>High>Medium>Low); 3) minimiser les heures non planifiées."
-    )
-}
-    user_msg = {"role": "user", "content": json.dumps(context, ensure_ascii=False)}
-    body = {"messages": [system_msg, user_msg], "temperature": 0.2, "response_format": {"type": "json_object"}}
-
-    req = urllib.request.Request(api_url, data=json.dumps(body).encode('utf-8'), method='POST')
-    req.add_header('Content-Type', 'application/json')
-    req.add_header('api-key', api_key)
+    max_bytes = int(os.getenv('SCHED_AI_MAX_REQUEST_BYTES', '200000'))
+    concurrency = int(os.getenv('SCHED_AI_CONCURRENCY', '4'))
+    timeout = float(os.getenv('SCHED_AI_TIMEOUT', '60'))
+
+    def body_for(ctx):
+        user_msg = {"role": "user",
+                    "content": json.dumps(compact_llm_context(ctx), ensure_ascii=False, separators=(',', ':'))}
+        body = {"messages": [{"role": "system", "content": LLM_SYSTEM_PROMPT}, user_msg],
+                "temperature": 0.2, "response_format": {"type": "json_object"}}
+        return json.dumps(body, ensure_ascii=False).encode('utf-8')
+
+    bodies = [body_for(context)]
+    if len(bodies[0]) > max_bytes:
+        bodies = [body_for(c) for c in shard_contexts(context, whole_tasks=True)]
+
+    cache = get_default_cache()
+
+    def send(i):
+        t0 = monotonic()
+        key = cache_key(api_url, LLM_SYSTEM_PROMPT, bodies[i])
+        cached = cache.get(key) if cache else None
+        payload = json.loads(cached) if cached is not None else post_llm_request(api_url, api_key, bodies[i], timeout)
+        stats = {'request': i + 1, 'bytes': len(bodies[i]), 'est_tokens': len(bodies[i]) // 4,
+                 'latency_s': round(monotonic() - t0, 3), 'cached': cached is not None,
+                 'prompt_tokens': payload.get('usage', {}).get('prompt_tokens'),
+                 'completion_tokens': payload.get('usage', {}).get('completion_tokens')}
+        print(f"[LLM] requête {i + 1}/{len(bodies)} : {stats['bytes']} octets, ~{stats['est_tokens']} tokens "
+              f"(facturés: {stats['prompt_tokens']}), {stats['latency_s']} s"
+              + (" [cache]" if stats['cached'] else ""))
+        content = payload.get('choices', [{}])[0].get('message', {}).get('content', '{}')
+        result = json.loads(content)
+        if cache and cached is None:
+            cache.put(key, json.dumps(payload, ensure_ascii=False))
+        return result, stats
 
     try:
-        with urllib.request.urlopen(req, timeout=60) as resp:
-            payload = json.loads(resp.read().decode('utf-8'))
-        content = payload.get('choices', [{}])[0].get('message', {}).get('content', '{}')
-        return json.loads(content)
+        if len(bodies) == 1:
+            results = [send(0)]
+        else:
+            from concurrent.futures import ThreadPoolExecutor
+            with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+                results = list(pool.map(send, range(len(bodies))))
     except Exception as e:
         print(f"[WARN] Appel Azure OpenAI échoué: {e}. Passage à l'heuristique locale.")
         return {}
 
+    stats = [st for _, st in results]
+    if len(results) == 1:
+        result = results[0][0]
+    else:
+        rows = [p for r, _ in results for p in r.get('plan', [])]
+        plan, _ = merge_shard_plans(context, rows)
+        result = {"plan": plan, "notes": " | ".join(str(r.get('notes', '')) for r, _ in results)}
+    if isinstance(result, dict):
+        result['llm_requests'] = stats
+    return result
+
 
 # ---------- Heuristique locale (greedy) ----------
 def minutes_between(t1: time, t2: time) -> int:
@@ -302,237 +751,1060 @@ def add_minutes(t: time, mins: int) -> time:
     dt = datetime.combine(date.today(), t) + timedelta(minutes=mins)
     return dt.time()
 
-def can_do_task(emp: Dict[str, Any], task: Dict[str, Any]) -> bool:
-    req = set(task.get('required_skills', []))
-    have = set(emp.get('skills', []))
-    return req.issubset(have)
-
-def slots_from_availability(avails: List[Dict[str,str]], day: str, granularity_min=30):
-    for a in avails:
-        if a['day'] == day:
-            st, en = parse_time(a['start']), parse_time(a['end'])
-            cur = st
-            while add_minutes(cur, granularity_min) <= en:
-                nxt = add_minutes(cur, granularity_min)
-                yield (cur, nxt)
-                cur = nxt
-
-def build_existing_map(preassign: List[Dict[str,Any]]):
-    occ = defaultdict(lambda: defaultdict(list))  # emp_id -> date -> [(start,end)]
-    for p in preassign:
-        occ[p['employee_id']][p['date']].append((parse_time(p['start_time']), parse_time(p['end_time'])))
-    # fusion des intervalles
-    for emp, days in occ.items():
-        for d, intervals in days.items():
+# ---------- Index des compétences ----------
+class SkillIndex:
+    """
+    Index inversé compétence -> bitset d'employés (entiers Python, bit i = i-ème employé du contexte).
+    Les employés compétents pour une tâche = ET des bitsets de ses compétences requises,
+    mémoïsé par signature (ensemble de compétences requises).
+    """
+
+    def __init__(self, employees: List[Dict[str, Any]]):
+        self.employees = list(employees)
+        self.bit = {}
+        self.all_mask = (1 << len(self.employees)) - 1
+        self.by_skill = defaultdict(int)
+        for i, e in enumerate(self.employees):
+            self.bit[e['id']] = 1 << i
+            for sk in e.get('skills', []):
+                self.by_skill[sk] |= 1 << i
+        self._masks = {}
+        self._candidates = {}
+
+    def mask(self, required_skills) -> int:
+        sig = frozenset(required_skills or ())
+        m = self._masks.get(sig)
+        if m is None:
+            m = self.all_mask
+            for sk in sig:
+                m &= self.by_skill.get(sk, 0)
+            self._masks[sig] = m
+        return m
+
+    def can_do(self, emp_id, required_skills) -> bool:
+        return bool(self.mask(required_skills) & self.bit.get(emp_id, 0))
+
+    def candidates(self, required_skills, assigned_to=None) -> List[Dict[str, Any]]:
+        """Employés compétents, assigned_to en tête s'il l'est ; liste partagée entre tâches de même signature."""
+        m = self.mask(required_skills)
+        if not (assigned_to and m & self.bit.get(assigned_to, 0)):
+            assigned_to = None
+        key = (m, assigned_to)
+        lst = self._candidates.get(key)
+        if lst is None:
+            lst = []
+            if assigned_to is not None:
+                lst.append(self.employees[self.bit[assigned_to].bit_length() - 1])
+                m &= ~self.bit[assigned_to]
+            while m:
+                low = m & -m
+                lst.append(self.employees[low.bit_length() - 1])
+                m ^= low
+            self._candidates[key] = lst
+        return lst
+
+
+# ---------- État incrémental du greedy ----------
+class PlannerState:
+    """
+    État indexé du greedy, mis à jour à chaque placement :
+      - occupation par (employé, ordinal du jour) : liste triée d'intervalles en minutes (bisect),
+      - minutes cumulées par (employé, année ISO, semaine ISO),
+      - bitmap d'absences par employé sur la fenêtre (bit i = from_date + i jours),
+      - fenêtres de dispo par (employé, jour de semaine), découpées une seule fois.
+    """
+
+    def __init__(self, context: Dict[str, Any]):
+        self.granularity = context['slot_granularity_minutes']
+        tw_from = datetime.strptime(context['time_window']['from'], "%Y-%m-%d").date()
+        tw_to = datetime.strptime(context['time_window']['to'], "%Y-%m-%d").date()
+        self.origin = tw_from.toordinal()
+        self.occ = defaultdict(list)          # (emp, ordinal) -> [(s, e)] trié, sans chevauchement
+        self.week_min = defaultdict(int)      # (emp, année ISO, semaine ISO) -> minutes
+        self.absent_bits = defaultdict(int)   # emp -> bitmap des jours d'absence
+        self.saturated = set()                # (emp, ordinal) sans aucun créneau libre (monotone)
+        self._iso_week = {}
+        self._windows = {}
+
+        # mêmes entrées en minutes / ordinaux, lues dans les colonnes du contexte compact sans dict intermédiaire
+        if isinstance(context, CompactContext):
+            avail_rows = context.iter_availability()
+            pre_rows = ((e, od, s, en) for e, _, od, s, en in context.iter_preexisting())
+            abs_rows = context.iter_absences()
+        else:
+            avail_rows = ((e['id'], a['day'], hm_to_min(a['start']), hm_to_min(a['end']))
+                          for e in context['employees'] for a in e.get('availability', []))
+            pre_rows = ((p['employee_id'], date.fromisoformat(p['date']).toordinal(),
+                         hm_to_min(p['start_time']), hm_to_min(p['end_time']))
+                        for p in context['preexisting_assignments'])
+            abs_rows = ((emp_id, date.fromisoformat(rng['start']).toordinal(), date.fromisoformat(rng['end']).toordinal())
+                        for emp_id, rngs in context.get('absences', {}).items() for rng in rngs)
+
+        self.avail = defaultdict(list)        # emp -> [(jour de semaine, début, fin)]
+        for emp_id, dow, s, e in avail_rows:
+            self.avail[emp_id].append((dow, s, e))
+
+        # planning existant : fusion par (employé, jour) comme avant, puis compteurs hebdo
+        raw = defaultdict(list)
+        for emp_id, od, s, e in pre_rows:
+            raw[(emp_id, od)].append((s, e))
+        for (emp_id, od), intervals in raw.items():
             intervals.sort(key=lambda x: x[0])
             merged = []
-            for s,e in intervals:
+            for s, e in intervals:
                 if not merged or s >= merged[-1][1]:
-                    merged.append([s,e])
+                    merged.append([s, e])
                 else:
                     merged[-1][1] = max(merged[-1][1], e)
-            occ[emp][d] = [(s,e) for s,e in merged]
-    return occ
-
-def is_free(occ_map, emp_id, d, s, e):
-    for (os, oe) in occ_map.get(emp_id, {}).get(d, []):
-        if not (e <= os or s >= oe):
-            return False
-    return True
-
-def weekly_hours_used(occ_map, emp_id, d: date) -> float:
-    year, week, _ = d.isocalendar()
-    total_min = 0
-    for day_str, intervals in occ_map.get(emp_id, {}).items():
-        dd = datetime.strptime(day_str, "%Y-%m-%d").date()
-        y2, w2, _ = dd.isocalendar()
-        if (y2, w2) == (year, week):
-            for (s,e) in intervals:
-                total_min += minutes_between(s,e)
-    return total_min / 60.0
-
-def is_absent(absences_map, emp_id, d: date) -> bool:
-    for rng in absences_map.get(emp_id, []):
-        s = datetime.strptime(rng['start'], '%Y-%m-%d').date()
-        e = datetime.strptime(rng['end'], '%Y-%m-%d').date()
-        if s <= d <= e:
+            self.week_min[(emp_id,) + self.iso_week(od)] += sum(e - s for s, e in merged)
+            # un intervalle inversé (fin < début) ne bloque aucun créneau
+            self.occ[(emp_id, od)] = [(s, e) for s, e in merged if e > s]
+
+        lo, hi = self.origin, tw_to.toordinal()
+        for emp_id, s, e in abs_rows:
+            s, e = max(s, lo), min(e, hi)
+            if s <= e:
+                self.absent_bits[emp_id] |= ((1 << (e - s + 1)) - 1) << (s - lo)
+
+    def iso_week(self, od: int):
+        yw = self._iso_week.get(od)
+        if yw is None:
+            yw = self._iso_week[od] = date.fromordinal(od).isocalendar()[:2]
+        return yw
+
+    def is_absent(self, emp_id, od: int) -> bool:
+        off = od - self.origin
+        return off >= 0 and (self.absent_bits.get(emp_id, 0) >> off) & 1 == 1
+
+    def week_minutes(self, emp_id, od: int) -> int:
+        return self.week_min.get((emp_id,) + self.iso_week(od), 0)
+
+    def windows(self, emp_id, dow: str):
+        """
+        Fenêtres (début, fin alignée sur la grille) du jour de semaine, dans l'ordre de la dispo,
+        et un drapeau `ordered` : vrai si les créneaux successifs ne reculent jamais
+        (cas normal, qui autorise le calcul direct des blocs libres).
+        """
+        key = (emp_id, dow)
+        cached = self._windows.get(key)
+        if cached is None:
+            g = self.granularity
+            wins = []
+            for day, st, en in self.avail.get(emp_id, ()):
+                if day != dow:
+                    continue
+                n = (en - st) // g
+                if n > 0:
+                    wins.append((st, st + n * g))
+            ordered = all(wins[i][0] >= wins[i - 1][1] for i in range(1, len(wins)))
+            cached = self._windows[key] = (wins, ordered)
+        return cached
+
+    def is_free(self, emp_id, od: int, s: int, e: int) -> bool:
+        lst = self.occ.get((emp_id, od))
+        if not lst:
             return True
-    return False
+        i = bisect_left(lst, (e,))
+        return i == 0 or lst[i - 1][1] <= s
+
+    def is_free_scan(self, emp_id, od: int, s: int, e: int) -> bool:
+        """Variante linéaire, correcte même si l'occupation contient des chevauchements."""
+        for os_, oe_ in self.occ.get((emp_id, od), ()):
+            if not (e <= os_ or s >= oe_):
+                return False
+        return True
+
+    def free_runs(self, emp_id, od: int, wins):
+        """Blocs libres contigus (début, durée) sur des fenêtres ordonnées, par soustraction sur la grille."""
+        busy = self.occ.get((emp_id, od), ())
+        runs = []
+        for ws, we in wins:
+            for s, e in subtract_intervals([(ws, we)], busy, self.granularity):
+                if runs and runs[-1][1] == s:
+                    runs[-1][1] = e
+                else:
+                    runs.append([s, e])
+        return [(s, e - s) for s, e in runs]
+
+    def place(self, emp_id, od: int, s: int, e: int):
+        insort(self.occ[(emp_id, od)], (s, e))
+        self.week_min[(emp_id,) + self.iso_week(od)] += e - s
+
+
+# ---------- Index de disponibilités (qui est libre ?) ----------
+class AvailabilityIndex:
+    """
+    Index interrogeable des intervalles libres (disponibilités - absences approuvées - planning) :
+      - par ordinal de jour : employé -> blocs libres contigus triés [[début, fin]] en minutes,
+        plus long bloc par employé et bitmap des employés libres ce jour-là,
+      - combiné au SkillIndex : employés compétents ET libres = ET de deux bitmaps, puis un test
+        sur le plus long bloc (aucun parcours des créneaux de 30 min),
+      - minutes hebdo déjà planifiées par (employé, année ISO, semaine ISO) pour le plafond hebdo.
+    Tenu à jour en place par add_assignment / add_rows (et sync_planning pour les lignes ajoutées en base).
+    """
+
+    def __init__(self, context: CompactContext, last_rowid: int = 0):
+        self.context = context
+        self.granularity = context.granularity
+        self.from_ord, self.to_ord = context.from_ord, context.to_ord
+        self.working_days = {WEEKDAYS.index(d) for d in context.rules.get('working_days', WEEKDAYS)}
+        self.skills = SkillIndex(context['employees'])
+        self.names = dict(zip(context.emp_ids, context.emp_names))
+        self.weekly_max = {emp_id: _num_out(w) for emp_id, w in zip(context.emp_ids, context.emp_weekly_max)}
+        self.task_pos = {task_id: i for i, task_id in enumerate(context.task_ids)}
+        self.last_rowid = last_rowid          # dernière ligne de planning prise en compte (sync_planning)
+
+        raw = defaultdict(list)               # (ordinal, employé) -> morceaux libres
+        for emp_id, od, s, e in zip(context.free_emp, context.free_day, context.free_start, context.free_end):
+            raw[(od, emp_id)].append((s, e))
+        self.free = defaultdict(dict)         # ordinal -> employé -> [[début, fin]] contigus, triés
+        self.longest = defaultdict(dict)      # ordinal -> employé -> durée du plus long bloc
+        self.day_mask = defaultdict(int)      # ordinal -> bitmap SkillIndex des employés libres
+        for (od, emp_id), ivs in raw.items():
+            self._set_runs(od, emp_id, [list(r) for r in merge_intervals(ivs)])
+
+        self.week_min = defaultdict(int)
+        for emp_id, _, od, s, e in context.iter_preexisting():
+            if e > s:
+                self.week_min[(emp_id,) + date.fromordinal(od).isocalendar()[:2]] += e - s
+
+    def _set_runs(self, od: int, emp_id, runs):
+        bit = self.skills.bit.get(emp_id, 0)
+        if runs:
+            self.free[od][emp_id] = runs
+            self.longest[od][emp_id] = max(e - s for s, e in runs)
+            self.day_mask[od] |= bit
+        else:
+            self.free[od].pop(emp_id, None)
+            self.longest[od].pop(emp_id, None)
+            self.day_mask[od] &= ~bit
+
+    def _ordinal(self, day) -> int:
+        od = (day if isinstance(day, date) else date.fromisoformat(day)).toordinal()
+        if not self.from_ord <= od <= self.to_ord:
+            raise ValueError(f"Date {dstr(date.fromordinal(od))} hors de la fenêtre indexée "
+                             f"{dstr(date.fromordinal(self.from_ord))}..{dstr(date.fromordinal(self.to_ord))}.")
+        return od
+
+    def _employees(self, mask: int):
+        employees = self.skills.employees
+        while mask:
+            low = mask & -mask
+            yield employees[low.bit_length() - 1]['id']
+            mask ^= low
+
+    # --- requêtes ---
+    def free_employees(self, day, required_skills=(), min_minutes: int = 0) -> List[Dict[str, Any]]:
+        """Employés ayant toutes les compétences et un bloc libre contigu >= min_minutes le jour `day`."""
+        od = self._ordinal(day)
+        min_minutes = max(min_minutes, self.granularity)
+        longest, runs = self.longest.get(od, {}), self.free.get(od, {})
+        out = [{'employee_id': emp_id, 'name': self.names.get(emp_id),
+                'free': [[min_to_hm(s), min_to_hm(e)] for s, e in runs[emp_id]],
+                'longest_minutes': longest[emp_id]}
+               for emp_id in self._employees(self.skills.mask(required_skills) & self.day_mask.get(od, 0))
+               if longest[emp_id] >= min_minutes]
+        out.sort(key=lambda x: (-x['longest_minutes'], x['employee_id']))
+        return out
+
+    def first_free_block(self, task_id, minutes: int, after=None, before=None,
+                         weekly_max: bool = True) -> Dict[str, Any]:
+        """
+        Premier bloc libre de `minutes` pour la tâche (compétences requises, jours ouvrés), du jour `after`
+        (défaut : début de fenêtre) au jour `before` (défaut : deadline de la tâche, sinon fin de fenêtre).
+        À jour égal : heure de début la plus tôt, puis assigned_to, puis ordre des employés.
+        weekly_max : écarte les employés dont le plafond hebdo serait dépassé. None si aucun bloc.
+        """
+        i = self.task_pos.get(task_id)
+        if i is None:
+            raise KeyError(f"Tâche {task_id} absente du contexte (inconnue ou terminée).")
+        ctx = self.context
+        minutes = max(minutes, self.granularity)
+        lo = self._ordinal(after) if after else self.from_ord
+        hi = self._ordinal(before) if before else min(ctx.task_deadline[i] or self.to_ord, self.to_ord)
+        assigned = ctx.task_assigned[i] or None
+        mask = self.skills.mask(ctx.skills_of(ctx.task_skills[i]))
+        for od in range(lo, hi + 1):
+            if (od - 1) % 7 not in self.working_days:  # ordinal 1 = lundi
+                continue
+            candidates = mask & self.day_mask.get(od, 0)
+            if not candidates:
+                continue
+            longest, runs = self.longest[od], self.free[od]
+            week = date.fromordinal(od).isocalendar()[:2]
+            best = None
+            for emp_id in self._employees(candidates):
+                if longest[emp_id] < minutes:
+                    continue
+                cap = self.weekly_max.get(emp_id)
+                if weekly_max and cap is not None and self.week_min[(emp_id,) + week] + minutes > cap * 60:
+                    continue
+                start = next(s for s, e in runs[emp_id] if e - s >= minutes)
+                key = (start, emp_id != assigned)
+                if best is None or key < best[0]:
+                    best = (key, emp_id)
+            if best is not None:
+                start, emp_id = best[0][0], best[1]
+                return {'task_id': task_id, 'employee_id': emp_id, 'name': self.names.get(emp_id),
+                        'date': dstr(date.fromordinal(od)), 'start_time': min_to_hm(start),
+                        'end_time': min_to_hm(start + minutes)}
+        return None
+
+    # --- mises à jour incrémentales ---
+    def add_assignment(self, emp_id, day, start: int, end: int):
+        """Retire [start, end) (minutes) des blocs libres de l'employé ce jour-là et compte ses heures hebdo."""
+        od = (day if isinstance(day, date) else date.fromisoformat(day)).toordinal()
+        if end <= start or not self.from_ord <= od <= self.to_ord:
+            return
+        self.week_min[(emp_id,) + date.fromordinal(od).isocalendar()[:2]] += end - start
+        runs = self.free.get(od, {}).get(emp_id)
+        if not runs:
+            return
+        i = bisect_left(runs, [end])  # blocs commençant avant `end`
+        if i == 0 or runs[i - 1][1] <= start:
+            return  # aucun bloc libre touché
+        # soustraction sur la grille, ancrée au début de chaque bloc libre (comme compute_free_intervals)
+        self._set_runs(od, emp_id, [list(r) for r in subtract_intervals(runs, [(start, end)], self.granularity)])
+
+    def add_rows(self, rows) -> int:
+        """Applique des lignes de plan {employee_id, date, start_time, end_time} ; retourne leur nombre."""
+        n = 0
+        for p in rows:
+            self.add_assignment(p['employee_id'], p['date'], hm_to_min(p['start_time']), hm_to_min(p['end_time']))
+            n += 1
+        return n
+
+    def sync_planning(self, conn: sqlite3.Connection) -> int:
+        """
+        Applique les lignes de planning insérées en base depuis la construction (rowid > last_rowid).
+        Ne voit ni les mises à jour ni les suppressions : dans ce cas, reconstruire l'index.
+        """
+        f, t = dstr(date.fromordinal(self.from_ord)), dstr(date.fromordinal(self.to_ord))
+        n = 0
+        for rowid, emp_id, ds, st, en in db.iter_rows(conn, """
+            SELECT rowid, employee_id, date, start_time, end_time FROM planning
+            WHERE rowid > ? ORDER BY rowid
+        """, (self.last_rowid,)):
+            self.last_rowid = rowid
+            if f <= ds <= t:
+                self.add_assignment(emp_id, ds, hm_to_min(st), hm_to_min(en))
+                n += 1
+        return n
+
+
+def load_availability_index(conn: sqlite3.Connection, from_date: date, to_date: date,
+                            granularity_min: int = 30) -> AvailabilityIndex:
+    """Contexte compact + dernier rowid de planning lus dans la même transaction de lecture (même instantané)."""
+    in_tx = conn.in_transaction
+    if not in_tx:
+        conn.execute("BEGIN")
+    try:
+        last_rowid = conn.execute("SELECT COALESCE(MAX(rowid), 0) FROM planning").fetchone()[0]
+        context = load_compact_context(conn, from_date, to_date, granularity_min)
+    finally:
+        if not in_tx:
+            conn.rollback()
+    return AvailabilityIndex(context, last_rowid)
+
+
+GREEDY_NOTES = ("Heuristique: priorité -> deadline, 30min, blocs ≤6h, heures hebdo strictes sauf remplacement "
+                "autorisé, absences prises en compte.")
 
 def greedy_plan(context: Dict[str,Any]) -> Dict[str,Any]:
+    return {"plan": list(iter_greedy_plan(context)), "notes": GREEDY_NOTES}
+
+def iter_greedy_plan(context: Dict[str,Any]):
+    """Heuristique greedy en flux : chaque affectation est produite dès qu'elle est placée."""
     employees = {e['id']: e for e in context['employees']}
     tasks = list(context['tasks'])
-    pre = context['preexisting_assignments']
     rules = context['rules']
-    absences = context.get('absences', {})
     tw_from = datetime.strptime(context['time_window']['from'], "%Y-%m-%d").date()
     tw_to = datetime.strptime(context['time_window']['to'], "%Y-%m-%d").date()
 
-    occ = build_existing_map(pre)
+    state = PlannerState(context)
+    skills = SkillIndex(context['employees'])
+    gran = state.granularity
+    max_block = int(rules['max_continuous_hours']*60)
+    working_days = set(rules['working_days'])
 
     priority_rank = {"Critical": 4, "High": 3, "Medium": 2, "Low": 1}
-    tasks.sort(key=lambda t: (-priority_rank.get(t.get('priority','Medium'),2), t.get('deadline','9999-12-31')))
+    tasks.sort(key=lambda t: (-priority_rank.get(t.get('priority','Medium'),2), t.get('deadline') or '9999-12-31'))
 
-    plan = []
     remaining = {t['id']: float(t['duration_hours']) for t in tasks}
 
     for t in tasks:
+        tid = t['id']
         deadline = datetime.strptime(t['deadline'], "%Y-%m-%d").date() if t.get('deadline') else tw_to
+        assigned = t.get('assigned_to')
         # candidats: d'abord assigned_to si compétent, puis autres compétents
-        candidates = []
-        if t.get('assigned_to') and t['assigned_to'] in employees and can_do_task(employees[t['assigned_to']], t):
-            candidates.append(employees[t['assigned_to']])
-        for e in employees.values():
-            if t.get('assigned_to') == e['id']:
-                continue
-            if can_do_task(e, t):
-                candidates.append(e)
+        candidates = skills.candidates(t.get('required_skills', []), assigned)
+        assigned_emp_ok = bool(assigned in employees and employees[assigned]['accept_replacement'])
 
         for day in daterange(tw_from, min(tw_to, deadline)):
-            if remaining[t['id']] <= 0:
+            if remaining[tid] <= 0:
                 break
-            if weekday_str(day) not in rules['working_days']:
+            dow = weekday_str(day)
+            if dow not in working_days:
                 continue
             day_str = dstr(day)
+            od = day.toordinal()
             for emp in candidates:
-                if is_absent(absences, emp['id'], day):
+                if int(remaining[tid]*60) < gran:
+                    break  # plus aucun bloc plaçable pour cette tâche
+                emp_id = emp['id']
+                if state.is_absent(emp_id, od):
                     continue
-                slots = list(slots_from_availability(emp['availability'], weekday_str(day), granularity_min=context['slot_granularity_minutes']))
-                if not slots:
+                if (emp_id, od) in state.saturated:
                     continue
+                wins, ordered = state.windows(emp_id, dow)
+                if not wins:
+                    continue
+                replacement_allowed = bool(assigned and assigned != emp_id
+                                           and (emp.get('accept_replacement') or assigned_emp_ok))
+                if not replacement_allowed and \
+                        (state.week_minutes(emp_id, od) / 60.0 + gran/60.0) > emp['weekly_hours_max']:
+                    continue  # même le plus petit bloc dépasserait le plafond hebdo
+
+                def try_place(bs, block_minutes):
+                    """Place le bloc si possible ; retourne la ligne de plan ou None."""
+                    to_assign_min = min(block_minutes, max_block, int(remaining[tid]*60))
+                    if to_assign_min < gran:
+                        return None
+                    week_hours_before = state.week_minutes(emp_id, od) / 60.0
+                    if (week_hours_before + to_assign_min/60.0) <= emp['weekly_hours_max'] or replacement_allowed:
+                        be = bs + to_assign_min
+                        state.place(emp_id, od, bs, be)
+                        remaining[tid] -= to_assign_min/60.0
+                        return {
+                            'employee_id': emp_id,
+                            'task_id': tid,
+                            'date': day_str,
+                            'start_time': min_to_hm(bs),
+                            'end_time': min_to_hm(be),
+                            'pause': None
+                        }
+                    return None
+
+                if ordered:
+                    runs = state.free_runs(emp_id, od, wins)
+                    if not runs:
+                        state.saturated.add((emp_id, od))
+                    for bs, block_minutes in runs:
+                        row = try_place(bs, block_minutes)
+                        if row:
+                            yield row
+                    continue
+
+                # fenêtres qui se chevauchent / désordonnées : parcours créneau par créneau,
+                # identique à l'heuristique historique (les placements influencent la suite)
                 block_start = None
                 block_minutes = 0
-                for (s,e_) in slots:
-                    if not is_free(occ, emp['id'], day_str, s, e_):
-                        if block_start and block_minutes > 0:
-                            max_block_min = min(block_minutes, int(rules['max_continuous_hours']*60))
-                            to_assign_min = min(max_block_min, int(remaining[t['id']]*60))
-                            if to_assign_min >= context['slot_granularity_minutes']:
-                                bs = block_start
-                                be = add_minutes(block_start, to_assign_min)
-                                is_replacement = (t.get('assigned_to') and t['assigned_to'] != emp['id'])
-                                week_hours_before = weekly_hours_used(occ, emp['id'], day)
-                                assigned_emp_ok = False
-                                if is_replacement and t.get('assigned_to') in employees:
-                                    assigned_emp_ok = employees[t['assigned_to']]['accept_replacement']
-                                replacement_allowed = is_replacement and (emp.get('accept_replacement') or assigned_emp_ok)
-                                if (week_hours_before + to_assign_min/60.0) <= emp['weekly_hours_max'] or replacement_allowed:
-                                    plan.append({
-                                        'employee_id': emp['id'],
-                                        'task_id': t['id'],
-                                        'date': day_str,
-                                        'start_time': tstr(bs),
-                                        'end_time': tstr(be),
-                                        'pause': None
-                                    })
-                                    occ[emp['id']].setdefault(day_str, []).append((bs, be))
-                                    remaining[t['id']] -= to_assign_min/60.0
-                        block_start = None
-                        block_minutes = 0
-                        continue
-                    if block_start is None:
-                        block_start = s
-                        block_minutes = minutes_between(s,e_)
-                    else:
-                        prev_end = add_minutes(block_start, block_minutes)
-                        if s == prev_end:
-                            block_minutes += minutes_between(s,e_)
+                any_free = False
+                for ws, we in wins:
+                    for s in range(ws, we, gran):
+                        if not state.is_free_scan(emp_id, od, s, s + gran):
+                            if block_start is not None:
+                                row = try_place(block_start, block_minutes)
+                                if row:
+                                    yield row
+                            block_start = None
+                            block_minutes = 0
+                            continue
+                        any_free = True
+                        if block_start is None:
+                            block_start, block_minutes = s, gran
+                        elif s == block_start + block_minutes:
+                            block_minutes += gran
                         else:
-                            max_block_min = min(block_minutes, int(rules['max_continuous_hours']*60))
-                            to_assign_min = min(max_block_min, int(remaining[t['id']]*60))
-                            if to_assign_min >= context['slot_granularity_minutes']:
-                                bs = block_start
-                                be = add_minutes(block_start, to_assign_min)
-                                is_replacement = (t.get('assigned_to') and t['assigned_to'] != emp['id'])
-                                week_hours_before = weekly_hours_used(occ, emp['id'], day)
-                                assigned_emp_ok = False
-                                if is_replacement and t.get('assigned_to') in employees:
-                                    assigned_emp_ok = employees[t['assigned_to']]['accept_replacement']
-                                replacement_allowed = is_replacement and (emp.get('accept_replacement') or assigned_emp_ok)
-                                if (week_hours_before + to_assign_min/60.0) <= emp['weekly_hours_max'] or replacement_allowed:
-                                    plan.append({
-                                        'employee_id': emp['id'],
-                                        'task_id': t['id'],
-                                        'date': day_str,
-                                        'start_time': tstr(bs),
-                                        'end_time': tstr(be),
-                                        'pause': None
-                                    })
-                                    occ[emp['id']].setdefault(day_str, []).append((bs, be))
-                                    remaining[t['id']] -= to_assign_min/60.0
-                            block_start = s
-                            block_minutes = minutes_between(s,e_)
-                if block_start and remaining[t['id']] > 0:
-                    max_block_min = min(block_minutes, int(rules['max_continuous_hours']*60))
-                    to_assign_min = min(max_block_min, int(remaining[t['id']]*60))
-                    if to_assign_min >= context['slot_granularity_minutes']:
-                        bs = block_start
-                        be = add_minutes(block_start, to_assign_min)
-                        is_replacement = (t.get('assigned_to') and t['assigned_to'] != emp['id'])
-                        week_hours_before = weekly_hours_used(occ, emp['id'], day)
-                        assigned_emp_ok = False
-                        if is_replacement and t.get('assigned_to') in employees:
-                            assigned_emp_ok = employees[t['assigned_to']]['accept_replacement']
-                        replacement_allowed = is_replacement and (emp.get('accept_replacement') or assigned_emp_ok)
-                        if (week_hours_before + to_assign_min/60.0) <= emp['weekly_hours_max'] or replacement_allowed:
-                            plan.append({
-                                'employee_id': emp['id'],
-                                'task_id': t['id'],
-                                'date': day_str,
-                                'start_time': tstr(bs),
-                                'end_time': tstr(be),
-                                'pause': None
-                            })
-                            occ[emp['id']].setdefault(day_str, []).append((bs, be))
-                            remaining[t['id']] -= to_assign_min/60.0
-
-    notes = "Heuristique: priorité -> deadline, 30min, blocs ≤6h, heures hebdo strictes sauf remplacement autorisé, absences prises en compte."
-    return {"plan": plan, "notes": notes}
+                            row = try_place(block_start, block_minutes)
+                            if row:
+                                yield row
+                            block_start, block_minutes = s, gran
+                if block_start is not None and remaining[tid] > 0:
+                    row = try_place(block_start, block_minutes)
+                    if row:
+                        yield row
+                if not any_free:
+                    state.saturated.add((emp_id, od))
+
+
+# ---------- Solveur exact (flot maximal par priorité) ----------
+class SolverTimeout(Exception):
+    """Le solveur a dépassé son budget de temps (--time-limit)."""
+
+
+class MaxFlow:
+    """Dinic sur listes d'adjacence (arcs pairés : e et e^1), DFS itératif."""
+
+    INF = 1 << 60
+
+    def __init__(self):
+        self.adj = []
+        self.to = []
+        self.cap = []
+
+    def add_node(self) -> int:
+        self.adj.append([])
+        return len(self.adj) - 1
+
+    def add_edge(self, u: int, v: int, c: int) -> int:
+        self.adj[u].append(len(self.to)); self.to.append(v); self.cap.append(c)
+        self.adj[v].append(len(self.to)); self.to.append(u); self.cap.append(0)
+        return len(self.to) - 2
+
+    def flow_on(self, e: int) -> int:
+        return self.cap[e ^ 1]
+
+    def max_flow(self, s: int, t: int, deadline: float = None) -> int:
+        adj, to, cap = self.adj, self.to, self.cap
+        n = len(adj)
+        total = 0
+        while True:
+            if deadline is not None and monotonic() > deadline:
+                raise SolverTimeout("Budget de temps du solveur dépassé.")
+            level = [-1] * n
+            level[s] = 0
+            queue = [s]
+            for u in queue:
+                lu = level[u] + 1
+                for e in adj[u]:
+                    v = to[e]
+                    if cap[e] > 0 and level[v] < 0:
+                        level[v] = lu
+                        queue.append(v)
+            if level[t] < 0:
+                return total
+            it = [0] * n
+            path = []
+            u = s
+            while True:
+                if u == t:
+                    f = min(cap[e] for e in path)
+                    for e in path:
+                        cap[e] -= f
+                        cap[e ^ 1] += f
+                    total += f
+                    path = []
+                    u = s
+                    if deadline is not None and monotonic() > deadline:
+                        raise SolverTimeout("Budget de temps du solveur dépassé.")
+                    continue
+                edges = adj[u]
+                lu = level[u] + 1
+                i = it[u]
+                while i < len(edges):
+                    e = edges[i]
+                    if cap[e] > 0 and level[to[e]] == lu:
+                        break
+                    i += 1
+                it[u] = i
+                if i < len(edges):
+                    path.append(edges[i])
+                    u = to[edges[i]]
+                    continue
+                if u == s:
+                    break
+                level[u] = -1  # impasse : on ne repasse plus par ce nœud dans cette phase
+                e = path.pop()
+                u = to[e ^ 1]
+                it[u] += 1
 
 
-# ---------- Validation ----------
-def validate_plan(context: Dict[str,Any], result: Dict[str,Any]) -> Dict[str,Any]:
-    employees = {e['id']: e for e in context['employees']}
-    tasks = {t['id']: t for t in context['tasks']}
+def usable_segments(pieces, max_units: int, granularity_min: int = 30):
+    """
+    Segments plaçables (début, unités) dans des morceaux libres triés et disjoints, chacun contenu
+    dans une seule fenêtre de dispo : au plus max_units pas d'affilée, puis une pause d'un pas
+    (la continuité est conservée entre deux morceaux qui se touchent).
+    """
+    segs = []
+    cont = 0
+    prev_end = None
+    for s, e in pieces:
+        if s != prev_end:
+            cont = 0
+        pos = s
+        while pos + granularity_min <= e:
+            if cont == max_units:
+                pos += granularity_min
+                cont = 0
+                continue
+            n = min(max_units - cont, (e - pos) // granularity_min)
+            segs.append((pos, n))
+            pos += n * granularity_min
+            cont += n
+        prev_end = pos if cont else None
+    return segs
+
+def window_pieces(wins, busy, granularity_min: int = 30):
+    """Fenêtres de dispo rendues disjointes (sans les fusionner) puis privées du planning existant."""
+    pieces = []
+    covered = None
+    for ws, we in sorted(wins):
+        if covered is not None:
+            ws = max(ws, covered)
+        if we > ws:
+            pieces.extend(subtract_intervals([(ws, we)], busy, granularity_min))
+        covered = we if covered is None else max(covered, we)
+    return pieces
+
+
+def flow_plan(context: Dict[str,Any], time_limit: float = 60.0) -> Dict[str,Any]:
+    """
+    Planification optimale par flot maximal, niveau de priorité par niveau (Critical d'abord) :
+    les flots déjà placés ne diminuent jamais quand on augmente le niveau suivant, ce qui
+    maximise la couverture de façon lexicographique (priorités, puis heures planifiées).
+
+    Réseau (unités = pas de granularité) :
+      source -> classe de tâches (mêmes compétences, deadline, priorité ; capacité = demande)
+      classe -> préfixe(employé, deadline)    pour chaque employé compétent
+      préfixe(e, j) -> préfixe(e, j-1)         (un jour j' <= deadline reste accessible)
+      préfixe(e, j) -> jour(e, j) -> semaine(e, semaine ISO de j) -> puits
+    Capacité d'un jour = créneaux libres (dispo - absences - planning existant), chaque ligne contenue dans
+    une fenêtre de dispo, au plus max_continuous_hours d'affilée puis une pause ; capacité d'une semaine = weekly_hours_max - heures déjà planifiées (strict,
+    sans exception de remplacement). Lève SolverTimeout au-delà de `time_limit` secondes : le budget couvre
+    la construction du réseau, le calcul du flot et le décodage du plan.
+    """
+    deadline_at = monotonic() + time_limit
+
+    def check_budget():
+        if monotonic() > deadline_at:
+            raise SolverTimeout("Budget de temps du solveur dépassé.")
+
     rules = context['rules']
-    absences = context.get('absences', {})
-    tw_from = context['time_window']['from']
-    tw_to = context['time_window']['to']
+    state = PlannerState(context)
+    skills = SkillIndex(context['employees'])
+    gran = state.granularity
+    max_units = max(1, int(rules['max_continuous_hours']*60) // gran)
+    working_days = set(rules['working_days'])
+    tw_from = datetime.strptime(context['time_window']['from'], "%Y-%m-%d").date()
+    tw_to = datetime.strptime(context['time_window']['to'], "%Y-%m-%d").date()
+    days = list(daterange(tw_from, tw_to))
+    origin = tw_from.toordinal()
+
+    net = MaxFlow()
+    src, sink = net.add_node(), net.add_node()
+
+    # capacités jour/semaine par employé
+    day_runs = {}            # (emp, idx jour) -> segments plaçables [(début, unités)]
+    prefix = {}              # emp -> [nœud préfixe par jour]
+    day_edges = {}           # (emp, idx jour) -> arc préfixe -> jour
+    for emp in context['employees']:
+        check_budget()
+        emp_id = emp['id']
+        week_nodes = {}
+        nodes = []
+        prev = None
+        for i, d in enumerate(days):
+            node = net.add_node()
+            nodes.append(node)
+            if prev is not None:
+                net.add_edge(node, prev, MaxFlow.INF)
+            prev = node
+            dow = weekday_str(d)
+            od = d.toordinal()
+            if dow not in working_days or state.is_absent(emp_id, od):
+                continue
+            wins, _ = state.windows(emp_id, dow)
+            runs = usable_segments(window_pieces(wins, state.occ.get((emp_id, od), ()), gran), max_units, gran)
+            cap = sum(u for _, u in runs)
+            if cap <= 0:
+                continue
+            yw = state.iso_week(od)
+            if yw not in week_nodes:
+                left = int((emp['weekly_hours_max'] * 60 - state.week_minutes(emp_id, od)) // gran)
+                if left <= 0:
+                    week_nodes[yw] = None
+                else:
+                    week_nodes[yw] = net.add_node()
+                    net.add_edge(week_nodes[yw], sink, left)
+            if week_nodes[yw] is None:
+                continue
+            day_node = net.add_node()
+            net.add_edge(day_node, week_nodes[yw], cap)
+            day_edges[(emp_id, i)] = net.add_edge(node, day_node, MaxFlow.INF)
+            day_runs[(emp_id, i)] = runs
+        prefix[emp_id] = nodes
+
+    # classes de tâches
+    priority_rank = {"Critical": 4, "High": 3, "Medium": 2, "Low": 1}
+    classes = defaultdict(list)   # (rang, signature, idx deadline) -> [tâches]
+    for t in context['tasks']:
+        dl = datetime.strptime(t['deadline'], "%Y-%m-%d").date() if t.get('deadline') else tw_to
+        dl_idx = (min(dl, tw_to)).toordinal() - origin
+        units = int(float(t['duration_hours']) * 60) // gran
+        if dl_idx < 0 or units <= 0:
+            continue
+        rank = priority_rank.get(t.get('priority', 'Medium'), 2)
+        classes[(rank, frozenset(t.get('required_skills') or ()), dl_idx)].append(t)
+
+    class_edges = []  # (clé, emp, arc)
+    for rank in sorted({k[0] for k in classes}, reverse=True):
+        for key, members in classes.items():
+            if key[0] != rank:
+                continue
+            check_budget()
+            cnode = net.add_node()
+            net.add_edge(src, cnode, sum(int(float(t['duration_hours']) * 60) // gran for t in members))
+            for emp in skills.candidates(key[1]):
+                class_edges.append((key, emp['id'], net.add_edge(cnode, prefix[emp['id']][key[2]], MaxFlow.INF)))
+        net.max_flow(src, sink, deadline_at)
+
+    # décodage : par employé, classes par deadline croissante sur les jours les plus tôt
+    per_emp = defaultdict(list)
+    for key, emp_id, e in class_edges:
+        f = net.flow_on(e)
+        if f:
+            per_emp[emp_id].append((key, f))
+    class_left = {key: [[t, int(float(t['duration_hours']) * 60) // gran] for t in
+                        sorted(members, key=lambda t: t['id'])] for key, members in classes.items()}
+    plan = []
+    for emp_id, entries in per_emp.items():
+        check_budget()
+        day_free = [[i, net.flow_on(day_edges[(emp_id, i)])] for i in range(len(days))
+                    if (emp_id, i) in day_edges and net.flow_on(day_edges[(emp_id, i)])]
+        day_load = defaultdict(list)   # idx jour -> [(tâche, unités)]
+        entries.sort(key=lambda x: (x[0][2], -x[0][0]))
+        for key, f in entries:
+            for slot in day_free:
+                if f == 0 or slot[0] > key[2]:
+                    break
+                take = min(f, slot[1])
+                if not take:
+                    continue
+                slot[1] -= take
+                f -= take
+                # répartition entre les tâches de la classe
+                while take:
+                    task_entry = next(x for x in class_left[key] if x[1] > 0)
+                    n = min(take, task_entry[1])
+                    task_entry[1] -= n
+                    take -= n
+                    day_load[slot[0]].append([task_entry[0]['id'], n])
+        for i, load in sorted(day_load.items()):
+            day_str = dstr(days[i])
+            for start, units in day_runs[(emp_id, i)]:
+                pos = 0
+                while pos < units and load:
+                    n = min(load[0][1], units - pos)
+                    plan.append({
+                        'employee_id': emp_id,
+                        'task_id': load[0][0],
+                        'date': day_str,
+                        'start_time': min_to_hm(start + pos * gran),
+                        'end_time': min_to_hm(start + (pos + n) * gran),
+                        'pause': None
+                    })
+                    pos += n
+                    load[0][1] -= n
+                    if not load[0][1]:
+                        load.pop(0)
+    plan.sort(key=lambda p: (p['date'], p['employee_id'], p['start_time']))
+    notes = ("Solveur flot maximal: couverture maximale par niveau de priorité, deadlines et compétences strictes, "
+             "blocs ≤6h séparés d'une pause, heures hebdo strictes, absences prises en compte.")
+    return {"plan": plan, "notes": notes}
 
-    errors, warnings = [], []
-    occ = defaultdict(lambda: defaultdict(list))
-    task_minutes_before_deadline = defaultdict(int)
 
-    def err(m): errors.append(m)
-    def warn(m): warnings.append(m)
+def local_plan(context: Dict[str,Any], engine: str = 'greedy', time_limit: float = 60.0) -> Dict[str,Any]:
+    """Moteur local sans IA : 'flow' (repli greedy si budget dépassé) ou 'greedy'."""
+    if engine == 'flow':
+        try:
+            return flow_plan(context, time_limit=time_limit)
+        except SolverTimeout as e:
+            print(f"[WARN] {e} Passage à l'heuristique locale.")
+    return greedy_plan(context)
 
+
+# ---------- Planification parallèle (shards semaine x composante) ----------
+def employee_components(context: Dict[str,Any]) -> List[List[int]]:
+    """
+    Composantes connexes du graphe employés <-> tâches (via les compétences) : deux composantes
+    ne partagent aucun employé et se planifient indépendamment. Retour: listes d'ids d'employés.
+    """
+    skills = SkillIndex(context['employees'])
+    parent = list(range(len(skills.employees)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for m in {skills.mask(t.get('required_skills', [])) for t in context['tasks']}:
+        root = None
+        while m:
+            low = m & -m
+            i = find(low.bit_length() - 1)
+            if root is None:
+                root = i
+            elif i != root:
+                parent[i] = root
+            m ^= low
+    groups = defaultdict(list)
+    for i, e in enumerate(skills.employees):
+        groups[find(i)].append(e['id'])
+    return [groups[k] for k in sorted(groups)]
+
+def iso_weeks(context: Dict[str,Any]) -> List[list]:
+    """Semaines ISO de la fenêtre : [premier jour, dernier jour, (année, semaine)]."""
+    tw_from = datetime.strptime(context['time_window']['from'], "%Y-%m-%d").date()
+    tw_to = datetime.strptime(context['time_window']['to'], "%Y-%m-%d").date()
+    weeks = []
+    for d in daterange(tw_from, tw_to):
+        if not weeks or d.isocalendar()[:2] != weeks[-1][2]:
+            weeks.append([d, d, d.isocalendar()[:2]])
+        else:
+            weeks[-1][1] = d
+    return weeks
+
+def split_task_demand(context: Dict[str,Any], weeks: List[list], whole_tasks: bool = False) -> List[Dict[int,float]]:
+    """
+    Répartit la demande des tâches entre les semaines (minutes par tâche, une table par semaine) en rejouant
+    le greedy à la maille semaine : tâches dans l'ordre (priorité, deadline), chacune prend la capacité
+    libre de ses employés compétents (intervalles libres, plafond hebdo moins heures déjà planifiées),
+    semaine après semaine jusqu'à sa deadline. Le reste va dans la semaine de sa deadline.
+    whole_tasks : toute la tâche dans la première semaine qui en reçoit une part (une seule semaine par tâche).
+    Les tâches dont la deadline précède la fenêtre ne sont dans aucune semaine.
+    """
+    week_of = {}
+    for i, (w_from, w_to, _) in enumerate(weeks):
+        for d in daterange(w_from, w_to):
+            week_of[dstr(d)] = i
+    skills = SkillIndex(context['employees'])
+    cap = [defaultdict(int) for _ in weeks]          # semaine -> employé -> minutes libres
+    for emp_id, days in context['allowed_slots'].items():
+        for ds, ivs in days.items():
+            w = week_of.get(ds)
+            if w is not None:
+                cap[w][int(emp_id)] += sum(hm_to_min(e) - hm_to_min(s) for s, e in ivs)
+    used = defaultdict(int)                          # (employé, semaine) -> minutes déjà planifiées
+    for p in context['preexisting_assignments']:
+        w = week_of.get(p['date'])
+        if w is not None:
+            used[(p['employee_id'], w)] += hm_to_min(p['end_time']) - hm_to_min(p['start_time'])
+    week_mask = [0] * len(weeks)                     # employés ayant encore de la capacité
+    for e in skills.employees:
+        wmax = e.get('weekly_hours_max')
+        for w in range(len(weeks)):
+            c = cap[w].get(e['id'], 0)
+            if wmax is not None:
+                c = min(c, int(wmax * 60) - used[(e['id'], w)])
+            cap[w][e['id']] = max(c, 0)
+            if c > 0:
+                week_mask[w] |= skills.bit[e['id']]
+
+    priority_rank = {"Critical": 4, "High": 3, "Medium": 2, "Low": 1}
+    tasks = sorted(context['tasks'], key=lambda t: (-priority_rank.get(t.get('priority', 'Medium'), 2),
+                                                    t.get('deadline') or '9999-12-31'))
+    first_day = dstr(weeks[0][0]) if weeks else None
+    out = [defaultdict(float) for _ in weeks]
+    for t in tasks:
+        deadline = t.get('deadline')
+        if not weeks or (deadline and deadline < first_day):
+            continue
+        last = week_of.get(deadline, len(weeks) - 1) if deadline else len(weeks) - 1
+        need = float(t['duration_hours']) * 60
+        mask = skills.mask(t.get('required_skills', []))
+        taken = {}
+        for w in range(last + 1):
+            m = mask & week_mask[w]
+            while m and need > 0:
+                low = m & -m
+                emp_id = skills.employees[low.bit_length() - 1]['id']
+                take = min(need, cap[w][emp_id])
+                cap[w][emp_id] -= take
+                if cap[w][emp_id] <= 0:
+                    week_mask[w] &= ~low
+                taken[w] = taken.get(w, 0) + take
+                need -= take
+                m ^= low
+            if need <= 0:
+                break
+        if need > 0:
+            taken[last] = taken.get(last, 0) + need
+        if whole_tasks:
+            out[min(taken)][t['id']] = float(t['duration_hours']) * 60
+        else:
+            for w, minutes in taken.items():
+                out[w][t['id']] += minutes
+    return out
+
+def shard_contexts(context: Dict[str,Any], whole_tasks: bool = False) -> List[Dict[str,Any]]:
+    """
+    Découpe le contexte en shards indépendants : (composante d'employés) x (semaine ISO de la fenêtre).
+    La demande de chaque tâche est répartie entre les semaines avant le découpage (split_task_demand) :
+    un shard ne reçoit que la part de demande de ses tâches pour sa semaine.
+    """
+    weeks = iso_weeks(context)
+    demand = split_task_demand(context, weeks, whole_tasks)
+    skills = SkillIndex(context['employees'])
+    shards = []
+    for comp in employee_components(context):
+        comp_set = set(comp)
+        comp_mask = 0
+        for emp_id in comp:
+            comp_mask |= skills.bit[emp_id]
+        employees = [e for e in context['employees'] if e['id'] in comp_set]
+        tasks = [t for t in context['tasks'] if skills.mask(t.get('required_skills', [])) & comp_mask]
+        if not tasks:
+            continue
+        for (w_from, w_to, _), minutes in zip(weeks, demand):
+            week_tasks = [{**t, 'duration_hours': minutes[t['id']] / 60.0} for t in tasks if minutes.get(t['id'])]
+            if not week_tasks:
+                continue
+            lo, hi = dstr(w_from), dstr(w_to)
+            shards.append({
+                **context,
+                'time_window': {'from': lo, 'to': hi},
+                'employees': employees,
+                'tasks': week_tasks,
+                'preexisting_assignments': [p for p in context['preexisting_assignments']
+                                            if p['employee_id'] in comp_set and lo <= p['date'] <= hi],
+                'absences': {k: v for k, v in context.get('absences', {}).items() if k in comp_set},
+                'allowed_slots': {k: {ds: ivs for ds, ivs in days.items() if lo <= ds <= hi}
+                                  for k, days in context.get('allowed_slots', {}).items() if k in comp_set},
+            })
+    return shards
+
+def _plan_shard(job):
+    context, engine, time_limit = job
+    return local_plan(context, engine, time_limit)['plan']
+
+def merge_shard_plans(context: Dict[str,Any], rows: List[Dict[str,Any]]):
+    """
+    Fusion déterministe : lignes triées (date, début, employé, tâche) ; chaque tâche garde ses
+    lignes jusqu'à sa durée, l'excédent est raccourci ou retiré. Retour: (plan, minutes restantes par tâche).
+    """
+    gran = context['slot_granularity_minutes']
+    left = {t['id']: int(float(t['duration_hours']) * 60) for t in context['tasks']}
+    merged = []
+    for p in sorted(rows, key=lambda p: (p['date'], p['start_time'], p['employee_id'], p['task_id'])):
+        s, e = hm_to_min(p['start_time']), hm_to_min(p['end_time'])
+        keep = min(e - s, left.get(p['task_id'], 0))
+        keep -= keep % gran
+        if keep < gran:
+            continue
+        left[p['task_id']] -= keep
+        merged.append({**p, 'end_time': min_to_hm(s + keep)})
+    return merged, left
+
+def parallel_plan(context: Dict[str,Any], engine: str = 'greedy', workers: int = 2,
+                  time_limit: float = 60.0) -> Dict[str,Any]:
+    """
+    Planification parallèle sur un pool de processus :
+      1) un shard par (composante, semaine ISO), chacun planifié avec sa part de la demande des tâches
+         (split_task_demand : chaque minute de demande n'est envoyée qu'à un seul shard),
+      2) fusion déterministe (excédents coupés dans l'ordre chronologique),
+      3) passe de réparation séquentielle sur la demande restante, avec le plan fusionné comme occupation.
+    Les composantes sont exactes ; la répartition par semaine est une estimation réparée en 3).
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    shards = shard_contexts(context)
+    rows = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for part in pool.map(_plan_shard, [(c, engine, time_limit) for c in shards]):
+            rows.extend(part)
+    merged, left = merge_shard_plans(context, rows)
+
+    gran = context['slot_granularity_minutes']
+    todo = [{**t, 'duration_hours': left[t['id']] / 60.0} for t in context['tasks'] if left[t['id']] >= gran]
+    if todo:
+        repair_ctx = {**context, 'tasks': todo,
+                      'preexisting_assignments': list(context['preexisting_assignments']) + merged}
+        merged.extend(local_plan(repair_ctx, engine, time_limit)['plan'])
+    merged.sort(key=lambda p: (p['date'], p['employee_id'], p['start_time']))
+    notes = (f"Planification parallèle ({len(shards)} shards, {workers} workers, moteur {engine}) : "
+             "demande répartie par semaine, shards semaine x composante, fusion déterministe puis réparation.")
+    return {"plan": merged, "notes": notes}
+
+
+# ---------- Validation ----------
+# Au-delà de ce nombre de lignes, 'auto' passe au backend NumPy (si installé)
+NUMPY_VALIDATION_MIN_ROWS = 2000
+
+def validate_plan(context: Dict[str,Any], result: Dict[str,Any], backend: str = 'auto') -> Dict[str,Any]:
+    """
+    Valide un plan. backend: 'python', 'numpy' ou 'auto' (NumPy pour les gros plans si disponible).
+    Les deux backends produisent exactement les mêmes erreurs/avertissements, dans le même ordre.
+    """
+    use_numpy = backend == 'numpy' or (backend == 'auto' and len(result.get('plan', [])) >= NUMPY_VALIDATION_MIN_ROWS)
+    if use_numpy and np is not None:
+        return validate_plan_numpy(context, result)
+    if backend == 'numpy':
+        print("[WARN] NumPy non installé : validation en pur Python.")
+    return validate_plan_python(context, result)
+
+def validate_plan_python(context: Dict[str,Any], result: Dict[str,Any]) -> Dict[str,Any]:
+    validator = PlanValidator(context)
     for p in result.get('plan', []):
+        validator.add(p)
+    return validator.finish()
+
+
+class PlanValidator:
+    """
+    Validation en pur Python, ligne par ligne : add() au fil du plan (éventuellement produit en flux),
+    finish() pour les contrôles globaux (couverture avant deadline, heures hebdo) et le rapport.
+    Seule l'occupation (employé, date) -> [(début, fin)] est conservée, pas les lignes du plan.
+    """
+
+    def __init__(self, context: Dict[str,Any]):
+        self.employees = {e['id']: e for e in context['employees']}
+        self.tasks = {t['id']: t for t in context['tasks']}
+        self.skills = SkillIndex(context['employees'])
+        self.rules = context['rules']
+        self.absences = context.get('absences', {})
+        self.tw_from = context['time_window']['from']
+        self.tw_to = context['time_window']['to']
+        self.errors, self.warnings = [], []
+        self.occ = defaultdict(lambda: defaultdict(list))
+        self.task_minutes_before_deadline = defaultdict(int)
+        self.rows = 0
+        self._times = {}   # 'HH:MM' -> time (peu de valeurs distinctes)
+        self._days = {}    # 'YYYY-MM-DD' -> (date, jour de semaine)
+
+    def _time(self, t: str) -> time:
+        v = self._times.get(t)
+        if v is None:
+            v = self._times[t] = parse_time(t)
+        return v
+
+    def _day(self, d: str):
+        v = self._days.get(d)
+        if v is None:
+            dd = datetime.strptime(d, "%Y-%m-%d").date()
+            v = self._days[d] = (dd, weekday_str(dd))
+        return v
+
+    def add(self, p: Dict[str,Any]):
+        err = self.errors.append
+        rules, tw_from, tw_to = self.rules, self.tw_from, self.tw_to
+        self.rows += 1
         emp_id = p['employee_id']
         task_id = p['task_id']
         d = p['date']
-        s = parse_time(p['start_time'])
-        e = parse_time(p['end_time'])
+        s = self._time(p['start_time'])
+        e = self._time(p['end_time'])
         if e <= s:
-            err(f"[Temps] fin <= début (emp {emp_id} le {d})."); continue
+            err(f"[Temps] fin <= début (emp {emp_id} le {d})."); return
         if not (tw_from <= d <= tw_to):
             err(f"[Fenêtre] {d} hors fenêtre {tw_from}..{tw_to}.")
-        if weekday_str(datetime.strptime(d, "%Y-%m-%d").date()) not in rules['working_days']:
+        the_date, wday = self._day(d)
+        if wday not in rules['working_days']:
             err(f"[Jour] {d} non autorisé.")
-        t = tasks.get(task_id); eobj = employees.get(emp_id)
+        t = self.tasks.get(task_id); eobj = self.employees.get(emp_id)
         if not t or not eobj:
-            err(f"[Références] Tâche ou employé introuvable (task={task_id}, emp={emp_id})."); continue
-        if set(t.get('required_skills', [])) - set(eobj.get('skills', [])):
+            err(f"[Références] Tâche ou employé introuvable (task={task_id}, emp={emp_id})."); return
+        if not self.skills.can_do(emp_id, t.get('required_skills', [])):
             err(f"[Compétences] Emp {emp_id} n'a pas toutes les compétences pour tâche {task_id}.")
         # disponibilité + absence
-        wday = weekday_str(datetime.strptime(d, "%Y-%m-%d").date())
-        allowed = any(a['day']==wday and parse_time(a['start'])<=s and parse_time(a['end'])>=e for a in eobj.get('availability', []))
+        allowed = any(a['day']==wday and self._time(a['start'])<=s and self._time(a['end'])>=e for a in eobj.get('availability', []))
         if not allowed:
             err(f"[Disponibilité] Emp {emp_id} non dispo {d} {tstr(s)}-{tstr(e)}.")
         else:
-            the_date = datetime.strptime(d, '%Y-%m-%d').date()
-            for rng in absences.get(emp_id, []):
-                sabs = datetime.strptime(rng['start'], '%Y-%m-%d').date()
-                eabs = datetime.strptime(rng['end'], '%Y-%m-%d').date()
+            for rng in self.absences.get(emp_id, []):
+                sabs = self._day(rng['start'])[0]
+                eabs = self._day(rng['end'])[0]
                 if sabs <= the_date <= eabs:
                     err(f"[Absence] Emp {emp_id} absent le {d}.")
                     break
@@ -540,31 +1812,215 @@ def validate_plan(context: Dict[str,Any], result: Dict[str,Any]) -> Dict[str,Any
         if minutes_between(s,e) > rules['max_continuous_hours']*60:
             err(f"[Règle 6h] Créneau > 6h (emp {emp_id} le {d}).")
         # chevauchement
-        for (os_, oe_) in occ[emp_id][d]:
+        day_occ = self.occ[emp_id][d]
+        for (os_, oe_) in day_occ:
             if not (e <= os_ or s >= oe_):
                 err(f"[Chevauchement] Emp {emp_id} {d} {tstr(s)}-{tstr(e)} chevauche {tstr(os_)}-{tstr(oe_)}.")
-        occ[emp_id][d].append((s,e))
+        day_occ.append((s,e))
         if t.get('deadline') and d <= t['deadline']:
-            task_minutes_before_deadline[task_id] += minutes_between(s,e)
+            self.task_minutes_before_deadline[task_id] += minutes_between(s,e)
+
+    def finish(self) -> Dict[str,Any]:
+        warnings = self.warnings
+        # couverture avant deadline
+        for tid, t in self.tasks.items():
+            need = int(t.get('duration_hours', 0)*60)
+            got = self.task_minutes_before_deadline.get(tid, 0)
+            if need > 0 and got < need:
+                warnings.append(f"[Deadline] Tâche {tid} incomplète avant deadline: {got/60:.1f}h / {need/60:.1f}h.")
+
+        # heures hebdo (signalement; vérifier remplacements si dépassements)
+        weekly = defaultdict(lambda: defaultdict(int))  # emp -> (y,w) -> minutes
+        for emp_id, days in self.occ.items():
+            for ds, intervals in days.items():
+                yw = self._day(ds)[0].isocalendar()[:2]
+                for (s,e) in intervals:
+                    weekly[emp_id][yw] += minutes_between(s,e)
+        for emp_id, weeks in weekly.items():
+            maxh = self.employees[emp_id]['weekly_hours_max']
+            for (y,w), mins in weeks.items():
+                if mins/60.0 > maxh:
+                    warnings.append(f"[Heures hebdo] Emp {emp_id} semaine {y}-W{w}: {mins/60.0:.1f}h > {maxh}h. "
+                                    f"Si dépassement, vérifier que ce sont des remplacements autorisés.")
+
+        return {"errors": self.errors, "warnings": warnings}
+
+
+def validate_plan_numpy(context: Dict[str,Any], result: Dict[str,Any]) -> Dict[str,Any]:
+    """
+    Validation vectorisée : le plan est encodé en colonnes NumPy (employé, jour, début/fin en minutes)
+    et chaque règle est vérifiée en bloc ; seuls les messages des lignes fautives sont formatés.
+    Chevauchements : tri (employé, date, début) + max cumulé des fins ; les groupes en conflit sont
+    ensuite détaillés paire par paire pour reproduire les messages du backend Python.
+    """
+    employees_list = list(context['employees'])
+    employees = {e['id']: e for e in employees_list}
+    tasks_list = list(context['tasks'])
+    tasks = {t['id']: t for t in tasks_list}
+    skills = SkillIndex(employees_list)
+    rules = context['rules']
+    absences = context.get('absences', {})
+    tw_from = context['time_window']['from']
+    tw_to = context['time_window']['to']
+    plan = result.get('plan', [])
+    n = len(plan)
+
+    errors, warnings = [], []
+    if n == 0:
+        return validate_plan_python(context, result)
+
+    # --- encodage (internement des chaînes : peu de dates/heures distinctes) ---
+    emp_code = {e['id']: i for i, e in enumerate(employees_list)}
+    task_code = {t['id']: i for i, t in enumerate(tasks_list)}
+    tcache, dcache = {}, {}
+    emp_ids = [p['employee_id'] for p in plan]
+    task_ids = [p['task_id'] for p in plan]
+    dates = [p['date'] for p in plan]
+    for t_ in {p['start_time'] for p in plan} | {p['end_time'] for p in plan}:
+        tcache[t_] = hm_to_min(tstr(parse_time(t_)))
+    for d_ in dates:
+        if d_ not in dcache:
+            dcache[d_] = len(dcache)
+    date_strs = list(dcache)
+    date_objs = [datetime.strptime(d_, "%Y-%m-%d").date() for d_ in date_strs]
+
+    ec = np.fromiter((emp_code.get(x, -1) for x in emp_ids), dtype=np.int64, count=n)
+    tc = np.fromiter((task_code.get(x, -1) for x in task_ids), dtype=np.int64, count=n)
+    dc = np.fromiter((dcache[x] for x in dates), dtype=np.int64, count=n)
+    s = np.fromiter((tcache[p['start_time']] for p in plan), dtype=np.int64, count=n)
+    e = np.fromiter((tcache[p['end_time']] for p in plan), dtype=np.int64, count=n)
+
+    # rang lexicographique des chaînes : comparer les rangs == comparer les chaînes
+    deadlines = [t.get('deadline') for t in tasks_list]
+    ranked = sorted(set(date_strs) | {tw_from, tw_to} | {x for x in deadlines if x})
+    rank = {x: i for i, x in enumerate(ranked)}
+    d_rank = np.array([rank[x] for x in date_strs], dtype=np.int64)[dc]
+    d_ord = np.array([x.toordinal() for x in date_objs], dtype=np.int64)
+    d_wday = np.array([x.weekday() for x in date_objs], dtype=np.int64)[dc]
+    working = np.array([w in rules['working_days'] for w in WEEKDAYS], dtype=bool)
+
+    bad_time = e <= s
+    out_window = (d_rank < rank[tw_from]) | (d_rank > rank[tw_to])
+    bad_day = ~working[d_wday]
+    ref_missing = (ec < 0) | (tc < 0)
+    valid = ~bad_time & ~ref_missing
+    ecv = np.where(ec < 0, 0, ec)
+
+    # compétences : un ET par couple (tâche, employé) distinct
+    skill_ko = np.zeros(n, dtype=bool)
+    pairs, inv = np.unique(np.stack([tc, ec])[:, valid], axis=1, return_inverse=True)
+    if pairs.shape[1]:
+        ko = np.array([not (skills.mask(tasks_list[ti].get('required_skills', [])) & skills.bit[employees_list[ei]['id']])
+                       for ti, ei in pairs.T], dtype=bool)
+        skill_ko[valid] = ko[inv.reshape(-1)]
+
+    # disponibilité : une fenêtre du jour doit contenir [s, e]
+    by_group = defaultdict(list)
+    for i, emp in enumerate(employees_list):
+        for a in emp.get('availability', []):
+            if a['day'] in WEEKDAYS:
+                by_group[i * 7 + WEEKDAYS.index(a['day'])].append(
+                    (hm_to_min(tstr(parse_time(a['start']))), hm_to_min(tstr(parse_time(a['end'])))))
+    k = max((len(v) for v in by_group.values()), default=0)
+    avail_ok = np.zeros(n, dtype=bool)
+    if k:
+        ws = np.full((len(employees_list) * 7, k), np.iinfo(np.int64).max, dtype=np.int64)
+        we = np.full((len(employees_list) * 7, k), -1, dtype=np.int64)
+        for g, wins in by_group.items():
+            for j, (a, b) in enumerate(wins):
+                ws[g, j], we[g, j] = a, b
+        grp = ecv * 7 + d_wday
+        avail_ok = ((ws[grp] <= s[:, None]) & (we[grp] >= e[:, None])).any(axis=1)
+
+    # absences : codes (employé, jour) bornés aux dates du plan
+    lo, hi = int(d_ord.min()), int(d_ord.max())
+    span = hi - lo + 1
+    codes = []
+    for emp_id, rngs in absences.items():
+        if emp_id not in emp_code:
+            continue
+        for rng in rngs:
+            a = max(datetime.strptime(rng['start'], '%Y-%m-%d').date().toordinal(), lo)
+            b = min(datetime.strptime(rng['end'], '%Y-%m-%d').date().toordinal(), hi)
+            if a <= b:
+                codes.append(emp_code[emp_id] * span + np.arange(a - lo, b - lo + 1, dtype=np.int64))
+    absent = np.zeros(n, dtype=bool)
+    if codes:
+        absent = np.isin(ecv * span + (d_ord[dc] - lo), np.concatenate(codes))
+
+    minutes = e - s
+    six_h = minutes > rules['max_continuous_hours'] * 60
+
+    # chevauchements : tri par (employé, date, début), max cumulé des fins décalé par groupe
+    overlap_msgs = {}
+    vidx = np.nonzero(valid)[0]
+    if len(vidx):
+        order = vidx[np.lexsort((s[vidx], dc[vidx], ec[vidx]))]
+        gkey = ec[order] * len(date_strs) + dc[order]
+        new_group = np.r_[True, gkey[1:] != gkey[:-1]]
+        offset = np.cumsum(new_group) * 10 ** 6
+        prev_end = np.maximum.accumulate(e[order] + offset)
+        conflict = np.r_[False, (s[order] + offset)[1:] < prev_end[:-1]]
+        for g in np.unique(gkey[conflict]):
+            seen = []
+            for i in np.sort(order[gkey == g]):
+                si, ei = s[i], e[i]
+                msgs = [f"[Chevauchement] Emp {emp_ids[i]} {dates[i]} {min_to_hm(si)}-{min_to_hm(ei)} "
+                        f"chevauche {min_to_hm(os_)}-{min_to_hm(oe_)}."
+                        for os_, oe_ in seen if not (ei <= os_ or si >= oe_)]
+                if msgs:
+                    overlap_msgs[int(i)] = msgs
+                seen.append((si, ei))
+
+    flagged = bad_time | out_window | bad_day | ref_missing | (valid & (skill_ko | ~avail_ok | absent | six_h))
+    if overlap_msgs:
+        flagged[list(overlap_msgs)] = True
+    for i in np.nonzero(flagged)[0]:
+        emp_id, task_id, d = emp_ids[i], task_ids[i], dates[i]
+        if bad_time[i]:
+            errors.append(f"[Temps] fin <= début (emp {emp_id} le {d})."); continue
+        if out_window[i]:
+            errors.append(f"[Fenêtre] {d} hors fenêtre {tw_from}..{tw_to}.")
+        if bad_day[i]:
+            errors.append(f"[Jour] {d} non autorisé.")
+        if ref_missing[i]:
+            errors.append(f"[Références] Tâche ou employé introuvable (task={task_id}, emp={emp_id})."); continue
+        if skill_ko[i]:
+            errors.append(f"[Compétences] Emp {emp_id} n'a pas toutes les compétences pour tâche {task_id}.")
+        if not avail_ok[i]:
+            errors.append(f"[Disponibilité] Emp {emp_id} non dispo {d} {min_to_hm(s[i])}-{min_to_hm(e[i])}.")
+        elif absent[i]:
+            errors.append(f"[Absence] Emp {emp_id} absent le {d}.")
+        if six_h[i]:
+            errors.append(f"[Règle 6h] Créneau > 6h (emp {emp_id} le {d}).")
+        errors.extend(overlap_msgs.get(int(i), ()))
 
     # couverture avant deadline
+    dl_rank = np.array([rank[x] if x else -1 for x in deadlines] or [-1], dtype=np.int64)
+    before = valid & (dl_rank[np.where(tc < 0, 0, tc)] >= d_rank) & (dl_rank[np.where(tc < 0, 0, tc)] >= 0)
+    got_by_task = np.bincount(tc[before], weights=minutes[before], minlength=len(tasks_list))
     for tid, t in tasks.items():
         need = int(t.get('duration_hours', 0)*60)
-        got = task_minutes_before_deadline.get(tid, 0)
+        got = int(got_by_task[task_code[tid]])
         if need > 0 and got < need:
-            warn(f"[Deadline] Tâche {tid} incomplète avant deadline: {got/60:.1f}h / {need/60:.1f}h.")
-
-    # heures hebdo (signalement; vérifier remplacements si dépassements)
-    weekly = defaultdict(lambda: defaultdict(int))  # emp -> (y,w) -> minutes
-    for emp_id, days in occ.items():
-        for ds, intervals in days.items():
-            dd = datetime.strptime(ds, "%Y-%m-%d").date()
-            yw = dd.isocalendar()[:2]
-            for (s,e) in intervals:
-                weekly[emp_id][yw] += minutes_between(s,e)
-    for emp_id, weeks in weekly.items():
-        maxh = employees[emp_id]['weekly_hours_max']
-        for (y,w), mins in weeks.items():
+            warnings.append(f"[Deadline] Tâche {tid} incomplète avant deadline: {got/60:.1f}h / {need/60:.1f}h.")
+
+    # heures hebdo : groupement par (employé, semaine ISO), ordre de première apparition
+    if len(vidx):
+        wcache = {}
+        week_of_date = np.array([wcache.setdefault(x.isocalendar()[:2], len(wcache)) for x in date_objs], dtype=np.int64)
+        weeks = list(wcache)
+        wk = ec[vidx] * len(weeks) + week_of_date[dc[vidx]]
+        keys, first, inv = np.unique(wk, return_index=True, return_inverse=True)
+        sums = np.bincount(inv.reshape(-1), weights=minutes[vidx])
+        emps, emp_first = np.unique(ec[vidx], return_index=True)
+        emp_first_of = dict(zip(emps.tolist(), emp_first.tolist()))
+        key_emp = keys // len(weeks)
+        for j in sorted(range(len(keys)), key=lambda j: (emp_first_of[int(key_emp[j])], first[j])):
+            emp_id = employees_list[int(key_emp[j])]['id']
+            y, w = weeks[int(keys[j] % len(weeks))]
+            mins = int(sums[j])
+            maxh = employees[emp_id]['weekly_hours_max']
             if mins/60.0 > maxh:
                 warnings.append(f"[Heures hebdo] Emp {emp_id} semaine {y}-W{w}: {mins/60.0:.1f}h > {maxh}h. "
                                 f"Si dépassement, vérifier que ce sont des remplacements autorisés.")
@@ -573,70 +2029,547 @@ def validate_plan(context: Dict[str,Any], result: Dict[str,Any]) -> Dict[str,Any
 
 
 # ---------- Export SQL ----------
+SQL_INSERTS_HEADER = "-- Fichier généré par Planificateur.py ; à relire avant exécution."
+
+def sql_insert_line(p: Dict[str,Any]) -> str:
+    pause_val = (f"'{p['pause']}'" if p.get('pause') else 'NULL')
+    return (
+        "INSERT INTO planning (employee_id, task_id, date, start_time, end_time, pause, validated_by_rh) "
+        f"VALUES ({p['employee_id']}, {p['task_id']}, '{p['date']}', '{p['start_time']}', '{p['end_time']}', {pause_val}, 0);"
+    )
+
 def generate_sql_inserts(plan: List[Dict[str,Any]]) -> str:
-    lines = ["-- Fichier généré par Planificateur.py ; à relire avant exécution."]
+    lines = [SQL_INSERTS_HEADER]
     for p in plan:
-        pause_val = (f"'{p['pause']}'" if p.get('pause') else 'NULL')
-        line = (
-            "INSERT INTO planning (employee_id, task_id, date, start_time, end_time, pause, validated_by_rh) "
-            f"VALUES ({p['employee_id']}, {p['task_id']}, '{p['date']}', '{p['start_time']}', '{p['end_time']}', {pause_val}, 0);"
+        lines.append(sql_insert_line(p))
+    return "\n".join(lines) + "\n"
+
+def generate_sql_delta(deletes: List[Dict[str,Any]], inserts: List[Dict[str,Any]]) -> str:
+    """Delta SQL entre deux plans : suppressions des lignes retirées puis insertions des nouvelles."""
+    lines = ["-- Delta généré par Planificateur.py replan ; à relire avant exécution."]
+    for p in deletes:
+        lines.append(
+            f"DELETE FROM planning WHERE employee_id = {p['employee_id']} AND task_id = {p['task_id']} "
+            f"AND date = '{p['date']}' AND start_time = '{p['start_time']}' AND end_time = '{p['end_time']}';"
         )
-        lines.append(line)
+    lines.extend(generate_sql_inserts(inserts).splitlines()[1:])
     return "\n".join(lines) + "\n"
 
 
+# ---------- Application directe du plan ----------
+PLANNING_INSERT = ("INSERT INTO planning (employee_id, task_id, date, start_time, end_time, pause, validated_by_rh) "
+                   "VALUES (?, ?, ?, ?, ?, ?, 0)")
+# Conflit sur UNIQUE (employee_id, date, start_time) :
+#   update : la ligne du plan remplace l'existante (inchangée => non réécrite, validated_by_rh conservé) ;
+#            une ligne validée par les RH n'est jamais écrasée (comptée dans 'protected')
+#   skip   : la ligne existante est gardée
+#   fail   : IntegrityError, le lot courant est annulé
+PLANNING_ON_CONFLICT = {
+    'update': (" ON CONFLICT(employee_id, date, start_time) DO UPDATE SET task_id = excluded.task_id, "
+               "end_time = excluded.end_time, pause = excluded.pause, validated_by_rh = 0, "
+               "last_update = datetime('now') "
+               "WHERE planning.validated_by_rh = 0 AND (planning.task_id IS NOT excluded.task_id "
+               "OR planning.end_time IS NOT excluded.end_time OR planning.pause IS NOT excluded.pause)"),
+    'skip': " ON CONFLICT(employee_id, date, start_time) DO NOTHING",
+    'fail': "",
+}
+# Lignes du lot qui modifieraient une affectation déjà validée par les RH (mode update)
+PLANNING_PROTECTED_COUNT = (
+    "SELECT COUNT(*) FROM temp.plan_batch b JOIN planning p "
+    "ON p.employee_id = b.employee_id AND p.date = b.date AND p.start_time = b.start_time "
+    "WHERE p.validated_by_rh IS NOT 0 AND (p.task_id IS NOT b.task_id OR p.end_time IS NOT b.end_time "
+    "OR p.pause IS NOT b.pause)")
+
+def plan_params(rows):
+    """Affectations -> paramètres de PLANNING_INSERT (aucune valeur interpolée dans le SQL)."""
+    for p in rows:
+        yield (p['employee_id'], p['task_id'], p['date'], p['start_time'], p['end_time'], p.get('pause') or None)
+
+def apply_plan_rows(conn: sqlite3.Connection, rows, on_conflict: str = 'update', chunk_size: int = 0) -> Dict[str,Any]:
+    """
+    Insère les affectations dans planning par executemany paramétré.
+    chunk_size 0 : une seule transaction (tout ou rien) ; sinon un commit tous les chunk_size lignes
+    (les lots déjà validés restent en cas d'erreur). Retour : lignes lues, écrites, ignorées, protégées
+    (validées RH, non écrasées en mode update), durée, débit.
+    """
+    sql = PLANNING_INSERT + PLANNING_ON_CONFLICT[on_conflict]
+    params = plan_params(rows)
+    protect = on_conflict == 'update'
+    if protect:
+        conn.execute("CREATE TEMP TABLE IF NOT EXISTS plan_batch "
+                     "(employee_id, task_id, date, start_time, end_time, pause)")
+    read = written = protected = chunks = 0
+    t0 = perf_counter()
+    while True:
+        batch = list(islice(params, chunk_size)) if chunk_size > 0 else list(params)
+        if not batch:
+            break
+        with conn:
+            if protect:
+                conn.execute("DELETE FROM temp.plan_batch")
+                conn.executemany("INSERT INTO temp.plan_batch VALUES (?, ?, ?, ?, ?, ?)", batch)
+                protected += conn.execute(PLANNING_PROTECTED_COUNT).fetchone()[0]
+            before = conn.total_changes
+            conn.executemany(sql, batch)
+            written += conn.total_changes - before
+        read += len(batch)
+        chunks += 1
+        if chunk_size <= 0:
+            break
+    elapsed = perf_counter() - t0
+    if protect:
+        conn.execute("DROP TABLE temp.plan_batch")
+    return {'rows': read, 'written': written, 'unchanged_or_skipped': read - written - protected,
+            'protected': protected, 'transactions': chunks,
+            'seconds': round(elapsed, 4), 'rows_per_s': round(read / elapsed) if elapsed > 0 else None}
+
+
+# ---------- Plan en flux (JSON / NDJSON) ----------
+def is_ndjson(path: str) -> bool:
+    """Format d'un fichier de plan d'après son extension : .ndjson/.jsonl = une affectation par ligne."""
+    return path.lower().endswith(('.ndjson', '.jsonl'))
+
+
+class PlanStreamWriter:
+    """
+    Écrit un plan au fil de l'eau, sans le garder en mémoire :
+      - JSON (défaut) : tableau 'plan' écrit ligne par ligne, octet pour octet identique à
+        json.dump(result, indent=2) ; les autres clés ('notes', 'llm_requests') viennent à la fermeture,
+      - NDJSON (.ndjson/.jsonl) : une affectation par ligne, puis une ligne de métadonnées sans 'employee_id'.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.ndjson = is_ndjson(path)
+        self.rows = 0
+        self._f = open(path, 'w', encoding='utf-8')
+        if not self.ndjson:
+            self._f.write('{\n  "plan": [')
+
+    def write(self, p: Dict[str,Any]):
+        if self.ndjson:
+            self._f.write(json.dumps(p, ensure_ascii=False) + "\n")
+        else:
+            self._f.write((",\n    " if self.rows else "\n    ")
+                          + json.dumps(p, ensure_ascii=False, indent=2).replace("\n", "\n    "))
+        self.rows += 1
+
+    def close(self, meta: Dict[str,Any] = None):
+        meta = {k: v for k, v in (meta or {}).items() if k != 'plan'}
+        if self.ndjson:
+            if meta:
+                self._f.write(json.dumps(meta, ensure_ascii=False) + "\n")
+        else:
+            self._f.write("\n  ]" if self.rows else "]")
+            for k, v in meta.items():
+                self._f.write(f",\n  {json.dumps(k)}: "
+                              + json.dumps(v, ensure_ascii=False, indent=2).replace("\n", "\n  "))
+            self._f.write("\n}")
+        self._f.close()
+
+
+def iter_plan_rows(path: str):
+    """Affectations d'un fichier de plan : lues en flux en NDJSON, chargées d'un bloc en JSON."""
+    if not is_ndjson(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            yield from json.load(f).get('plan', [])
+        return
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                row = json.loads(line)
+                if 'employee_id' in row:
+                    yield row
+
+def load_plan_file(path: str) -> Dict[str,Any]:
+    """Plan complet {'plan': [...], 'notes': ...} depuis un fichier JSON ou NDJSON."""
+    if not is_ndjson(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    result = {'plan': []}
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                row = json.loads(line)
+                if 'employee_id' in row:
+                    result['plan'].append(row)
+                else:
+                    result.update(row)
+    return result
+
+
+def stream_plan_outputs(result: Dict[str,Any], context: Dict[str,Any], plan_path: str, sql_path: str,
+                        metrics: 'StageMetrics' = None) -> Dict[str,Any]:
+    """
+    Consomme result['plan'] (liste ou générateur, ex. iter_greedy_plan) une seule fois : chaque affectation
+    est écrite dans plan_path et dans un SQL provisoire, et validée au passage (PlanValidator).
+    Le SQL n'est conservé (sql_path) que si la validation ne trouve aucune erreur ; sql_path None : pas de SQL.
+    Retour : le rapport.
+    """
+    metrics = metrics or NO_METRICS
+    validator = PlanValidator(context)
+    writer = PlanStreamWriter(plan_path)
+    partial = sql_path + ".partial" if sql_path else None
+    try:
+        with metrics.stage('stream_plan', profile=True) as st:
+            with (open(partial, 'w', encoding='utf-8') if partial else nullcontext()) as sql:
+                if sql:
+                    sql.write(SQL_INSERTS_HEADER + "\n")
+                try:
+                    for p in result.get('plan', []):
+                        writer.write(p)
+                        if sql:
+                            sql.write(sql_insert_line(p) + "\n")
+                        validator.add(p)
+                finally:
+                    writer.close(result)
+            st['rows'] = writer.rows
+        with metrics.stage('validate_plan') as st:
+            report = validator.finish()
+            st.update(errors=len(report['errors']), warnings=len(report['warnings']))
+    except BaseException:  # moteur ou validation interrompus : pas de SQL provisoire laissé sur disque
+        if partial and os.path.exists(partial):
+            os.remove(partial)
+        raise
+    if partial and report['errors']:
+        os.remove(partial)
+    elif partial:
+        os.replace(partial, sql_path)
+    return report
+
+
+# ---------- Replanification incrémentale ----------
+def row_key(p: Dict[str,Any]) -> tuple:
+    return (p['employee_id'], p['task_id'], p['date'], p['start_time'], p['end_time'])
+
+def context_snapshot(context: Dict[str,Any], plan: List[Dict[str,Any]]) -> Dict[str,Any]:
+    """Empreinte compacte du contexte (ce qui influence le plan) + le plan produit."""
+    return {
+        'time_window': context['time_window'],
+        'employees': {str(e['id']): [e['weekly_hours_max'], e['accept_replacement'], sorted(e['skills']),
+                                     sorted([a['day'], a['start'], a['end']] for a in e['availability'])]
+                      for e in context['employees']},
+        'tasks': {str(t['id']): [t['duration_hours'], t['deadline'], t['priority'], t['assigned_to'],
+                                 sorted(t['required_skills'])]
+                  for t in context['tasks']},
+        'absences': {str(k): sorted([r['start'], r['end']] for r in v) for k, v in context.get('absences', {}).items() if v},
+        'planning': sorted(list(row_key(p)) for p in context['preexisting_assignments']),
+        'plan': [list(row_key(p)) for p in plan],
+    }
+
+def save_snapshot(path: str, snapshot: Dict[str,Any]):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(snapshot, f, ensure_ascii=False, separators=(',', ':'))
+
+def load_snapshot(path: str) -> Dict[str,Any]:
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def diff_snapshot(old: Dict[str,Any], new: Dict[str,Any]):
+    """
+    Compare deux empreintes. Retour: (employés invalidés, tâches invalidées, semaines (emp, année, semaine) touchées).
+      - employé modifié/supprimé (heures, remplacement, compétences, dispo) -> toutes ses lignes,
+      - tâche modifiée/supprimée (durée, deadline, priorité, assignation, compétences) -> toutes ses lignes,
+      - absences ajoutées/retirées -> semaines ISO des jours concernés,
+      - planning existant modifié hors plan -> semaines ISO des lignes concernées.
+    """
+    def week(ds):
+        return date.fromisoformat(ds).isocalendar()[:2]
+
+    bad_emps = {int(k) for k, v in old['employees'].items() if new['employees'].get(k) != v}
+    bad_tasks = {int(k) for k, v in old['tasks'].items() if new['tasks'].get(k) != v}
+    weeks = set()
+
+    lo = date.fromisoformat(new['time_window']['from']).toordinal()
+    hi = date.fromisoformat(new['time_window']['to']).toordinal()
+    for k in set(old['absences']) | set(new['absences']):
+        days = []
+        for snap in (old, new):
+            cur = set()
+            for a, b in snap['absences'].get(k, []):
+                cur.update(range(max(date.fromisoformat(a).toordinal(), lo), min(date.fromisoformat(b).toordinal(), hi) + 1))
+            days.append(cur)
+        for od in days[0] ^ days[1]:
+            weeks.add((int(k),) + date.fromordinal(od).isocalendar()[:2])
+
+    plan_keys = {tuple(r) for r in old['plan']}
+    before = {tuple(r) for r in old['planning']} - plan_keys
+    after = {tuple(r) for r in new['planning']} - plan_keys
+    for r in before ^ after:
+        weeks.add((r[0],) + week(r[2]))
+    return bad_emps, bad_tasks, weeks
+
+def replan(context: Dict[str,Any], old: Dict[str,Any], engine: str = 'greedy', time_limit: float = 60.0):
+    """
+    Réparation locale du plan précédent : on garde ses lignes non touchées par le diff, on retire
+    les autres, puis on replanifie uniquement la demande restante des tâches.
+    Retour: (résultat {'plan', 'notes'}, lignes supprimées, lignes ajoutées).
+    """
+    new = context_snapshot(context, [])
+    prev = [dict(zip(('employee_id', 'task_id', 'date', 'start_time', 'end_time'), r), pause=None) for r in old['plan']]
+    if old['time_window'] != context['time_window']:
+        print("[WARN] Fenêtre différente du snapshot : replanification complète.")
+        bad_emps, bad_tasks, weeks = {p['employee_id'] for p in prev}, set(), set()
+    else:
+        bad_emps, bad_tasks, weeks = diff_snapshot(old, new)
+
+    kept = [p for p in prev
+            if p['employee_id'] not in bad_emps and p['task_id'] not in bad_tasks
+            and (p['employee_id'],) + date.fromisoformat(p['date']).isocalendar()[:2] not in weeks]
+
+    gran = context['slot_granularity_minutes']
+    done = defaultdict(int)
+    for p in kept:
+        done[p['task_id']] += hm_to_min(p['end_time']) - hm_to_min(p['start_time'])
+    todo = []
+    for t in context['tasks']:
+        left = int(float(t['duration_hours']) * 60) - done[t['id']]
+        if left >= gran:
+            todo.append({**t, 'duration_hours': left / 60.0})
+
+    plan = list(kept)
+    if todo:
+        prev_keys = {row_key(p) for p in prev}
+        repair_ctx = {**context, 'tasks': todo,
+                      'preexisting_assignments': [p for p in context['preexisting_assignments']
+                                                  if row_key(p) not in prev_keys] + kept}
+        plan.extend(local_plan(repair_ctx, engine, time_limit)['plan'])
+    plan.sort(key=lambda p: (p['date'], p['employee_id'], p['start_time']))
+
+    old_keys = {row_key(p) for p in prev}
+    new_keys = {row_key(p) for p in plan}
+    deletes = [p for p in prev if row_key(p) not in new_keys]
+    inserts = [p for p in plan if row_key(p) not in old_keys]
+    notes = (f"Replanification incrémentale : {len(bad_emps)} employé(s), {len(bad_tasks)} tâche(s), "
+             f"{len(weeks)} semaine(s)-employé invalidés ; {len(kept)} lignes conservées.")
+    return {"plan": plan, "notes": notes}, deletes, inserts
+
+
+# ---------- Instrumentation (generate) ----------
+def peak_rss_mb():
+    """RSS max du processus depuis son démarrage (Mo), None si indisponible."""
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(rss / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+class StageMetrics:
+    """
+    Mesures par étape : temps mur et CPU, compteurs ajoutés par l'appelant (lignes, créneaux, octets...),
+    RSS max du processus à la fin de l'étape. Avec profile_dir, les étapes ouvertes avec profile=True
+    sont profilées (cProfile) et leurs statistiques écrites dans profile_dir/<étape>.pstats.
+    Désactivé : stage() renvoie un contexte vide partagé (ni horloge, ni appel système).
+
+        with metrics.stage('greedy_plan', profile=True) as st:
+            result = greedy_plan(context)
+            st['rows'] = len(result['plan'])
+    """
+
+    def __init__(self, enabled: bool = True, profile_dir: str = None):
+        self.enabled = enabled
+        self.profile_dir = profile_dir if enabled else None
+        self.stages = {}
+        self._null = nullcontext({})
+        self._wall0, self._cpu0 = perf_counter(), process_time()
+
+    def stage(self, name: str, profile: bool = False):
+        if not self.enabled:
+            return self._null
+        return self._measure(name, profile and self.profile_dir is not None)
+
+    @contextmanager
+    def _measure(self, name: str, profile: bool):
+        counts = {}
+        prof = None
+        if profile:
+            import cProfile
+            prof = cProfile.Profile()
+        t0, c0 = perf_counter(), process_time()
+        if prof is not None:
+            prof.enable()
+        try:
+            yield counts
+        finally:
+            if prof is not None:
+                prof.disable()
+            entry = {'wall_s': round(perf_counter() - t0, 4), 'cpu_s': round(process_time() - c0, 4)}
+            entry.update(counts)
+            rss = peak_rss_mb()
+            if rss is not None:
+                entry['max_rss_mb'] = rss
+            if prof is not None:
+                os.makedirs(self.profile_dir, exist_ok=True)
+                path = os.path.join(self.profile_dir, name.replace('/', '.') + '.pstats')
+                prof.dump_stats(path)
+                entry['profile'] = path
+                print(f"[PROFIL] {name} -> {path} (python -m pstats {path})")
+            self.stages[name] = entry
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            'stages': self.stages,
+            'total_wall_s': round(perf_counter() - self._wall0, 4),
+            'total_cpu_s': round(process_time() - self._cpu0, 4),
+            'peak_rss_mb': peak_rss_mb(),
+        }
+
+
+NO_METRICS = StageMetrics(enabled=False)
+
+
 # ---------- CLI ----------
+def open_context(args, from_date: date, to_date: date, metrics: StageMetrics = NO_METRICS) -> CompactContext:
+    """Vérifie le schéma (connexion en écriture, brève) puis lit le contexte compact en lecture seule."""
+    conn = db.connect(args.db)
+    try:
+        with metrics.stage('ensure_db'):
+            ensure_db(conn, args.schema_sql, args.seed_sql)  # seed_sql None par défaut => pas de reseed
+    finally:
+        conn.close()
+    conn = db.connect(args.db, readonly=True)
+    try:
+        with metrics.stage('load_context') as st:
+            context = load_compact_context(conn, from_date, to_date, metrics=metrics)
+            if metrics.enabled:
+                st.update(employees=len(context.emp_ids), tasks=len(context.task_ids),
+                          availability_rows=len(context.avail_emp), absence_rows=len(context.abs_emp),
+                          preexisting_rows=len(context.pre_emp))
+        return context
+    finally:
+        conn.close()
+
 def cmd_generate(args):
     from_date = datetime.strptime(args.from_date, "%Y-%m-%d").date() if args.from_date else date.today()
     to_date = datetime.strptime(args.to_date, "%Y-%m-%d").date() if args.to_date else from_date + timedelta(weeks=4)
-    conn = sqlite3.connect(args.db)
-    ensure_db(conn, args.schema_sql, args.seed_sql)  # seed_sql None par défaut => pas de reseed
-    context = load_context(conn, from_date, to_date)
-
-    ai_result = call_azure_openai(context)
-    if not ai_result:
-        ai_result = greedy_plan(context)
-
-    report = validate_plan(context, ai_result)
+    metrics = StageMetrics(enabled=not args.no_metrics, profile_dir=args.profile)
+    context = open_context(args, from_date, to_date, metrics)
+
+    def plan_locally(engine):
+        if args.stream and engine == 'greedy' and args.workers <= 1:
+            # plan paresseux : produit, validé et écrit ligne à ligne par stream_plan_outputs
+            return {"plan": iter_greedy_plan(context), "notes": GREEDY_NOTES}
+        with metrics.stage(f"{engine}_plan", profile=True) as st:
+            if args.workers > 1:
+                result = parallel_plan(context, engine, args.workers, args.time_limit)
+            else:
+                result = local_plan(context, engine, args.time_limit)
+            st.update(rows=len(result.get('plan', [])), workers=args.workers)
+        return result
+
+    if args.engine in ('flow', 'greedy'):
+        ai_result = plan_locally(args.engine)
+    else:
+        with metrics.stage('call_azure_openai') as st:
+            ai_result = call_azure_openai(context)
+            if metrics.enabled and ai_result:
+                reqs = ai_result.get('llm_requests', [])
+                st.update(requests=len(reqs), cached=sum(1 for r in reqs if r['cached']),
+                          request_bytes=sum(r['bytes'] for r in reqs),
+                          latency_s=round(sum(r['latency_s'] for r in reqs), 3),
+                          max_latency_s=max((r['latency_s'] for r in reqs), default=None),
+                          rows=len(ai_result.get('plan', [])))
+        if not ai_result:
+            ai_result = plan_locally('greedy')
+
+    if args.stream:
+        if args.validator == 'numpy':
+            print("[WARN] --stream : validation incrémentale en pur Python.")
+        report = stream_plan_outputs(ai_result, context, args.plan_json, None if args.no_sql else args.sql_out,
+                                     metrics)
+    else:
+        with metrics.stage('validate_plan', profile=True) as st:
+            report = validate_plan(context, ai_result, backend=args.validator)
+            st.update(errors=len(report['errors']), warnings=len(report['warnings']))
     if report['errors']:
         print("\n[ERREURS] Le plan contient des erreurs bloquantes :")
         for e in report['errors']:
             print(" -", e)
-        print("\nAucun fichier SQL généré (mais un aperçu JSON/rapport est produit).")
-
-    with open(args.plan_json, 'w', encoding='utf-8') as f:
-        json.dump(ai_result, f, ensure_ascii=False, indent=2)
+        if not args.no_sql:
+            print("\nAucun fichier SQL généré (mais un aperçu JSON/rapport est produit).")
+
+    if not args.stream:
+        with metrics.stage('write_plan_json'):
+            with open(args.plan_json, 'w', encoding='utf-8') as f:
+                json.dump(ai_result, f, ensure_ascii=False, indent=2)
+
+    if not report['errors']:
+        if not args.stream and not args.no_sql:
+            with metrics.stage('generate_sql_inserts') as st:
+                sql_text = generate_sql_inserts(ai_result.get('plan', []))
+                with open(args.sql_out, 'w', encoding='utf-8') as f:
+                    f.write(sql_text)
+                st['bytes'] = len(sql_text)
+        with metrics.stage('save_snapshot'):
+            # en flux, le plan est relu depuis le fichier écrit (seules les clés restent en mémoire)
+            plan = iter_plan_rows(args.plan_json) if args.stream else ai_result.get('plan', [])
+            save_snapshot(args.snapshot, context_snapshot(context, plan))
+
+    if metrics.enabled:
+        report['metrics'] = metrics.summary()
     with open(args.report_json, 'w', encoding='utf-8') as f:
         json.dump(report, f, ensure_ascii=False, indent=2)
 
     if report['errors']:
         return 2
 
-    sql_text = generate_sql_inserts(ai_result.get('plan', []))
-    with open(args.sql_out, 'w', encoding='utf-8') as f:
-        f.write(sql_text)
-
     print(f"\n[OK] Plan généré.")
     print(f" - Aperçu JSON : {args.plan_json}")
     print(f" - Rapport     : {args.report_json}")
-    print(f" - SQL à valider : {args.sql_out}")
+    if args.no_sql:
+        print(f" - Application : python Planificateur.py apply-plan --db {args.db} --plan-json {args.plan_json}")
+    else:
+        print(f" - SQL à valider : {args.sql_out}")
+    if metrics.enabled:
+        print(" - Étapes : " + ", ".join(f"{name} {st['wall_s']:.3f}s" for name, st in metrics.stages.items())
+              + f" (RSS max {report['metrics']['peak_rss_mb']} Mo)")
+    return 0
+
+def cmd_replan(args):
+    old = load_snapshot(args.snapshot)
+    from_date = datetime.strptime(args.from_date or old['time_window']['from'], "%Y-%m-%d").date()
+    to_date = datetime.strptime(args.to_date or old['time_window']['to'], "%Y-%m-%d").date()
+    context = open_context(args, from_date, to_date)
+
+    result, deletes, inserts = replan(context, old, args.engine, args.time_limit)
+    report = validate_plan(context, result, backend=args.validator)
+    with open(args.plan_json, 'w', encoding='utf-8') as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    with open(args.report_json, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    if report['errors']:
+        print("\n[ERREURS] Le plan réparé contient des erreurs bloquantes :")
+        for e in report['errors']:
+            print(" -", e)
+        print("\nAucun delta SQL généré.")
+        return 2
+
+    with open(args.delta_out, 'w', encoding='utf-8') as f:
+        f.write(generate_sql_delta(deletes, inserts))
+    save_snapshot(args.snapshot, context_snapshot(context, result['plan']))
+
+    print(f"\n[OK] {result['notes']}")
+    print(f" - Delta SQL : {args.delta_out} ({len(deletes)} suppression(s), {len(inserts)} insertion(s))")
+    print(f" - Snapshot  : {args.snapshot}")
     return 0
 
 def cmd_validate(args):
     from_date = datetime.strptime(args.from_date, "%Y-%m-%d").date() if args.from_date else date.today()
     to_date = datetime.strptime(args.to_date, "%Y-%m-%d").date() if args.to_date else from_date + timedelta(weeks=4)
-    conn = sqlite3.connect(args.db)
-    ensure_db(conn, args.schema_sql, args.seed_sql)
-    context = load_context(conn, from_date, to_date)
-
-    with open(args.plan_json, 'r', encoding='utf-8') as f:
-        result = json.load(f)
-    report = validate_plan(context, result)
+    context = open_context(args, from_date, to_date)
+
+    if is_ndjson(args.plan_json) and args.validator != 'numpy':
+        validator = PlanValidator(context)
+        for p in iter_plan_rows(args.plan_json):
+            validator.add(p)
+        report = validator.finish()
+    else:
+        report = validate_plan(context, load_plan_file(args.plan_json), backend=args.validator)
     print(json.dumps(report, ensure_ascii=False, indent=2))
     return 0 if not report['errors'] else 2
 
 def cmd_apply_sql(args):
-    conn = sqlite3.connect(args.db)
+    conn = db.connect(args.db)
     ensure_db(conn, args.schema_sql, args.seed_sql)
     with open(args.sql_file, 'r', encoding='utf-8') as f:
         sql_text = f.read()
@@ -648,6 +2581,89 @@ def cmd_apply_sql(args):
     except Exception as e:
         print(f"[ERREUR] Application SQL: {e}")
         return 2
+    finally:
+        conn.close()
+
+def cmd_apply_plan(args):
+    """Applique un plan revu (plan_preview.json / .ndjson) directement dans planning, sans passer par du SQL texte."""
+    if not args.no_validate:
+        dates = [p['date'] for p in iter_plan_rows(args.plan_json)]
+        if dates:
+            from_date = datetime.strptime(args.from_date or min(dates), "%Y-%m-%d").date()
+            to_date = datetime.strptime(args.to_date or max(dates), "%Y-%m-%d").date()
+            context = open_context(args, from_date, to_date)
+            validator = PlanValidator(context)
+            for p in iter_plan_rows(args.plan_json):
+                validator.add(p)
+            report = validator.finish()
+            if report['errors']:
+                print("[ERREURS] Le plan n'est plus valide sur la base actuelle, rien n'est appliqué :")
+                for e in report['errors']:
+                    print(" -", e)
+                return 2
+
+    conn = db.connect(args.db)
+    try:
+        ensure_db(conn, args.schema_sql, args.seed_sql)
+        stats = apply_plan_rows(conn, iter_plan_rows(args.plan_json), args.on_conflict, args.chunk_size)
+    except sqlite3.Error as e:
+        print(f"[ERREUR] Application du plan: {e}")
+        return 2
+    finally:
+        conn.close()
+    print(f"[OK] Plan appliqué : {stats['rows']} ligne(s), {stats['written']} écrite(s), "
+          f"{stats['unchanged_or_skipped']} inchangée(s)/ignorée(s), "
+          f"{stats['protected']} validée(s) RH conservée(s), {stats['transactions']} transaction(s), "
+          f"{stats['seconds']} s ({stats['rows_per_s']} lignes/s).")
+    return 0
+
+def cmd_availability(args):
+    """Employés compétents libres un jour donné (--date) ou premier bloc libre pour une tâche (--task-id)."""
+    from_date = datetime.strptime(args.from_date, "%Y-%m-%d").date() if args.from_date else date.today()
+    to_date = datetime.strptime(args.to_date, "%Y-%m-%d").date() if args.to_date else from_date + timedelta(weeks=4)
+    conn = db.connect(args.db)
+    try:
+        ensure_db(conn, args.schema_sql, args.seed_sql)
+    finally:
+        conn.close()
+    t0 = perf_counter()
+    conn = db.connect(args.db, readonly=True)
+    try:
+        index = load_availability_index(conn, from_date, to_date)
+    finally:
+        conn.close()
+    out = {'time_window': index.context['time_window'], 'build_s': round(perf_counter() - t0, 4)}
+    if args.plan_json:  # plan proposé (pas encore appliqué) retiré des blocs libres
+        out['plan_rows'] = index.add_rows(iter_plan_rows(args.plan_json))
+
+    t0 = perf_counter()
+    try:
+        if args.task_id is not None:
+            out['block'] = index.first_free_block(args.task_id, int(round(args.hours * 60)), args.after, args.before,
+                                                  weekly_max=not args.ignore_weekly_max)
+        else:
+            skills = [int(x) for x in args.skills.split(',') if x.strip()] if args.skills else []
+            out['date'], out['required_skills'] = args.date, skills
+            out['employees'] = index.free_employees(args.date, skills, int(round(args.min_hours * 60)))
+            out['count'] = len(out['employees'])
+    except (KeyError, ValueError) as e:
+        print(f"[ERREUR] {e.args[0] if e.args else e}")
+        return 2
+    out['query_ms'] = round((perf_counter() - t0) * 1000, 3)
+    print(json.dumps(out, ensure_ascii=False, indent=2))
+    return 0
+
+def cmd_serve(args):
+    import planner_server  # asyncio + pool de processus : chargé seulement pour le démon
+    conn = db.connect(args.db)
+    try:
+        ensure_db(conn, args.schema_sql, args.seed_sql)
+    finally:
+        conn.close()
+    from_date = datetime.strptime(args.from_date, "%Y-%m-%d").date() if args.from_date else None
+    to_date = datetime.strptime(args.to_date, "%Y-%m-%d").date() if args.to_date else None
+    return planner_server.serve(args.db, args.host, args.port, from_date, to_date, args.weeks, args.workers,
+                                args.poll_interval, planner_server.DEFAULT_CORS_ORIGINS + args.cors_origin)
 
 def build_parser():
     p = argparse.ArgumentParser(description="Générateur de planning IA")
@@ -660,21 +2676,84 @@ def build_parser():
     common.add_argument('--seed-sql', default=None, help='Fichier SQL de données (à utiliser pour l’initialisation uniquement)')
     common.add_argument('--from-date', help="Date début (YYYY-MM-DD), défaut: aujourd'hui")
     common.add_argument('--to-date', help='Date fin (YYYY-MM-DD), défaut: +4 semaines')
+    common.add_argument('--validator', choices=['auto', 'python', 'numpy'], default='auto',
+                        help="Backend de validation (auto: NumPy pour les gros plans s'il est installé)")
 
     g = sub.add_parser('generate', parents=[common], help='Générer un plan')
     g.add_argument('--plan-json', default='plan_preview.json', help='Fichier de sortie JSON du plan')
     g.add_argument('--report-json', default='plan_report.json', help='Rapport de validation JSON')
     g.add_argument('--sql-out', default='PropositionPlanning.txt', help='Fichier SQL (texte) à valider')
+    g.add_argument('--no-sql', action='store_true',
+                   help="Pas de fichier SQL : le plan JSON revu s'applique avec apply-plan")
+    g.add_argument('--engine', choices=['auto', 'greedy', 'flow'], default='auto',
+                   help="Moteur: auto (IA si configurée, sinon greedy), greedy, flow (solveur exact hors IA)")
+    g.add_argument('--time-limit', type=float, default=60.0,
+                   help="Budget de temps du solveur flow en secondes (au-delà: repli greedy)")
+    g.add_argument('--workers', type=int, default=1,
+                   help="Processus pour la planification locale parallèle (shards semaine x composante)")
+    g.add_argument('--snapshot', default='plan_snapshot.json', help='Snapshot contexte + plan (pour replan)')
+    g.add_argument('--stream', action='store_true',
+                   help="Écrit plan (JSON, ou NDJSON si --plan-json finit par .ndjson) et SQL au fil du plan, "
+                        "validé en flux (sans garder le plan en mémoire)")
+    g.add_argument('--no-metrics', action='store_true',
+                   help="Ne pas mesurer les étapes (temps, compteurs, RSS) dans le rapport JSON")
+    g.add_argument('--profile', nargs='?', const='profiles', default=None, metavar='DIR',
+                   help="Profil cProfile (.pstats) du moteur et de la validation dans DIR (défaut: profiles)")
     g.set_defaults(func=cmd_generate)
 
+    r = sub.add_parser('replan', parents=[common], help='Réparer le dernier plan après modifications (delta SQL)')
+    r.add_argument('--snapshot', default='plan_snapshot.json', help='Snapshot produit par generate/replan')
+    r.add_argument('--delta-out', default='PlanningDelta.txt', help='Fichier SQL delta (DELETE + INSERT)')
+    r.add_argument('--plan-json', default='plan_preview.json', help='Fichier de sortie JSON du plan réparé')
+    r.add_argument('--report-json', default='plan_report.json', help='Rapport de validation JSON')
+    r.add_argument('--engine', choices=['greedy', 'flow'], default='greedy', help='Moteur local de réparation')
+    r.add_argument('--time-limit', type=float, default=60.0, help='Budget de temps du solveur flow (secondes)')
+    r.set_defaults(func=cmd_replan)
+
     v = sub.add_parser('validate', parents=[common], help='Valider un plan JSON existant')
     v.add_argument('--plan-json', required=True, help='Plan JSON à valider')
     v.set_defaults(func=cmd_validate)
 
+    ap = sub.add_parser('apply-plan', parents=[common], help='Appliquer un plan JSON revu directement dans planning')
+    ap.add_argument('--plan-json', default='plan_preview.json', help='Plan revu (JSON ou NDJSON)')
+    ap.add_argument('--on-conflict', choices=sorted(PLANNING_ON_CONFLICT), default='update',
+                    help="Créneau (employé, date, début) déjà planifié : update (remplacer, sauf lignes "
+                         "validées RH), skip (garder), fail (annuler)")
+    ap.add_argument('--chunk-size', type=int, default=0,
+                    help="Commit tous les N lignes (défaut 0 : une seule transaction, tout ou rien)")
+    ap.add_argument('--no-validate', action='store_true',
+                    help="Ne pas revalider le plan sur la base actuelle avant de l'appliquer")
+    ap.set_defaults(func=cmd_apply_plan)
+
     a = sub.add_parser('apply-sql', parents=[common], help='(Optionnel) Appliquer un fichier SQL après revue')
     a.add_argument('--sql-file', required=True, help='Fichier SQL à exécuter')
     a.set_defaults(func=cmd_apply_sql)
 
+    av = sub.add_parser('availability', parents=[common], help='Qui est libre ? (jour x compétences, ou tâche)')
+    q = av.add_mutually_exclusive_group(required=True)
+    q.add_argument('--date', help='Jour interrogé (YYYY-MM-DD), dans la fenêtre --from-date/--to-date')
+    q.add_argument('--task-id', type=int, help='Tâche dont on cherche le premier bloc libre')
+    av.add_argument('--skills', help='Compétences requises avec --date (ids séparés par des virgules)')
+    av.add_argument('--min-hours', type=float, default=0.0, help='Bloc libre contigu minimal avec --date (heures)')
+    av.add_argument('--hours', type=float, default=2.0, help='Durée du bloc cherché avec --task-id (heures)')
+    av.add_argument('--after', help='Avec --task-id : pas avant ce jour (défaut: début de fenêtre)')
+    av.add_argument('--before', help='Avec --task-id : pas après ce jour (défaut: deadline de la tâche)')
+    av.add_argument('--ignore-weekly-max', action='store_true', help='Avec --task-id : ignorer le plafond hebdo')
+    av.add_argument('--plan-json', help='Plan proposé (JSON/NDJSON) à déduire des blocs libres avant la requête')
+    av.set_defaults(func=cmd_availability)
+
+    sv = sub.add_parser('serve', parents=[common], help='Démon HTTP/JSON (contexte chaud, generate/validate/disponibilités)')
+    sv.add_argument('--host', default='127.0.0.1', help="Adresse d'écoute (0.0.0.0 pour le réseau local)")
+    sv.add_argument('--port', type=int, default=5000, help="Port d'écoute")
+    sv.add_argument('--weeks', type=int, default=4,
+                    help="Fenêtre gardée en mémoire (sans --from-date : glisse avec la date du jour)")
+    sv.add_argument('--workers', type=int, default=2, help='Processus pour generate et les grosses validations')
+    sv.add_argument('--poll-interval', type=float, default=1.0,
+                    help='Intervalle (s) de détection des écritures en base (PRAGMA data_version)')
+    sv.add_argument('--cors-origin', action='append', default=[],
+                    help='Origine autorisée en plus de localhost:3000 / 192.168.1.20:3000 (répétable)')
+    sv.set_defaults(func=cmd_serve)
+
     return p
 
 def main():
@@ -1,11 +1,28 @@
 import time
 import os
 import json
+import queue
+import datetime
+import hashlib
+import argparse
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 import requests
-import pdfplumber  # Pour lire les PDF
+from requests.adapters import HTTPAdapter
+import pdfplumber  # Pour lire les PDF (mise en page complexe)
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
 
+import db
+from llm_cache import cache_key, get_default_cache
+
+try:  # moteur rapide (couche texte PDFium), pdfplumber sert de repli
+    import pypdfium2 as pdfium
+except ImportError:  # pragma: no cover
+    pdfium = None
+
 # --- 1. CONFIGURATION ---
 # (Remplissez ces valeurs)
 
@@ -16,6 +33,7 @@ NOM_DU_DEPLOYEMENT = "gpt-5-mini"
 RESSOURCE_URL_BASE = "https://hachaton.cognitiveservices.azure.com"
 
 # La clé API (c'est la clé de votre ressource Azure OpenAI)
+AZURE_OPENAI_KEY = os.getenv("AZURE_OPENAI_KEY", "")
 
 # L'API version (gardez celle de votre erreur)
 API_VERSION = "2025-04-01-preview"
@@ -27,28 +45,129 @@ AZURE_OPENAI_ENDPOINT_URL = f"{RESSOURCE_URL_BASE}/openai/deployments/{NOM_DU_DE
 # Le dossier à surveiller
 DOSSIER_CONTRATS = "Contracts"  # Le dossier contenant vos PDF
 
-# Le fichier texte où stocker les commandes SQL
-OUTPUT_SQL_FILE = "SQLCommands.txt"
+# Le fichier (JSON Lines, ajout seul) où stocker les contrats extraits ; update_database.py
+# n'applique que les lignes ajoutées depuis son dernier passage
+OUTPUT_RECORDS_FILE = "ingestion.jsonl"
+
+# Pipeline concurrent (surchargé par --concurrency / --workers / --queue-size)
+LLM_CONCURRENCY = 4        # appels IA simultanés (et taille du pool HTTP)
+EXTRACT_WORKERS = os.cpu_count() or 2  # processus d'extraction PDF
+
+# Extraction du texte (surchargé par --engine / --max-pages / --no-early-stop)
+PDF_ENGINE = os.getenv("PDF_ENGINE", "pdfium")          # 'pdfium' (rapide) ou 'pdfplumber'
+PDF_MAX_PAGES = int(os.getenv("PDF_MAX_PAGES", "0"))    # 0 = toutes les pages
+PDF_EARLY_STOP = True      # arrêter la lecture dès que nom, horaire et type de contrat sont présents
+
+# Extraction locale (règles) : l'IA n'est appelée que si un champ a une confiance inférieure au seuil
+LOCAL_EXTRACT_ENABLED = True
+LOCAL_MIN_CONFIDENCE = 0.8
+QUEUE_SIZE = 100           # taille de chaque file entre deux étages (backpressure)
+SETTLE_SECONDS = 1.0       # taille/mtime inchangés pendant ce délai => fichier considéré comme écrit
+
+# Registre des contenus déjà traités (SHA-256), conservé entre deux lancements
+LEDGER_FILE = "contracts_ledger.db"
+LEDGER_MEMORY_ENTRIES = 10000  # empreintes gardées en mémoire (le reste est lu dans la base)
 
 
 # --- 2. FONCTIONS DE TRAVAIL ---
 
+_http_session = None
+_http_session_lock = threading.Lock()
+
+
+def get_http_session():
+    """Session HTTP partagée (connexions keep-alive réutilisées par tous les appels IA)."""
+    global _http_session
+    with _http_session_lock:
+        if _http_session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(LLM_CONCURRENCY, 1))
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _http_session = session
+        return _http_session
+
+
+# Repères des informations utiles à l'IA : dès qu'ils sont tous lus, les pages suivantes sont inutiles
+CONTRACT_FIELD_PATTERNS = {
+    'identite': re.compile(r"\b(Monsieur|Madame|M\.|Mme|Mlle)\s+[A-ZÀ-Ý][\w'’-]+", re.IGNORECASE),
+    'horaire': re.compile(r"\d+(?:[.,]\d+)?\s*(?:heures|h)\b[^\n]{0,40}?(?:hebdomadaire|par semaine)"
+                          r"|(?:hebdomadaire|par semaine)[^\n]{0,60}?\d+(?:[.,]\d+)?\s*(?:heures|h)\b",
+                          re.IGNORECASE),
+    'type_contrat': re.compile(r"dur[ée]e\s+(?:in)?d[ée]termin[ée]e|\bCD[ID]\b|temps\s+(?:partiel|complet|plein)"
+                               r"|stage|stagiaire|prestataire|freelance", re.IGNORECASE),
+}
+
+
+def _iter_pages_pdfium(pdf_path):
+    pdf = pdfium.PdfDocument(pdf_path)
+    try:
+        for page in pdf:
+            textpage = page.get_textpage()
+            try:
+                yield textpage.get_text_range().replace("\r\n", "\n")
+            finally:
+                textpage.close()
+                page.close()
+    finally:
+        pdf.close()
+
+
+def _iter_pages_pdfplumber(pdf_path):
+    with pdfplumber.open(pdf_path) as pdf:
+        for page in pdf.pages:
+            yield page.extract_text() or ""
+            page.close()  # libère le cache de mise en page de la page
+
+
+def _read_pages(pages_iter, max_pages, early_stop):
+    parts = []
+    pages = 0
+    missing = set(CONTRACT_FIELD_PATTERNS)
+    for text in pages_iter:
+        pages += 1
+        if text:
+            parts.append(text)
+            if early_stop:
+                missing = {f for f in missing if not CONTRACT_FIELD_PATTERNS[f].search(text)}
+        if max_pages and pages >= max_pages:
+            break
+        if early_stop and not missing:
+            break
+    return "\n".join(parts), pages
+
+
 def extract_text_from_pdf(pdf_path):
     """Ouvre un PDF et en extrait tout le texte."""
+    return extract_pdf(pdf_path)[0]
+
+
+def extract_pdf(pdf_path, engine=None, max_pages=None, early_stop=None):
+    """Comme extract_text_from_pdf, renvoie (texte ou None, nombre de pages lues).
+
+    engine : 'pdfium' (couche texte, rapide) ou 'pdfplumber' (analyse de mise en page complète).
+    Si PDFium n'est pas installé, échoue ou ne trouve aucun texte, on retente avec pdfplumber.
+    max_pages : n'extrait que les N premières pages (0 = toutes) ; early_stop : s'arrête dès que
+    l'identité, l'horaire hebdomadaire et le type de contrat ont été rencontrés.
+    """
+    engine = engine or PDF_ENGINE
+    max_pages = PDF_MAX_PAGES if max_pages is None else max_pages
+    early_stop = PDF_EARLY_STOP if early_stop is None else early_stop
     print(f"Lecture du PDF : {pdf_path}")
-    full_text = ""
+    # (le fichier est déjà stabilisé : voir wait_until_settled / le pipeline)
+    if engine == "pdfium" and pdfium is not None:
+        try:
+            text, pages = _read_pages(_iter_pages_pdfium(pdf_path), max_pages, early_stop)
+            if text.strip():
+                return text, pages
+            print(f"Aucun texte via PDFium, repli sur pdfplumber : {pdf_path}")
+        except Exception as e:
+            print(f"PDFium a échoué ({e}), repli sur pdfplumber : {pdf_path}")
     try:
-        # Attend une seconde pour être sûr que le fichier est déverrouillé
-        time.sleep(1)
-        with pdfplumber.open(pdf_path) as pdf:
-            for page in pdf.pages:
-                text = page.extract_text()
-                if text:
-                    full_text += text + "\n"
-        return full_text
+        return _read_pages(_iter_pages_pdfplumber(pdf_path), max_pages, early_stop)
     except Exception as e:
         print(f"Erreur lors de la lecture du PDF {pdf_path}: {e}")
-        return None
+        return None, 0
 
 
 def call_mistral_for_sql(texte_contrat):
@@ -82,6 +201,15 @@ def call_mistral_for_sql(texte_contrat):
     Commande SQL:
     """
 
+    # Même déploiement + même prompt (gabarit + texte du contrat) => réponse servie par le cache
+    cache = get_default_cache()
+    key = cache_key(NOM_DU_DEPLOYEMENT, prompt)
+    if cache:
+        cached = cache.get(key)
+        if cached is not None:
+            print("Réponse IA servie depuis le cache (aucun appel).")
+            return cached
+
     payload = {
         "messages": [{"role": "user", "content": prompt}],
         # J'ai mis 1024, c'est suffisant pour cette requête
@@ -101,9 +229,10 @@ def call_mistral_for_sql(texte_contrat):
         'api-key': AZURE_OPENAI_KEY
     }
 
+    response = None
     try:
-        # On appelle la NOUVELLE URL
-        response = requests.post(AZURE_OPENAI_ENDPOINT_URL, data=json.dumps(payload), headers=headers)
+        # On appelle la NOUVELLE URL (connexion réutilisée via la session partagée)
+        response = get_http_session().post(AZURE_OPENAI_ENDPOINT_URL, data=json.dumps(payload), headers=headers)
 
         print(f"DEBUG: Code de statut de la réponse : {response.status_code}")
         print(f"DEBUG: Texte brut de la réponse : '{response.text}'")
@@ -123,6 +252,8 @@ def call_mistral_for_sql(texte_contrat):
             print(f"Erreur: L'IA n'a pas retourné une commande SQL valide. Réponse: {sql_command}")
             return None
 
+        if cache:
+            cache.put(key, sql_command)
         return sql_command
 
     except json.JSONDecodeError as e:
@@ -142,26 +273,614 @@ def call_mistral_for_sql(texte_contrat):
         print(f"Erreur inattendue lors de l'appel à l'IA : {e}")
         return None
 
-def save_sql_to_file(sql_command):
-    """Ajoute la commande SQL au fichier texte."""
+# ---------- Extraction locale des champs (sans IA) ----------
+
+_CIVILITE = r"(?:Monsieur|Madame|Mademoiselle|M\.|Mme|Mlle)"
+_MOT_NOM = r"[A-ZÀ-Ý][A-Za-zÀ-ÿ'’-]+"
+_RE_PERSONNE = re.compile(rf"{_CIVILITE}\s+({_MOT_NOM}(?:[ \t]+{_MOT_NOM}){{1,3}})")
+_RE_SALARIE = re.compile(r"d[ée]nomm[ée]e?\s+(?:ci-apr[èe]s\s+)?(?:le|la)\s+salari[ée]", re.IGNORECASE)
+_RE_REPRESENTANT = re.compile(r"repr[ée]sent[ée]e?\s+par\s*$", re.IGNORECASE)
+_RE_FICHIER = re.compile(r"contrat\s+de\s+travail\s+(.+?)\.pdf$", re.IGNORECASE)
+_RE_HEURES = re.compile(
+    r"(?:dur[ée]e\s+(?:du\s+travail\s+)?hebdomadaire|hebdomadaire)\D{0,40}?(\d{1,2}(?:[.,]\d+)?)\s*(?:heures|h)\b"
+    r"|(\d{1,2}(?:[.,]\d+)?)\s*(?:heures|h)\s+(?:par\s+semaine|hebdomadaires?)", re.IGNORECASE)
+_TYPES_CONTRAT = [  # (motif, type de contrat), par ordre de priorité
+    (re.compile(r"temps\s+partiel", re.IGNORECASE), 'Part-time'),
+    (re.compile(r"temps\s+(?:complet|plein)", re.IGNORECASE), 'Full-time'),
+    (re.compile(r"\bstage\b|stagiaire|convention\s+de\s+stage", re.IGNORECASE), 'Intern'),
+    (re.compile(r"prestataire|prestation\s+de\s+services|freelance|ind[ée]pendant", re.IGNORECASE), 'Contractor'),
+]
+
+
+def _nom_propre(mot):
+    return "-".join(p[:1].upper() + p[1:].lower() for p in mot.split("-"))
+
+
+def _extract_name(texte, pdf_path):
+    """(prénom, nom, confiance) du salarié."""
+    candidats = []
+    for m in _RE_PERSONNE.finditer(texte):
+        avant = texte[max(0, m.start() - 40):m.start()]
+        if _RE_REPRESENTANT.search(avant):
+            continue  # représentant de l'employeur
+        if re.search(r"\bET\s*:\s*$", avant):
+            candidats.append((0.9, m))
+        elif _RE_SALARIE.search(texte[m.end():m.end() + 400]):
+            candidats.append((0.8, m))
+    mots_fichier = []
+    fm = _RE_FICHIER.search(os.path.basename(pdf_path or ""))
+    if fm:
+        mots_fichier = fm.group(1).split()
+
+    if candidats:
+        conf, m = max(candidats, key=lambda c: c[0])
+        mots = m.group(1).split()
+        confirme = bool(mots_fichier) and [w.lower() for w in mots_fichier] == [w.lower() for w in mots]
+        if confirme and len(mots) == 2:
+            # Le nom de fichier confirme l'ordre « Nom Prénom » et donne la casse
+            return _nom_propre(mots_fichier[1]), _nom_propre(mots_fichier[0]), 0.95
+        majuscules = [i for i, w in enumerate(mots) if w.isupper()]
+        if 0 < len(majuscules) < len(mots):
+            # Convention française : NOM en capitales (particules comprises), Prénom en minuscules ;
+            # casse reprise du nom de fichier s'il contient les mêmes mots
+            if confirme:
+                nom = " ".join(mots_fichier[i] for i in majuscules)
+                prenom = " ".join(w for i, w in enumerate(mots_fichier) if i not in majuscules)
+                return prenom, nom, 0.95
+            prenom = " ".join(w for w in mots if not w.isupper())
+            return prenom, " ".join(_nom_propre(mots[i]) for i in majuscules), conf
+        if len(mots) == 2:
+            # Tout en capitales : ordre « NOM PRÉNOM » supposé, à confirmer par l'IA
+            return _nom_propre(mots[1]), _nom_propre(mots[0]), 0.6
+        return None, None, 0.0
+    if len(mots_fichier) == 2:
+        return _nom_propre(mots_fichier[1]), _nom_propre(mots_fichier[0]), 0.6
+    return None, None, 0.0
+
+
+def _extract_hours(texte):
+    valeurs = []
+    for m in _RE_HEURES.finditer(texte):
+        v = float((m.group(1) or m.group(2)).replace(",", "."))
+        if 1 <= v <= 60:
+            valeurs.append(v)
+    if not valeurs:
+        return None, 0.0
+    v = valeurs[0]
+    v = int(v) if v == int(v) else v
+    # plusieurs durées hebdomadaires différentes dans le contrat : ambigu
+    return v, 0.95 if len(set(valeurs)) == 1 else 0.6
+
+
+def _extract_contract_type(texte, heures):
+    intitule = texte[:300]
+    for source, conf in ((intitule, 0.95), (texte, 0.75)):
+        for motif, type_contrat in _TYPES_CONTRAT:
+            if motif.search(source):
+                if heures is not None and type_contrat == 'Part-time' and heures >= 35:
+                    conf = 0.5  # incohérent avec l'horaire
+                return type_contrat, conf
+    if heures is not None:
+        # pas de mention explicite : déduit de l'horaire (CDI 35h => Full-time)
+        return ('Full-time' if heures >= 35 else 'Part-time'), 0.8
+    return None, 0.0
+
+
+def extract_contract_fields(texte, pdf_path=None):
+    """Extrait les champs de la table employees par règles, avec une confiance par champ.
+
+    Renvoie {champ: (valeur, confiance)} pour first_name, last_name, weekly_hours_max, contract_type.
+    """
+    prenom, nom, conf_nom = _extract_name(texte, pdf_path)
+    heures, conf_heures = _extract_hours(texte)
+    type_contrat, conf_type = _extract_contract_type(texte, heures)
+    return {
+        'first_name': (prenom, conf_nom),
+        'last_name': (nom, conf_nom),
+        'weekly_hours_max': (heures, conf_heures),
+        'contract_type': (type_contrat, conf_type),
+    }
+
+
+CONTRACT_TYPES = ('Full-time', 'Part-time', 'Intern', 'Contractor')
+EMPLOYEE_FIELDS = ('first_name', 'last_name', 'weekly_hours_max', 'contract_type')
+
+
+def local_fields_for_contract(texte, pdf_path=None, min_confidence=None):
+    """Champs extraits localement, ou None si l'un d'eux est incertain (=> appel IA)."""
+    if not LOCAL_EXTRACT_ENABLED:
+        return None
+    seuil = LOCAL_MIN_CONFIDENCE if min_confidence is None else min_confidence
+    fields = extract_contract_fields(texte, pdf_path)
+    resume = ", ".join(f"{k}={v!r} ({c:.2f})" for k, (v, c) in fields.items())
+    if all(v is not None and c >= seuil for v, c in fields.values()):
+        print(f"Extraction locale : {resume}")
+        return {k: v for k, (v, _) in fields.items()}
+    print(f"Extraction locale incertaine, appel IA : {resume}")
+    return None
+
+
+_RE_INSERT = re.compile(r"INSERT\s+INTO\s+employees\s*\(([^)]*)\)\s*VALUES\s*\((.*?)\)\s*(?:ON\s+CONFLICT|;|$)",
+                        re.IGNORECASE | re.DOTALL)
+_RE_VALEUR_SQL = re.compile(r"\s*('(?:[^']|'')*'|-?\d+(?:\.\d+)?|NULL)\s*(?:,|$)", re.IGNORECASE)
+
+
+def parse_employee_upsert(sql_command):
+    """Relit l'upsert employees renvoyé par l'IA ; renvoie les champs ou None s'il n'est pas conforme."""
+    m = _RE_INSERT.search(sql_command or "")
+    if not m:
+        return None
+    colonnes = [c.strip() for c in m.group(1).split(",")]
+    valeurs, pos, brut = [], 0, m.group(2).strip()
+    while pos < len(brut):
+        v = _RE_VALEUR_SQL.match(brut, pos)
+        if not v:
+            return None
+        tok = v.group(1)
+        if tok.upper() == "NULL":
+            valeurs.append(None)
+        elif tok.startswith("'"):
+            valeurs.append(tok[1:-1].replace("''", "'"))
+        else:
+            valeurs.append(float(tok) if "." in tok else int(tok))
+        pos = v.end()
+    if len(colonnes) != len(valeurs):
+        return None
+    fields = dict(zip(colonnes, valeurs))
+    return {k: fields.get(k) for k in EMPLOYEE_FIELDS}
+
+
+def employee_record(fields, pdf_path, sha, origin):
+    """Enregistrement JSON d'un contrat ; None (et message) si les champs ne respectent pas le schéma."""
+    erreurs = []
+    if not fields.get('first_name') or not fields.get('last_name'):
+        erreurs.append("nom ou prénom manquant")
+    hours = fields.get('weekly_hours_max')
+    if isinstance(hours, float) and hours.is_integer():
+        hours = int(hours)
+    if not isinstance(hours, (int, float)) or hours <= 0:
+        erreurs.append(f"weekly_hours_max invalide ({hours!r})")
+    if fields.get('contract_type') not in CONTRACT_TYPES:
+        erreurs.append(f"contract_type invalide ({fields.get('contract_type')!r})")
+    if erreurs:
+        print(f"Erreur: contrat {pdf_path} ignoré : {', '.join(erreurs)}")
+        return None
+    return {
+        'sha256': sha,
+        'source': os.path.basename(pdf_path),
+        'origin': origin,
+        'ingested_at': datetime.datetime.now().isoformat(timespec='seconds'),
+        'first_name': fields['first_name'],
+        'last_name': fields['last_name'],
+        'weekly_hours_max': hours,
+        'contract_type': fields['contract_type'],
+    }
+
+
+def save_record(record):
+    """Ajoute l'enregistrement (une ligne JSON) au fichier d'ingestion."""
     try:
-        # "a" signifie "append" (ajouter à la fin du fichier)
-        with open(OUTPUT_SQL_FILE, "a", encoding="utf-8") as f:
-            f.write(sql_command + "\n\n")  # Ajoute la commande + 2 sauts de ligne
-        print(f"Commande SQL ajoutée avec succès à {OUTPUT_SQL_FILE}")
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        # "a" signifie "append" : une ligne complète par écriture, jamais réécrite ensuite
+        with open(OUTPUT_RECORDS_FILE, "a", encoding="utf-8") as f:
+            f.write(line)
+        print(f"Contrat {record['source']} ajouté avec succès à {OUTPUT_RECORDS_FILE}")
+        return True
     except IOError as e:
-        print(f"Erreur lors de l'écriture dans le fichier {OUTPUT_SQL_FILE}: {e}")
+        print(f"Erreur lors de l'écriture dans le fichier {OUTPUT_RECORDS_FILE}: {e}")
+        return False
 
 
-# --- 3. LE "GARDIEN" (WATCHDOG) ---
+def file_signature(path):
+    """(taille, mtime_ns) du fichier, ou None s'il n'existe pas (encore)."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_size, st.st_mtime_ns
+
+
+def wait_until_settled(path, settle=SETTLE_SECONDS, timeout=300.0, poll=0.1):
+    """Attend que la taille et la date de modification ne bougent plus pendant `settle` secondes."""
+    deadline = time.time() + timeout
+    last = file_signature(path)
+    stable_since = time.time()
+    while time.time() < deadline:
+        time.sleep(poll)
+        sig = file_signature(path)
+        if sig != last or not sig or sig[0] == 0:
+            last, stable_since = sig, time.time()
+        elif time.time() - stable_since >= settle:
+            return True
+    return False
+
+
+def hash_file(path, chunk_size=1 << 20):
+    """SHA-256 du contenu, lu par blocs (mémoire constante)."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class ProcessedLedger:
+    """Registre persistant des contenus de contrats déjà ingérés.
+
+    La base SQLite fait foi ; seules les LEDGER_MEMORY_ENTRIES empreintes les plus récentes
+    sont gardées en mémoire, la consommation reste donc bornée quel que soit l'historique.
+    """
+
+    def __init__(self, path=LEDGER_FILE, memory_entries=LEDGER_MEMORY_ENTRIES):
+        self.memory_entries = memory_entries
+        self._recent = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = db.connect(path, check_same_thread=False, wal=True)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS processed_contracts (
+              sha256 TEXT PRIMARY KEY,
+              path TEXT NOT NULL,
+              size INTEGER NOT NULL,
+              processed_at REAL NOT NULL
+            )""")
+        # Dernière signature connue de chaque fichier : le rattrapage au démarrage ne relit
+        # (et ne re-hache) que les fichiers dont la taille ou la date a changé
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS contract_files (
+              path TEXT PRIMARY KEY,
+              size INTEGER NOT NULL,
+              mtime_ns INTEGER NOT NULL,
+              sha256 TEXT NOT NULL
+            )""")
+        self._conn.commit()
+
+    def _remember(self, sha):
+        self._recent[sha] = True
+        self._recent.move_to_end(sha)
+        while len(self._recent) > self.memory_entries:
+            self._recent.popitem(last=False)
+
+    def seen(self, sha):
+        with self._lock:
+            if sha in self._recent:
+                self._recent.move_to_end(sha)
+                return True
+            row = self._conn.execute("SELECT 1 FROM processed_contracts WHERE sha256 = ?", (sha,)).fetchone()
+            if row:
+                self._remember(sha)
+            return row is not None
+
+    def add(self, sha, path):
+        size = (file_signature(path) or (0, 0))[0]
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO processed_contracts (sha256, path, size, processed_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(sha256) DO UPDATE SET path = excluded.path, processed_at = excluded.processed_at",
+                (sha, path, size, time.time()))
+            self._record_file(path, sha)
+            self._conn.commit()
+            self._remember(sha)
+
+    def record_file(self, path, sha):
+        """Mémorise la signature courante d'un fichier dont le contenu est déjà traité."""
+        with self._lock:
+            self._record_file(path, sha)
+            self._conn.commit()
+
+    def _record_file(self, path, sha):
+        sig = file_signature(path)
+        if sig:
+            self._conn.execute(
+                "INSERT INTO contract_files (path, size, mtime_ns, sha256) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(path) DO UPDATE SET size = excluded.size, mtime_ns = excluded.mtime_ns, "
+                "sha256 = excluded.sha256", (os.path.abspath(path), sig[0], sig[1], sha))
+
+    def is_unchanged(self, path, sig):
+        """Vrai si le fichier a la même taille/mtime que lors de son dernier traitement."""
+        with self._lock:
+            row = self._conn.execute("SELECT size, mtime_ns FROM contract_files WHERE path = ?",
+                                     (os.path.abspath(path),)).fetchone()
+        return row is not None and tuple(row) == tuple(sig)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def iter_contract_files(folder, recursive=False):
+    """Parcourt les PDF du dossier (et de ses sous-dossiers si recursive) sans tout charger en mémoire."""
+    stack = [folder]
+    while stack:
+        current = stack.pop()
+        try:
+            entries = sorted(os.scandir(current), key=lambda e: e.name)
+        except OSError as e:
+            print(f"Erreur lors du parcours de {current}: {e}")
+            continue
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                if recursive:
+                    stack.append(entry.path)
+            elif entry.name.lower().endswith('.pdf'):
+                yield entry.path
+
+
+def catch_up(pipeline, folder, recursive=False):
+    """Soumet au pipeline les PDF nouveaux ou modifiés depuis le dernier passage (rattrapage).
+
+    Les fichiers inchangés (même taille et mtime que lors de leur traitement) sont écartés sans
+    être relus ; les autres passent par l'empreinte SHA-256, donc un contenu déjà connu n'est
+    jamais renvoyé à l'IA. Renvoie (fichiers vus, fichiers soumis).
+    """
+    seen = submitted = 0
+    for path in iter_contract_files(folder, recursive):
+        seen += 1
+        sig = file_signature(path)
+        if sig is None or pipeline.ledger.is_unchanged(path, sig):
+            continue
+        submitted += 1
+        pipeline.submit(path, closed=True)
+    return seen, submitted
+
+
+# --- 3. PIPELINE CONCURRENT ---
+# Évènements -> [stabilisation] -> empreinte + extraction PDF (processus) -> appels IA (threads) -> écriture (1 thread)
+# Chaque étage est relié au suivant par une file bornée : si l'aval sature, l'amont attend (backpressure).
+# Un étage aval ne bloque jamais sur une file amont : les reprises passent par une file non bornée
+# que l'étage de stabilisation vide à chaque tour.
+
+_STOP = object()
+
+
+class ContractPipeline:
+    """Traite les contrats en parallèle sans bloquer le thread de l'observateur watchdog."""
+
+    def __init__(self, concurrency=None, workers=None, queue_size=None, settle=None, ledger=None,
+                 extract_options=None):
+        self.concurrency = max(1, concurrency or LLM_CONCURRENCY)
+        self.workers = max(1, workers or EXTRACT_WORKERS)
+        self.settle = SETTLE_SECONDS if settle is None else settle
+        self.ledger = ledger if ledger is not None else ProcessedLedger()
+        # transmis explicitement aux processus d'extraction (engine, max_pages, early_stop)
+        self.extract_options = extract_options or {}
+        size = queue_size or QUEUE_SIZE
+
+        self.events = queue.Queue(maxsize=size)
+        self.to_extract = queue.Queue(maxsize=size)
+        self.to_llm = queue.Queue(maxsize=size)
+        self.to_write = queue.Queue(maxsize=size)
+
+        self.pool = ProcessPoolExecutor(max_workers=self.workers)
+        self.in_flight = set()     # fichiers en cours de traitement (dédoublonnage)
+        self.in_flight_sha = set() # contenus en cours (deux copies du même contrat)
+        self.rerun = set()         # modifiés pendant leur traitement : à reprendre ensuite
+        self.reruns = queue.SimpleQueue()  # reprises prêtes (non bornée), vidée par l'étage 1
+        self.lock = threading.Lock()
+        self.stats = {'recus': 0, 'traites': 0, 'echecs': 0, 'deja_traites': 0, 'pages': 0,
+                      'sans_ia': 0, 'avec_ia': 0}
+        self.started_at = time.time()
+        self.threads = []
+
+    def start(self):
+        self._spawn(self._settle_loop, 1, "settle")
+        self._spawn(self._extract_loop, self.workers, "extract")
+        self._spawn(self._llm_loop, self.concurrency, "llm")
+        self._spawn(self._write_loop, 1, "writer")
+        return self
+
+    def _spawn(self, target, count, name):
+        for n in range(count):
+            t = threading.Thread(target=target, name=f"{name}-{n}", daemon=True)
+            t.start()
+            self.threads.append((name, t))
+
+    def submit(self, pdf_path, closed=False):
+        """Appelé par le watchdog : simple mise en file (bloque seulement si la file est pleine).
+
+        closed=True signale une fermeture après écriture : le fichier est complet, pas besoin d'attendre.
+        """
+        self.events.put((pdf_path, closed))
+
+    # Étage 1 : attend que chaque fichier soit complètement écrit (taille/mtime stables ou close-write)
+    def _settle_loop(self):
+        pending = {}  # chemin -> [échéance, signature observée]
+        stopping = False
+        while True:
+            if stopping:
+                timeout = 0.05  # des reprises peuvent encore arriver des étages aval
+            else:
+                timeout = max(0.0, min(v[0] for v in pending.values()) - time.time()) if pending else None
+            try:
+                item = self.events.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+            now = time.time()
+            if item is _STOP:
+                stopping = True
+            elif item is not None:
+                path, closed = item
+                due = now if closed else now + self.settle
+                sig = file_signature(path) if closed else None
+                pending[path] = [due, sig]
+            while True:
+                try:
+                    path = self.reruns.get_nowait()
+                except queue.Empty:
+                    break
+                pending[path] = [now + self.settle, None]
+            if stopping:
+                # arrêt : plus d'attente de stabilisation, on sort quand plus rien n'est en cours
+                for path in list(pending):
+                    del pending[path]
+                    self._emit(path)
+                with self.lock:
+                    idle = not self.in_flight and self.reruns.empty()
+                if idle:
+                    self.to_extract.put(_STOP)
+                    return
+                continue
+            for path, entry in list(pending.items()):
+                if entry[0] > now:
+                    continue
+                sig = file_signature(path)
+                if sig is None:          # supprimé / renommé entre-temps
+                    del pending[path]
+                elif sig != entry[1] or sig[0] == 0:
+                    entry[:] = [now + self.settle, sig]   # encore en cours d'écriture
+                else:
+                    del pending[path]
+                    self._emit(path)
+
+    def _emit(self, pdf_path):
+        with self.lock:
+            if pdf_path in self.in_flight:
+                self.rerun.add(pdf_path)
+                return
+            self.in_flight.add(pdf_path)
+            self.stats['recus'] += 1
+        self.to_extract.put(pdf_path)
+
+    def _done(self, pdf_path, ok, sha=None, status=None):
+        with self.lock:
+            self.in_flight.discard(pdf_path)
+            self.in_flight_sha.discard(sha)
+            self.stats[status or ('traites' if ok else 'echecs')] += 1
+            again = pdf_path in self.rerun
+            if again:
+                self.rerun.discard(pdf_path)
+                self.reruns.put(pdf_path)  # sous le verrou : l'étage 1 ne peut pas s'arrêter entre-temps
+        if again:
+            try:  # réveil de l'étage 1, sans jamais bloquer (file pleine = il est déjà réveillé)
+                self.events.put_nowait(None)
+            except queue.Full:
+                pass
+
+    # Étage 2 : empreinte du contenu (registre) puis extraction du texte dans le pool de processus
+    def _extract_loop(self):
+        while True:
+            pdf_path = self.to_extract.get()
+            if pdf_path is _STOP:
+                self.to_extract.put(_STOP)  # réveille les autres threads de l'étage
+                return
+            try:
+                sha = hash_file(pdf_path)
+            except OSError as e:
+                print(f"Erreur lors de la lecture du PDF {pdf_path}: {e}")
+                self._done(pdf_path, False)
+                continue
+            with self.lock:
+                duplicate = sha in self.in_flight_sha
+                if not duplicate:
+                    self.in_flight_sha.add(sha)
+            if duplicate or self.ledger.seen(sha):
+                print(f"Ignoré (contenu déjà traité) : {pdf_path}")
+                if not duplicate:
+                    self.ledger.record_file(pdf_path, sha)
+                self._done(pdf_path, True, None if duplicate else sha, status='deja_traites')
+                continue
+            try:
+                texte, pages = self.pool.submit(extract_pdf, pdf_path, **self.extract_options).result()
+            except Exception as e:
+                print(f"Erreur lors de la lecture du PDF {pdf_path}: {e}")
+                texte, pages = None, 0
+            with self.lock:
+                self.stats['pages'] += pages
+            if not texte:
+                self._done(pdf_path, False, sha)
+                continue
+            fields = local_fields_for_contract(texte, pdf_path)
+            if fields:
+                with self.lock:
+                    self.stats['sans_ia'] += 1
+                self.to_write.put((pdf_path, sha, fields, 'local'))
+                continue
+            self.to_llm.put((pdf_path, sha, texte))
+
+    # Étage 3 : appels IA, au plus `concurrency` en parallèle sur la session HTTP partagée
+    def _llm_loop(self):
+        while True:
+            item = self.to_llm.get()
+            if item is _STOP:
+                self.to_llm.put(_STOP)
+                return
+            pdf_path, sha, texte = item
+            with self.lock:
+                self.stats['avec_ia'] += 1
+            try:
+                fields = parse_employee_upsert(call_mistral_for_sql(texte))
+            except Exception as e:
+                print(f"Erreur lors du traitement du fichier {pdf_path} : {e}")
+                fields = None
+            if not fields:
+                self._done(pdf_path, False, sha)
+                continue
+            self.to_write.put((pdf_path, sha, fields, 'ia'))
+
+    # Étage 4 : unique écrivain (les lignes de OUTPUT_RECORDS_FILE ne s'entremêlent jamais)
+    def _write_loop(self):
+        while True:
+            item = self.to_write.get()
+            if item is _STOP:
+                return
+            pdf_path, sha, fields, origin = item
+            record = employee_record(fields, pdf_path, sha, origin)
+            ok = record is not None and save_record(record)
+            if ok:
+                self.ledger.add(sha, pdf_path)
+            self._done(pdf_path, ok, sha)
+
+    def progress(self):
+        """Ligne d'avancement : fichiers terminés et débit (fichiers/s, pages/s)."""
+        with self.lock:
+            done = self.stats['traites'] + self.stats['deja_traites'] + self.stats['echecs']
+            pages = self.stats['pages']
+        elapsed = max(time.time() - self.started_at, 1e-6)
+        return (f"{done} fichier(s) terminé(s) ({self.stats['echecs']} échec(s)), {pages} page(s) — "
+                f"{done / elapsed:.2f} fichiers/s, {pages / elapsed:.2f} pages/s — {self.llm_avoidance()}")
+
+    def llm_avoidance(self):
+        """Part des contrats convertis sans appel IA (extraction locale suffisamment sûre)."""
+        local, ia = self.stats['sans_ia'], self.stats['avec_ia']
+        rate = 100.0 * local / (local + ia) if local + ia else 0.0
+        return f"IA évitée pour {local}/{local + ia} contrat(s) ({rate:.0f} %)"
+
+    def stop(self):
+        """Vide les files étage par étage puis arrête les pools."""
+        self.events.put(_STOP)
+        for stage in ("settle", "extract"):
+            self._join(stage)
+        self.to_llm.put(_STOP)
+        self._join("llm")
+        self.to_write.put(_STOP)
+        self._join("writer")
+        self.pool.shutdown()
+        elapsed = time.time() - self.started_at
+        self.ledger.close()
+        print(f"Pipeline arrêté : {self.stats['traites']} contrat(s) traité(s), "
+              f"{self.stats['deja_traites']} déjà traité(s), {self.stats['echecs']} échec(s) en {elapsed:.1f} s")
+        print(f"Débit : {self.progress()}")
+
+    def _join(self, stage):
+        for name, t in self.threads:
+            if name == stage:
+                t.join()
+
+
+# --- 4. LE "GARDIEN" (WATCHDOG) ---
 
 class ContractHandler(FileSystemEventHandler):
 
-    '''def on_created(self, event):
+    def __init__(self, pipeline=None, ledger=None):
+        super().__init__()
+        # Si un pipeline est fourni, le traitement est délégué (le thread watchdog n'est jamais bloqué)
+        self.pipeline = pipeline
+        self.ledger = ledger
+
+    def on_created(self, event):
         """Appelé quand un fichier est CRÉÉ."""
         if not event.is_directory and event.src_path.endswith('.pdf'):
             print(f"Nouveau fichier détecté : {event.src_path}")
-            self.process_file(event.src_path)'''
+            self.process_file(event.src_path)
 
     def on_modified(self, event):
         """Appelé quand un fichier est MODIFIÉ."""
@@ -169,42 +888,48 @@ class ContractHandler(FileSystemEventHandler):
             print(f"Fichier modifié détecté : {event.src_path}")
             self.process_file(event.src_path)
 
-    def process_file(self, pdf_path):
-        """Orchestre tout le processus pour un fichier."""
-        # On ajoute un "verrou" pour être 100% sûr
-        # de ne pas traiter le même fichier deux fois en 2 secondes
-
-        # On crée un dictionnaire pour stocker les temps de traitement
-        if not hasattr(self, 'last_processed_time'):
-            self.last_processed_time = {}
-
-        current_time = time.time()
-        last_time = self.last_processed_time.get(pdf_path, 0)
+    def on_closed(self, event):
+        """Appelé quand un fichier ouvert en écriture est FERMÉ (Linux) : il est complet."""
+        if not event.is_directory and event.src_path.endswith('.pdf'):
+            self.process_file(event.src_path, closed=True)
 
-        # Si le fichier a été traité il y a moins de 5 secondes, on ignore
-        if current_time - last_time < 5.0:
-            print(f"Ignoré (traité récemment) : {pdf_path}")
+    def process_file(self, pdf_path, closed=False):
+        """Orchestre tout le processus pour un fichier."""
+        # Plusieurs événements pour le même fichier sont normaux (copie en cours) : le pipeline attend
+        # que le fichier soit stable, puis l'empreinte SHA-256 évite tout retraitement d'un contenu connu.
+        if self.pipeline is not None:
+            self.pipeline.submit(pdf_path, closed)
             return
 
-        # On enregistre le moment où on commence ce traitement
-        self.last_processed_time[pdf_path] = current_time
+        if self.ledger is None:
+            self.ledger = ProcessedLedger()
 
         try:
-            # 1. Lire le PDF
-            # (Note: le time.sleep(1) est déjà dans votre fonction extract_text_from_pdf)
+            # 1. Attendre la fin de l'écriture puis vérifier que le contenu est nouveau
+            if not closed and not wait_until_settled(pdf_path):
+                print(f"Ignoré (fichier toujours en cours d'écriture) : {pdf_path}")
+                return
+            sha = hash_file(pdf_path)
+            if self.ledger.seen(sha):
+                print(f"Ignoré (contenu déjà traité) : {pdf_path}")
+                return
+
+            # 2. Lire le PDF
             texte_contrat = extract_text_from_pdf(pdf_path)
             if not texte_contrat:
                 return
 
-            # 2. Appeler l'IA pour générer le SQL
-            sql_command = call_mistral_for_sql(texte_contrat)
-            if not sql_command:
+            # 3. Extraction locale, sinon appel à l'IA (commande SQL relue en champs structurés)
+            fields, origin = local_fields_for_contract(texte_contrat, pdf_path), 'local'
+            if not fields:
+                fields, origin = parse_employee_upsert(call_mistral_for_sql(texte_contrat)), 'ia'
+            record = employee_record(fields, pdf_path, sha, origin) if fields else None
+            if not record:
                 return
 
-            print(f"SQL Généré : {sql_command}")
-
-            # 3. Sauvegarder le SQL dans le fichier texte
-            save_sql_to_file(sql_command)
+            # 4. Ajouter l'enregistrement au fichier d'ingestion
+            if save_record(record):
+                self.ledger.add(sha, pdf_path)
 
         except Exception as e:
             print(f"Erreur lors du traitement du fichier {pdf_path} : {e}")
@@ -212,26 +937,78 @@ class ContractHandler(FileSystemEventHandler):
             print(f"\n--- En attente du prochain changement ---")
 
 
-# --- 4. SCRIPT PRINCIPAL ---
+# --- 5. SCRIPT PRINCIPAL ---
 
 if __name__ == "__main__":
     # 1. Installer les dépendances :
     # pip install watchdog requests pdfplumber
 
-    # 2. Lancer le gardien
+    parser = argparse.ArgumentParser(description="Surveillance des contrats PDF -> enregistrements employees")
+    parser.add_argument('--concurrency', type=int, default=LLM_CONCURRENCY,
+                        help="Nombre d'appels IA simultanés")
+    parser.add_argument('--workers', type=int, default=EXTRACT_WORKERS,
+                        help="Processus d'extraction PDF")
+    parser.add_argument('--queue-size', type=int, default=QUEUE_SIZE,
+                        help="Taille des files entre étages (au-delà, l'amont attend)")
+    parser.add_argument('--engine', choices=['pdfium', 'pdfplumber'], default=PDF_ENGINE,
+                        help="Moteur d'extraction du texte (pdfplumber en repli automatique)")
+    parser.add_argument('--max-pages', type=int, default=PDF_MAX_PAGES,
+                        help="N'extraire que les N premières pages (0 = toutes)")
+    parser.add_argument('--no-early-stop', action='store_true',
+                        help="Lire toutes les pages même si les informations utiles sont déjà trouvées")
+    parser.add_argument('--no-local-extract', action='store_true',
+                        help="Toujours passer par l'IA (désactive l'extraction locale par règles)")
+    parser.add_argument('--local-min-confidence', type=float, default=LOCAL_MIN_CONFIDENCE,
+                        help="Confiance minimale de chaque champ pour se passer de l'IA")
+    parser.add_argument('--backfill', action='store_true',
+                        help="Traite les PDF existants nouveaux ou modifiés puis s'arrête (pas de surveillance)")
+    parser.add_argument('--recursive', action='store_true',
+                        help="Inclut les sous-dossiers (rattrapage et surveillance)")
+    parser.add_argument('--progress-every', type=float, default=10.0,
+                        help="Intervalle (s) des rapports d'avancement pendant le rattrapage")
+    args = parser.parse_args()
+    LLM_CONCURRENCY = args.concurrency
+    PDF_ENGINE, PDF_MAX_PAGES, PDF_EARLY_STOP = args.engine, args.max_pages, not args.no_early_stop
+    LOCAL_EXTRACT_ENABLED, LOCAL_MIN_CONFIDENCE = not args.no_local_extract, args.local_min_confidence
+
+    # 2. Lancer le pipeline puis le gardien
     path = DOSSIER_CONTRATS
-    event_handler = ContractHandler()
+    pipeline = ContractPipeline(args.concurrency, args.workers, args.queue_size, extract_options={
+        'engine': args.engine, 'max_pages': args.max_pages, 'early_stop': not args.no_early_stop}).start()
+
+    if args.backfill:
+        # Mode archive : rattrapage complet avec rapport d'avancement, puis arrêt
+        finished = threading.Event()
+
+        def report():
+            while not finished.wait(args.progress_every):
+                print(f"[backfill] {pipeline.progress()}")
+
+        threading.Thread(target=report, daemon=True).start()
+        seen, submitted = catch_up(pipeline, path, args.recursive)
+        print(f"[backfill] {seen} PDF trouvé(s) dans '{path}', {submitted} nouveau(x) ou modifié(s).")
+        pipeline.stop()
+        finished.set()
+        raise SystemExit(0)
+
+    event_handler = ContractHandler(pipeline)
     observer = Observer()
-    observer.schedule(event_handler, path, recursive=False)
+    observer.schedule(event_handler, path, recursive=args.recursive)
 
     print(f"Surveillance du dossier '{path}' démarrée.")
-    print(f"Les commandes SQL seront stockées dans '{OUTPUT_SQL_FILE}'.")
+    print(f"Les contrats extraits seront ajoutés à '{OUTPUT_RECORDS_FILE}'.")
+    print(f"Pipeline : {pipeline.workers} processus d'extraction, {pipeline.concurrency} appels IA simultanés.")
     observer.start()
 
+    # Rattrapage : contrats déposés pendant que le script était arrêté
+    seen, submitted = catch_up(pipeline, path, args.recursive)
+    print(f"Rattrapage : {seen} PDF présent(s), {submitted} nouveau(x) ou modifié(s) mis en file.")
+
     try:
         while True:
             time.sleep(5)
     except KeyboardInterrupt:
         observer.stop()
         print("Surveillance arrêtée.")
-    observer.join()
\ No newline at end of file
+    observer.join()
+    pipeline.stop()
\ No newline at end of file
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark des moteurs d'extraction de texte des contrats (WatchingScript.extract_pdf).
+
+Compare pdfplumber et PDFium, avec et sans arrêt anticipé, sur un dossier de contrats :
+temps total, fichiers/s, pages/s, caractères extraits et proportion de contrats où les
+trois repères (identité, horaire, type de contrat) sont présents dans le texte.
+
+Usage :
+    python bench_extraction.py                       # dossier Contracts/
+    python bench_extraction.py archive/ --recursive --repeat 3 --json bench_extraction.json
+"""
+
+import io
+import sys
+import json
+import time
+import argparse
+from contextlib import redirect_stdout
+
+import WatchingScript as W
+
+CONFIGS = [
+    ('pdfplumber', dict(engine='pdfplumber', early_stop=False)),
+    ('pdfplumber+arret', dict(engine='pdfplumber', early_stop=True)),
+    ('pdfium', dict(engine='pdfium', early_stop=False)),
+    ('pdfium+arret', dict(engine='pdfium', early_stop=True)),
+]
+
+
+def run_config(files, options, repeat):
+    best = None
+    for _ in range(repeat):
+        pages = chars = complete = 0
+        t0 = time.perf_counter()
+        with redirect_stdout(io.StringIO()):
+            for path in files:
+                text, n = W.extract_pdf(path, **options)
+                pages += n
+                chars += len(text or "")
+                if text and all(p.search(text) for p in W.CONTRACT_FIELD_PATTERNS.values()):
+                    complete += 1
+        elapsed = time.perf_counter() - t0
+        if best is None or elapsed < best['seconds']:
+            best = {'seconds': round(elapsed, 4), 'pages': pages, 'chars': chars, 'fields_complete': complete}
+    best['files_per_s'] = round(len(files) / best['seconds'], 2) if best['seconds'] else None
+    best['pages_per_s'] = round(best['pages'] / best['seconds'], 2) if best['seconds'] else None
+    return best
+
+
+def main():
+    p = argparse.ArgumentParser(description="Benchmark des moteurs d'extraction PDF")
+    p.add_argument('folder', nargs='?', default=W.DOSSIER_CONTRATS)
+    p.add_argument('--recursive', action='store_true')
+    p.add_argument('--repeat', type=int, default=3, help="Répétitions (on garde la meilleure)")
+    p.add_argument('--max-pages', type=int, default=0)
+    p.add_argument('--json', help="Écrit les résultats dans ce fichier")
+    args = p.parse_args()
+
+    files = list(W.iter_contract_files(args.folder, args.recursive))
+    if not files:
+        print(f"[ERREUR] Aucun PDF dans '{args.folder}'.")
+        return 1
+    if W.pdfium is None:
+        print("[WARN] pypdfium2 absent : les configurations pdfium utilisent le repli pdfplumber.")
+
+    results = {}
+    print(f"{len(files)} contrat(s), meilleure de {args.repeat} passe(s)")
+    print(f"{'moteur':<18}{'temps (s)':>10}{'fichiers/s':>12}{'pages/s':>10}{'pages':>8}{'caract.':>10}{'repères':>9}")
+    for name, options in CONFIGS:
+        r = run_config(files, dict(options, max_pages=args.max_pages), args.repeat)
+        results[name] = r
+        print(f"{name:<18}{r['seconds']:>10.3f}{r['files_per_s']:>12}{r['pages_per_s']:>10}"
+              f"{r['pages']:>8}{r['chars']:>10}{r['fields_complete']:>6}/{len(files)}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'files': len(files), 'repeat': args.repeat, 'results': results}, f, indent=2)
+        print(f"[OK] Résultats écrits dans {args.json}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
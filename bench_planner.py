@@ -0,0 +1,436 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark du planificateur sur des bases synthétiques reproductibles.
+
+1) Générateur : à partir d'une graine, crée une base SQLite (schéma main.sql) avec N employés,
+   M tâches, une distribution de compétences (popularité en loi de Zipf), un motif de disponibilités
+   (office / shifts / mixed), un taux d'absences et une densité de planning existant.
+2) Banc : chaque étape de `Planificateur.py generate` (moteur greedy) est chronométrée sur plusieurs
+   paliers de taille : ensure_db, load_context, compute_allowed_slots, compact_llm_context,
+   greedy_plan, validate_plan, generate_sql_inserts et écriture des fichiers. Pour chaque étape :
+   temps (meilleure des --repeat passes) et pic mémoire (passe dédiée sous tracemalloc) ;
+   par palier : couverture du plan, erreurs/avertissements de validation, RSS max du processus.
+3) Résultats JSON (--json) comparables entre versions (--compare ancien.json : ratios par étape,
+   code retour 1 si une étape ralentit au-delà de --threshold).
+
+Usage :
+    python bench_planner.py                                  # paliers small et medium
+    python bench_planner.py --tiers small,medium,large --json bench_planner.json
+    python bench_planner.py --tiers medium --compare bench_planner.json
+    python bench_planner.py --tiers large --db-dir bases/ --generate-only   # garder les bases générées
+"""
+
+import os
+import sys
+import gc
+import json
+import time
+import random
+import shutil
+import argparse
+import platform
+import tempfile
+import subprocess
+import tracemalloc
+from datetime import date, timedelta
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+import db
+import Planificateur as P
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SCHEMA_SQL = os.path.join(HERE, 'main.sql')
+
+# Paliers de taille (les autres paramètres du générateur viennent de la ligne de commande)
+TIERS = {
+    'small': dict(employees=50, tasks=200, weeks=4),
+    'medium': dict(employees=200, tasks=1000, weeks=4),
+    'large': dict(employees=1000, tasks=5000, weeks=12),
+}
+
+STAGES = ['ensure_db', 'load_context', 'compute_allowed_slots', 'compact_llm_context',
+          'greedy_plan', 'validate_plan', 'generate_sql_inserts', 'write_outputs']
+
+CONTRACTS = [('Full-time', 35), ('Part-time', 20), ('Intern', 30), ('Contractor', 40)]
+PRIORITIES = [('Low', 2), ('Medium', 4), ('High', 3), ('Critical', 1)]
+
+# Motifs de disponibilité : liste de (jours, [(début, fin), ...])
+WEEK = P.WEEKDAYS[:5]
+PATTERNS = {
+    'office': [(WEEK, [('09:00', '17:00')])],
+    'split': [(WEEK, [('08:00', '12:00'), ('13:00', '17:00')])],
+    'part_time': [(['Mon', 'Tue', 'Thu'], [('09:00', '13:00')])],
+    'morning': [(None, [('06:00', '14:00')])],     # None : 5 jours tirés parmi 7
+    'afternoon': [(None, [('14:00', '22:00')])],
+}
+AVAILABILITY_MIXES = {
+    'office': {'office': 1},
+    'shifts': {'morning': 1, 'afternoon': 1},
+    'mixed': {'office': 4, 'split': 2, 'part_time': 2, 'morning': 1, 'afternoon': 1},
+}
+
+
+# --- 1. GÉNÉRATEUR ---
+def weighted_sample(rnd, population, weights, k):
+    """Tirage pondéré sans remise."""
+    pool, w = list(population), list(weights)
+    out = []
+    for _ in range(min(k, len(pool))):
+        i = rnd.choices(range(len(pool)), weights=w)[0]
+        out.append(pool.pop(i))
+        w.pop(i)
+    return out
+
+
+def generate_workload(path, employees, tasks, weeks, from_date, seed=42, skills=20, skills_per_employee=3,
+                      skill_skew=1.0, skills_per_task=2, task_skill_match=0.9, availability='mixed',
+                      absence_rate=0.05, planning_density=0.2, replacement_rate=0.3, assigned_rate=0.2):
+    """
+    Crée `path` (main.sql) et le remplit ; même graine et mêmes paramètres => même base.
+      skill_skew        : exposant de Zipf de la popularité des compétences (0 = uniforme)
+      task_skill_match  : part des tâches dont les compétences sont tirées chez un employé existant
+                          (les autres peuvent n'avoir aucun candidat)
+      absence_rate      : part des jours-employé de la fenêtre couverts par une absence approuvée
+      planning_density  : part (≈) des heures disponibles déjà planifiées dans la fenêtre
+    Retour : nombre de lignes par table.
+    """
+    rnd = random.Random(seed)
+    to_date = from_date + timedelta(weeks=weeks) - timedelta(days=1)
+    days = list(P.daterange(from_date, to_date))
+
+    conn = db.connect(path, pragmas=[("synchronous", "OFF"), ("foreign_keys", "OFF")])
+    P.ensure_db(conn, SCHEMA_SQL)
+    with conn:
+        conn.executemany("INSERT INTO skills (id, name) VALUES (?, ?)",
+                         [(k, f"Compétence {k}") for k in range(1, skills + 1)])
+        popularity = [1.0 / (k ** skill_skew) for k in range(1, skills + 1)]
+
+        emp_rows, emp_skills, avail_rows, emp_windows = [], {}, [], {}
+        mix = AVAILABILITY_MIXES[availability]
+        for i in range(1, employees + 1):
+            contract, hours = rnd.choice(CONTRACTS)
+            emp_rows.append((i, f"Prenom{i}", f"Nom{i}", contract, hours, int(rnd.random() < replacement_rate)))
+            n = max(1, min(skills, int(rnd.expovariate(1.0 / skills_per_employee)) + 1))
+            emp_skills[i] = weighted_sample(rnd, range(1, skills + 1), popularity, n)
+            pattern = rnd.choices(list(mix), weights=list(mix.values()))[0]
+            windows = {}
+            for dows, wins in PATTERNS[pattern]:
+                for dow in dows or sorted(rnd.sample(P.WEEKDAYS, 5), key=P.WEEKDAYS.index):
+                    windows[dow] = wins
+                    avail_rows.extend((i, dow, s, e) for s, e in wins)
+            emp_windows[i] = windows
+        conn.executemany("INSERT INTO employees (id, first_name, last_name, contract_type, weekly_hours_max, "
+                         "accept_replacement) VALUES (?, ?, ?, ?, ?, ?)", emp_rows)
+        conn.executemany("INSERT INTO employee_skills (employee_id, skill_id) VALUES (?, ?)",
+                         [(i, sk) for i, sks in emp_skills.items() for sk in sks])
+        conn.executemany("INSERT INTO employee_availability (employee_id, day_of_week, start_time, end_time) "
+                         "VALUES (?, ?, ?, ?)", avail_rows)
+
+        task_rows, req_rows = [], []
+        for t in range(1, tasks + 1):
+            k = rnd.randint(0, skills_per_task)
+            if rnd.random() < task_skill_match:
+                owned = emp_skills[rnd.randint(1, employees)]
+                req = rnd.sample(owned, min(k, len(owned)))
+            else:
+                req = weighted_sample(rnd, range(1, skills + 1), popularity, k)
+            req_rows.extend((t, sk) for sk in req)
+            deadline = None if rnd.random() < 0.1 else P.dstr(from_date + timedelta(days=rnd.randrange(len(days) + 7)))
+            status = rnd.choices(['Pending', 'In progress', 'Completed'], weights=[7, 2, 1])[0]
+            task_rows.append((t, f"Tâche {t}", rnd.randint(1, 16), deadline,
+                              rnd.choices([p for p, _ in PRIORITIES], weights=[w for _, w in PRIORITIES])[0],
+                              rnd.randint(1, employees) if rnd.random() < assigned_rate else None, status,
+                              f"Site {rnd.randint(1, 5)}"))
+        conn.executemany("INSERT INTO tasks (id, title, duration_hours, deadline, priority, assigned_to, status, "
+                         "location) VALUES (?, ?, ?, ?, ?, ?, ?, ?)", task_rows)
+        conn.executemany("INSERT INTO task_required_skills (task_id, skill_id) VALUES (?, ?)", req_rows)
+
+        abs_rows = []
+        for i in range(1, employees + 1):
+            target = int(round(absence_rate * len(days)))
+            while target > 0:
+                n = min(target, rnd.randint(1, 5))
+                start = from_date + timedelta(days=rnd.randrange(len(days)))
+                abs_rows.append((i, P.dstr(start), P.dstr(start + timedelta(days=n - 1)), 'Approved'))
+                target -= n
+            if rnd.random() < 0.2:  # bruit : demandes non approuvées (ignorées par le planificateur)
+                start = from_date + timedelta(days=rnd.randrange(len(days)))
+                abs_rows.append((i, P.dstr(start), P.dstr(start + timedelta(days=2)),
+                                 rnd.choice(['Pending', 'Rejected'])))
+        conn.executemany("INSERT INTO absences (employee_id, start_date, end_date, status) VALUES (?, ?, ?, ?)",
+                         abs_rows)
+
+        # planning existant : un bloc un jour disponible sur deux, de taille ~ 2 x densité x fenêtre
+        plan_rows = []
+        if planning_density > 0:
+            for d in days:
+                ds, dow = P.dstr(d), P.weekday_str(d)
+                for i in range(1, employees + 1):
+                    wins = emp_windows[i].get(dow)
+                    if not wins or rnd.random() < 0.5:
+                        continue
+                    ws, we = (P.hm_to_min(x) for x in rnd.choice(wins))
+                    units = min((we - ws) // 30, max(1, round(2 * planning_density * (we - ws) / 30)))
+                    s = ws + 30 * rnd.randint(0, (we - ws) // 30 - units)
+                    plan_rows.append((i, rnd.randint(1, tasks), ds, P.min_to_hm(s), P.min_to_hm(s + 30 * units)))
+        conn.executemany("INSERT INTO planning (employee_id, task_id, date, start_time, end_time) "
+                         "VALUES (?, ?, ?, ?, ?)", plan_rows)
+
+    counts = {table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+              for table in ('employees', 'skills', 'employee_skills', 'employee_availability', 'tasks',
+                            'task_required_skills', 'absences', 'planning')}
+    conn.close()
+    return counts
+
+
+# --- 2. ÉTAPES DE GENERATE ---
+def run_pipeline(path, from_date, to_date, out_dir, validator, on_stage):
+    """
+    Rejoue cmd_generate (moteur greedy, sans appel LLM). on_stage(nom, fn) exécute et mesure chaque étape.
+    Retour : (contexte, résultat, rapport, nombre de créneaux, octets du contexte LLM).
+    """
+    def ensure():
+        conn = db.connect(path)
+        try:
+            P.ensure_db(conn, SCHEMA_SQL)
+        finally:
+            conn.close()
+
+    def load():
+        conn = db.connect(path, readonly=True)
+        try:
+            return P.load_compact_context(conn, from_date, to_date)
+        finally:
+            conn.close()
+
+    def slots():
+        conn = db.connect(path, readonly=True)
+        try:
+            return len(P.compute_allowed_slots(conn, from_date, to_date))
+        finally:
+            conn.close()
+
+    def write(result, report, sql_text):
+        with open(os.path.join(out_dir, 'plan_preview.json'), 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        with open(os.path.join(out_dir, 'plan_report.json'), 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        with open(os.path.join(out_dir, 'PropositionPlanning.txt'), 'w', encoding='utf-8') as f:
+            f.write(sql_text)
+
+    on_stage('ensure_db', ensure)
+    context = on_stage('load_context', load)
+    n_slots = on_stage('compute_allowed_slots', slots)
+    llm_bytes = on_stage('compact_llm_context', lambda: len(json.dumps(
+        P.compact_llm_context(context), ensure_ascii=False, separators=(',', ':')).encode('utf-8')))
+    result = on_stage('greedy_plan', lambda: P.greedy_plan(context))
+    report = on_stage('validate_plan', lambda: P.validate_plan(context, result, backend=validator))
+    sql_text = on_stage('generate_sql_inserts', lambda: P.generate_sql_inserts(result.get('plan', [])))
+    on_stage('write_outputs', lambda: write(result, report, sql_text))
+    return context, result, report, n_slots, llm_bytes
+
+
+def coverage(context, result):
+    demand = {t['id']: int(float(t['duration_hours']) * 60) for t in context['tasks']}
+    planned = dict.fromkeys(demand, 0)
+    for p in result.get('plan', []):
+        if p['task_id'] in planned:
+            planned[p['task_id']] += P.hm_to_min(p['end_time']) - P.hm_to_min(p['start_time'])
+    need, got = sum(demand.values()), sum(min(planned[t], m) for t, m in demand.items())
+    return {
+        'rows': len(result.get('plan', [])),
+        'demand_hours': round(need / 60.0, 1),
+        'planned_hours': round(got / 60.0, 1),
+        'coverage_pct': round(100.0 * got / need, 2) if need else None,
+        'tasks_complete': sum(1 for t, m in demand.items() if planned[t] >= m),
+        'tasks': len(demand),
+    }
+
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(rss / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def bench_tier(path, from_date, to_date, repeat, validator, memory):
+    out_dir = tempfile.mkdtemp(prefix="bench_planner_out_")
+    walls = {s: None for s in STAGES}
+    try:
+        def timed(name, fn):
+            gc.collect()
+            t0 = time.perf_counter()
+            out = fn()
+            dt = time.perf_counter() - t0
+            walls[name] = dt if walls[name] is None or dt < walls[name] else walls[name]
+            return out
+
+        for _ in range(repeat):
+            context, result, report, n_slots, llm_bytes = run_pipeline(path, from_date, to_date, out_dir,
+                                                                       validator, timed)
+        stages = {s: {'wall_s': round(walls[s], 4)} for s in STAGES}
+
+        if memory:
+            # passe séparée : tracemalloc ralentit fortement l'exécution
+            def traced(name, fn):
+                gc.collect()
+                tracemalloc.reset_peak()
+                base = tracemalloc.get_traced_memory()[0]
+                out = fn()
+                stages[name]['peak_mb'] = round((tracemalloc.get_traced_memory()[1] - base) / 1e6, 2)
+                return out
+            tracemalloc.start()
+            try:
+                run_pipeline(path, from_date, to_date, out_dir, validator, traced)
+            finally:
+                tracemalloc.stop()
+    finally:
+        shutil.rmtree(out_dir, ignore_errors=True)
+
+    return {
+        'stages': stages,
+        'total_s': round(sum(v['wall_s'] for v in stages.values()), 4),
+        'allowed_slots': n_slots,
+        'llm_context_bytes': llm_bytes,
+        'coverage': coverage(context, result),
+        'errors': len(report['errors']),
+        'warnings': len(report['warnings']),
+        'peak_rss_mb': peak_rss_mb(),
+    }
+
+
+# --- 3. COMPARAISON ---
+def compare(old, new, threshold, noise_s=0.005):
+    """Affiche les ratios nouveau/ancien par étape ; retourne la liste des régressions."""
+    regressions = []
+    for tier, res in new['tiers'].items():
+        prev = old.get('tiers', {}).get(tier)
+        if not prev:
+            continue
+        print(f"\n[{tier}] {old.get('meta', {}).get('git')} -> {new['meta'].get('git')}")
+        for stage in STAGES + ['total']:
+            a = prev['total_s'] if stage == 'total' else prev['stages'].get(stage, {}).get('wall_s')
+            b = res['total_s'] if stage == 'total' else res['stages'][stage]['wall_s']
+            if a is None:
+                continue
+            ratio = b / a if a else float('inf')
+            flag = ""
+            if ratio > threshold and b - a > noise_s:
+                flag = "  <-- régression"
+                regressions.append((tier, stage, ratio))
+            print(f"  {stage:<24}{a:>10.4f}{b:>10.4f}{ratio:>8.2f}x{flag}")
+        if prev.get('coverage', {}).get('coverage_pct') != res['coverage']['coverage_pct']:
+            print(f"  [WARN] couverture {prev['coverage']['coverage_pct']}% -> {res['coverage']['coverage_pct']}%")
+    return regressions
+
+
+def git_revision():
+    try:
+        out = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=HERE, capture_output=True,
+                             text=True, timeout=5)
+        return out.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def main():
+    p = argparse.ArgumentParser(description="Benchmark du planificateur sur bases synthétiques")
+    p.add_argument('--tiers', default='small,medium', help=f"Paliers parmi {', '.join(TIERS)}")
+    p.add_argument('--employees', type=int, help="Remplace le nombre d'employés des paliers")
+    p.add_argument('--tasks', type=int, help="Remplace le nombre de tâches des paliers")
+    p.add_argument('--weeks', type=int, help="Remplace la taille de la fenêtre des paliers")
+    p.add_argument('--from-date', default='2025-01-06', help="Début de la fenêtre (YYYY-MM-DD)")
+    p.add_argument('--seed', type=int, default=42)
+    p.add_argument('--skills', type=int, default=20, help="Nombre de compétences")
+    p.add_argument('--skills-per-employee', type=float, default=3, help="Moyenne de compétences par employé")
+    p.add_argument('--skill-skew', type=float, default=1.0, help="Exposant de Zipf (0 = uniforme)")
+    p.add_argument('--skills-per-task', type=int, default=2, help="Maximum de compétences requises par tâche")
+    p.add_argument('--task-skill-match', type=float, default=0.9,
+                   help="Part des tâches réalisables par au moins un employé")
+    p.add_argument('--availability', choices=sorted(AVAILABILITY_MIXES), default='mixed')
+    p.add_argument('--absence-rate', type=float, default=0.05)
+    p.add_argument('--planning-density', type=float, default=0.2)
+    p.add_argument('--validator', choices=['auto', 'python', 'numpy'], default='auto')
+    p.add_argument('--repeat', type=int, default=3, help="Passes chronométrées (on garde la meilleure)")
+    p.add_argument('--no-memory', action='store_true', help="Sans la passe tracemalloc (pic mémoire)")
+    p.add_argument('--db-dir', help="Conserve les bases générées dans ce dossier (défaut : temporaire)")
+    p.add_argument('--generate-only', action='store_true', help="Génère les bases sans chronométrer")
+    p.add_argument('--json', help="Écrit les résultats dans ce fichier")
+    p.add_argument('--compare', help="Résultats JSON d'une version précédente")
+    p.add_argument('--threshold', type=float, default=1.2, help="Ratio de temps signalé comme régression")
+    args = p.parse_args()
+
+    tiers = [t.strip() for t in args.tiers.split(',') if t.strip()]
+    unknown = [t for t in tiers if t not in TIERS]
+    if unknown:
+        print(f"[ERREUR] Palier(s) inconnu(s) : {', '.join(unknown)}.")
+        return 2
+    from_date = date.fromisoformat(args.from_date)
+    workload = dict(seed=args.seed, skills=args.skills, skills_per_employee=args.skills_per_employee,
+                    skill_skew=args.skill_skew, skills_per_task=args.skills_per_task,
+                    task_skill_match=args.task_skill_match, availability=args.availability,
+                    absence_rate=args.absence_rate, planning_density=args.planning_density)
+
+    db_dir = args.db_dir or tempfile.mkdtemp(prefix="bench_planner_")
+    os.makedirs(db_dir, exist_ok=True)
+    results = {'meta': {'git': git_revision(), 'python': platform.python_version(),
+                        'platform': platform.platform(), 'numpy': P.np is not None,
+                        'date': time.strftime('%Y-%m-%dT%H:%M:%S'), 'repeat': args.repeat,
+                        'validator': args.validator, 'workload': workload},
+               'tiers': {}}
+    try:
+        for tier in tiers:
+            size = dict(TIERS[tier])
+            for key in ('employees', 'tasks', 'weeks'):
+                if getattr(args, key):
+                    size[key] = getattr(args, key)
+            path = os.path.join(db_dir, f"bench_{tier}_{args.seed}.db")
+            for suffix in ("", "-wal", "-shm"):
+                if os.path.exists(path + suffix):
+                    os.remove(path + suffix)
+            t0 = time.perf_counter()
+            counts = generate_workload(path, from_date=from_date, **size, **workload)
+            print(f"[{tier}] base {path} générée en {time.perf_counter() - t0:.1f} s : "
+                  + ", ".join(f"{k}={v}" for k, v in counts.items()))
+            if args.generate_only:
+                continue
+
+            to_date = from_date + timedelta(weeks=size['weeks']) - timedelta(days=1)
+            res = bench_tier(path, from_date, to_date, args.repeat, args.validator, not args.no_memory)
+            res.update(size=size, rows=counts)
+            results['tiers'][tier] = res
+            cov = res['coverage']
+            print(f"{'étape':<24}{'temps (s)':>10}{'pic (MB)':>10}")
+            for stage in STAGES:
+                st = res['stages'][stage]
+                print(f"{stage:<24}{st['wall_s']:>10.4f}{st.get('peak_mb', float('nan')):>10.2f}")
+            print(f"{'total':<24}{res['total_s']:>10.4f}   RSS max {res['peak_rss_mb']} MB")
+            print(f"couverture {cov['coverage_pct']}% ({cov['planned_hours']}h / {cov['demand_hours']}h, "
+                  f"{cov['tasks_complete']}/{cov['tasks']} tâches complètes), {res['allowed_slots']} créneaux, "
+                  f"{res['errors']} erreur(s), {res['warnings']} avertissement(s)\n")
+    finally:
+        if not args.db_dir:
+            shutil.rmtree(db_dir, ignore_errors=True)
+
+    if args.generate_only:
+        return 0
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"[OK] Résultats écrits dans {args.json}")
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            regressions = compare(json.load(f), results, args.threshold)
+        if regressions:
+            print(f"\n[WARN] {len(regressions)} étape(s) plus lente(s) que x{args.threshold}.")
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark des lectures de la fenêtre de planification sur une grosse table planning.
+
+Construit une base synthétique (main.sql) avec --rows lignes de planning réparties sur plusieurs
+années, puis mesure, sans puis avec les index couvrants de main.sql
+(idx_planning_date_cover, idx_absences_approved) :
+  - la requête de planning sur la fenêtre,
+  - la requête d'absences approuvées chevauchant la fenêtre,
+  - load_context complet (lecture unique partagée avec compute_free_intervals),
+  - l'ancien schéma d'accès : load_context + compute_free_intervals relisant les tables.
+
+Usage :
+    python bench_planning_scan.py                      # 1 000 000 lignes, base temporaire
+    python bench_planning_scan.py --rows 200000 --json bench_planning_scan.json
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+from datetime import date, timedelta
+
+import db
+import Planificateur as P
+
+WINDOW_INDEXES = ('idx_planning_date_cover', 'idx_absences_approved')
+DAYS = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
+
+
+def build_db(path, rows, employees, seed):
+    rnd = random.Random(seed)
+    conn = db.connect(path, pragmas=[("synchronous", "OFF"), ("foreign_keys", "OFF")])
+    P.ensure_db(conn, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'main.sql'))
+    with conn:
+        conn.executemany(
+            "INSERT INTO employees (first_name, last_name, contract_type, weekly_hours_max) VALUES (?, ?, ?, ?)",
+            [(f"Prenom{i}", f"Nom{i}", 'Full-time', 35) for i in range(employees)])
+        conn.executemany(
+            "INSERT INTO employee_availability (employee_id, day_of_week, start_time, end_time) VALUES (?, ?, ?, ?)",
+            [(e, d, '08:00', '17:00') for e in range(1, employees + 1) for d in DAYS[:5]])
+        conn.executemany("INSERT INTO tasks (title, duration_hours, status) VALUES (?, ?, ?)",
+                         [(f"T{i}", 8, 'Completed') for i in range(200)])
+        start = date(2020, 1, 1)
+        absences = []
+        for _ in range(employees * 20):
+            d = start + timedelta(days=rnd.randrange(6 * 365))
+            absences.append((rnd.randrange(1, employees + 1), P.dstr(d), P.dstr(d + timedelta(days=rnd.randrange(5))),
+                             rnd.choice(['Approved', 'Pending', 'Rejected'])))
+        conn.executemany("INSERT INTO absences (employee_id, start_date, end_date, status) VALUES (?, ?, ?, ?)",
+                         absences)
+
+        # une ligne par employé et par jour ouvré jusqu'à atteindre `rows`
+        def planning():
+            n, d = 0, start
+            while True:
+                if d.weekday() < 5:
+                    ds = P.dstr(d)
+                    for e in range(1, employees + 1):
+                        h = 8 + rnd.randrange(6)
+                        yield (e, 1 + rnd.randrange(200), ds, f"{h:02d}:00", f"{h + 2:02d}:00")
+                        n += 1
+                        if n >= rows:
+                            return
+                d += timedelta(days=1)
+        conn.executemany("INSERT INTO planning (employee_id, task_id, date, start_time, end_time) "
+                         "VALUES (?, ?, ?, ?, ?)", planning())
+    span = conn.execute("SELECT MIN(date), MAX(date) FROM planning").fetchone()
+    conn.close()
+    return span
+
+
+def timed(fn, repeat):
+    best = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        dt = time.perf_counter() - t0
+        best = dt if best is None or dt < best else best
+    return round(best, 4), out
+
+
+def measure(path, from_date, to_date, repeat):
+    conn = db.connect(path, readonly=True)
+    f, t = P.dstr(from_date), P.dstr(to_date)
+    plan_q = ("SELECT employee_id, task_id, date, start_time, end_time FROM planning "
+              "WHERE date BETWEEN ? AND ? ORDER BY rowid")
+    abs_q = ("SELECT employee_id, start_date, end_date FROM absences "
+             "WHERE status = 'Approved' AND end_date >= ? AND start_date <= ?")
+    res = {}
+    res['planning_query_s'], rows = timed(lambda: conn.execute(plan_q, (f, t)).fetchall(), repeat)
+    res['planning_rows'] = len(rows)
+    res['absences_query_s'], rows = timed(lambda: conn.execute(abs_q, (f, t)).fetchall(), repeat)
+    res['absence_rows'] = len(rows)
+    res['load_context_s'], _ = timed(lambda: P.load_context(conn, from_date, to_date), repeat)
+    # ancien schéma d'accès : les intervalles libres relisaient disponibilités, absences et planning
+    res['load_context_plus_reread_s'], _ = timed(
+        lambda: (P.load_context(conn, from_date, to_date),
+                 P.compute_free_intervals(conn, from_date, to_date)), repeat)
+    res['plans'] = {
+        'planning': [r[3] for r in conn.execute("EXPLAIN QUERY PLAN " + plan_q, (f, t))],
+        'absences': [r[3] for r in conn.execute("EXPLAIN QUERY PLAN " + abs_q, (f, t))],
+    }
+    conn.close()
+    return res
+
+
+def main():
+    p = argparse.ArgumentParser(description="Benchmark des index couvrants de la fenêtre de planification")
+    p.add_argument('--rows', type=int, default=1_000_000, help="Lignes de planning")
+    p.add_argument('--employees', type=int, default=500)
+    p.add_argument('--weeks', type=int, default=4, help="Taille de la fenêtre lue")
+    p.add_argument('--repeat', type=int, default=3)
+    p.add_argument('--seed', type=int, default=42)
+    p.add_argument('--db', help="Fichier de base (défaut : fichier temporaire supprimé à la fin)")
+    p.add_argument('--json', help="Écrit les résultats dans ce fichier")
+    args = p.parse_args()
+
+    path = args.db or os.path.join(tempfile.mkdtemp(prefix="bench_planning_"), "bench.db")
+    t0 = time.perf_counter()
+    lo, hi = build_db(path, args.rows, args.employees, args.seed)
+    print(f"Base {path} : {args.rows} lignes de planning ({lo} .. {hi}) en {time.perf_counter() - t0:.1f} s")
+
+    # fenêtre au milieu de l'historique
+    mid = date.fromisoformat(lo) + (date.fromisoformat(hi) - date.fromisoformat(lo)) / 2
+    from_date = mid - timedelta(days=mid.weekday())
+    to_date = from_date + timedelta(weeks=args.weeks)
+
+    conn = db.connect(path)
+    saved = conn.execute("SELECT name, sql FROM sqlite_master WHERE type = 'index' AND name IN (%s)"
+                         % ",".join("?" * len(WINDOW_INDEXES)), WINDOW_INDEXES).fetchall()
+    with conn:
+        for name, _ in saved:
+            conn.execute(f"DROP INDEX {name}")
+    conn.close()
+    before = measure(path, from_date, to_date, args.repeat)
+
+    conn = db.connect(path)
+    with conn:
+        for _, sql in saved:
+            conn.execute(sql)
+    conn.close()
+    after = measure(path, from_date, to_date, args.repeat)
+
+    print(f"Fenêtre {P.dstr(from_date)} .. {P.dstr(to_date)} : {after['planning_rows']} lignes de planning, "
+          f"{after['absence_rows']} absence(s) approuvée(s)")
+    print(f"{'mesure (s)':<28}{'sans index':>12}{'avec index':>12}")
+    for key in ('planning_query_s', 'absences_query_s', 'load_context_s', 'load_context_plus_reread_s'):
+        print(f"{key:<28}{before[key]:>12.4f}{after[key]:>12.4f}")
+    for name in ('planning', 'absences'):
+        print(f"[plan] {name} : {' / '.join(before['plans'][name])}  ->  {' / '.join(after['plans'][name])}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'rows': args.rows, 'employees': args.employees, 'window': [P.dstr(from_date), P.dstr(to_date)],
+                       'without_indexes': before, 'with_indexes': after}, f, indent=2)
+        print(f"[OK] Résultats écrits dans {args.json}")
+    if not args.db:
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+        os.rmdir(os.path.dirname(path))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
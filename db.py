@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""
+Accès SQLite commun à Planificateur.py, update_database.py et WatchingScript.py.
+
+- connect() : connexion avec le profil de PRAGMA du projet (temp_store, mmap, clés étrangères,
+  attente sur verrou) et un cache de requêtes préparées plus grand que celui par défaut (128)
+- WAL (avec synchronous=NORMAL) sur demande seulement, wal=True ou SQLITE_JOURNAL_MODE : le mode est
+  écrit dans le fichier et laisse des -wal/-shm, on ne l'impose donc pas aux bases suivies (hackaton.db)
+- connexions en lecture seule (readonly=True) pour les chemins de lecture (load_context...) :
+  avec SQLITE_JOURNAL_MODE=WAL, le planificateur lit pendant que le watcher / update_database écrivent
+- iter_rows() : parcours en flux (fetchmany) au lieu de tout matérialiser avec fetchall()
+- lignes en tuples (défaut, aucune allocation par ligne) ou sqlite3.Row (accès par nom)
+
+Configuration (variables d'env) :
+    SQLITE_MMAP_SIZE=268435456        (octets, 0 pour désactiver)
+    SQLITE_BUSY_TIMEOUT_MS=5000
+    SQLITE_JOURNAL_MODE=WAL           (défaut: vide, mode du fichier inchangé)
+"""
+
+import os
+import sqlite3
+from typing import Any, Iterator, List, Optional, Sequence, Tuple
+
+STATEMENT_CACHE_SIZE = 256
+
+# Profil commun, appliqué dans cet ordre à chaque connexion
+DEFAULT_PRAGMAS: List[Tuple[str, Any]] = [
+    ("busy_timeout", int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))),  # en premier : couvre les suivants
+    ("temp_store", "MEMORY"),
+    ("mmap_size", int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))),
+    ("foreign_keys", "ON"),
+]
+
+# Mode de journal imposé aux connexions en écriture qui ne choisissent pas (wal=None)
+JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "").strip()
+
+# Ces PRAGMA écrivent dans le fichier : ignorés en lecture seule
+_WRITE_PRAGMAS = {"journal_mode"}
+
+# Fabriques de lignes
+TUPLE_ROWS = None
+NAMED_ROWS = sqlite3.Row
+
+
+def apply_pragmas(conn: sqlite3.Connection, pragmas: Sequence[Tuple[str, Any]], readonly: bool = False):
+    for name, value in pragmas:
+        if readonly and name in _WRITE_PRAGMAS:
+            continue
+        try:
+            row = conn.execute(f"PRAGMA {name} = {value}").fetchone()
+        except sqlite3.OperationalError as e:
+            if name not in _WRITE_PRAGMAS:
+                raise
+            # base verrouillée par un autre processus : on garde le mode courant
+            print(f"[WARN] PRAGMA {name} = {value} impossible ({e}).")
+            continue
+        if name == "journal_mode" and row and str(row[0]).upper() != str(value).upper():
+            print(f"[WARN] journal_mode={row[0]} ({value} indisponible pour cette base).")
+
+
+def connect(path: str, readonly: bool = False, row_factory=TUPLE_ROWS,
+            pragmas: Optional[Sequence[Tuple[str, Any]]] = None,
+            cached_statements: int = STATEMENT_CACHE_SIZE,
+            check_same_thread: bool = True, wal: Optional[bool] = None) -> sqlite3.Connection:
+    """
+    Ouvre `path` avec le profil du projet (plus `pragmas`, qui s'ajoutent ou remplacent).
+    readonly=True : ouverture file:...?mode=ro + query_only, aucune écriture possible.
+    wal=True : passe la base en WAL ; False : mode inchangé ; None : SQLITE_JOURNAL_MODE s'il est défini.
+    """
+    if readonly:
+        uri = "file:" + os.path.abspath(path).replace("?", "%3f").replace("#", "%23") + "?mode=ro"
+        conn = sqlite3.connect(uri, uri=True, cached_statements=cached_statements,
+                               check_same_thread=check_same_thread)
+    else:
+        conn = sqlite3.connect(path, cached_statements=cached_statements, check_same_thread=check_same_thread)
+    conn.row_factory = row_factory
+    profile = dict(DEFAULT_PRAGMAS)
+    if wal or (wal is None and JOURNAL_MODE):
+        profile["journal_mode"] = "WAL" if wal else JOURNAL_MODE
+        profile.setdefault("synchronous", "NORMAL")  # sûr en WAL, pas en journal de rollback
+    profile.update(dict(pragmas or ()))
+    apply_pragmas(conn, list(profile.items()), readonly)
+    if readonly:
+        conn.execute("PRAGMA query_only = ON")
+    return conn
+
+
+def iter_rows(conn: sqlite3.Connection, sql: str, params: Sequence[Any] = (),
+              batch_size: int = 1000) -> Iterator[Any]:
+    """Parcourt le résultat par paquets de `batch_size` lignes (mémoire bornée)."""
+    cur = conn.execute(sql, params)
+    try:
+        while True:
+            batch = cur.fetchmany(batch_size)
+            if not batch:
+                return
+            yield from batch
+    finally:
+        cur.close()
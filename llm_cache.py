@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+"""
+Cache persistant des réponses LLM (SQLite), partagé par Planificateur.py et WatchingScript.py.
+
+- Clé = SHA-256 du déploiement, du gabarit de prompt et de l'entrée (contenu adressable)
+- Expiration (TTL) et éviction LRU bornée en nombre d'entrées
+- Compteurs hit/miss (session et cumulés en base)
+- get() ne fait aucune écriture : last_access et compteurs sont regroupés en mémoire et écrits
+  en une transaction au prochain put(), stats(), flush() ou close() (ou tous les FLUSH_EVERY accès)
+
+Configuration (variables d'env) :
+    LLM_CACHE_ENABLED=true|false   (défaut: true)
+    LLM_CACHE_PATH=llm_cache.db
+    LLM_CACHE_TTL=2592000          (secondes, défaut: 30 jours)
+    LLM_CACHE_MAX_ENTRIES=5000
+"""
+
+import os
+import json
+import time
+import atexit
+import hashlib
+import threading
+from typing import Optional
+
+import db
+
+
+def cache_key(*parts) -> str:
+    """Hash stable des éléments (chaînes, octets ou objets JSON)."""
+    h = hashlib.sha256()
+    for p in parts:
+        if isinstance(p, bytes):
+            data = p
+        elif isinstance(p, str):
+            data = p.encode('utf-8')
+        else:
+            data = json.dumps(p, ensure_ascii=False, sort_keys=True).encode('utf-8')
+        h.update(len(data).to_bytes(8, 'big'))
+        h.update(data)
+    return h.hexdigest()
+
+
+class LLMCache:
+    """Cache clé -> réponse texte. Utilisable depuis plusieurs threads."""
+
+    FLUSH_EVERY = 256
+
+    def __init__(self, path: str = "llm_cache.db", ttl_seconds: float = 30 * 24 * 3600, max_entries: int = 5000):
+        self.path = path
+        self.ttl = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._touched = {}  # clé -> dernier accès, pas encore écrit
+        self._pending = {'hits': 0, 'misses': 0}
+        self._closed = False
+        self._conn = db.connect(path, check_same_thread=False, wal=True)
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS llm_cache (
+              key TEXT PRIMARY KEY,
+              value TEXT NOT NULL,
+              created_at REAL NOT NULL,
+              last_access REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_llm_cache_last_access ON llm_cache(last_access);
+            CREATE TABLE IF NOT EXISTS llm_cache_stats (
+              name TEXT PRIMARY KEY,
+              value INTEGER NOT NULL
+            );
+        """)
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT value, created_at FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            if row and now - row[1] <= self.ttl:
+                self._touched[key] = now
+                self.hits += 1
+                self._pending['hits'] += 1
+                value = row[0]
+            else:  # absente ou expirée (purgée au prochain put)
+                self.misses += 1
+                self._pending['misses'] += 1
+                value = None
+            if sum(self._pending.values()) >= self.FLUSH_EVERY:
+                self._flush()
+                self._conn.commit()
+            return value
+
+    def put(self, key: str, value: str):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO llm_cache (key, value, created_at, last_access) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value, created_at = excluded.created_at, "
+                "last_access = excluded.last_access",
+                (key, value, now, now))
+            self._flush()
+            self._conn.execute("DELETE FROM llm_cache WHERE created_at < ?", (now - self.ttl,))
+            # éviction LRU au-delà de max_entries
+            self._conn.execute("""
+                DELETE FROM llm_cache WHERE key IN (
+                  SELECT key FROM llm_cache ORDER BY last_access DESC LIMIT -1 OFFSET ?
+                )""", (self.max_entries,))
+            self._conn.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            self._flush()
+            self._conn.commit()
+            totals = dict(self._conn.execute("SELECT name, value FROM llm_cache_stats").fetchall())
+            entries = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+        return {'hits': self.hits, 'misses': self.misses, 'entries': entries,
+                'total_hits': totals.get('hits', 0), 'total_misses': totals.get('misses', 0)}
+
+    def flush(self):
+        """Écrit les accès et compteurs en attente (une transaction)."""
+        with self._lock:
+            if not self._closed:
+                self._flush()
+                self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            if not self._closed:
+                self._flush()
+                self._conn.commit()
+                self._conn.close()
+                self._closed = True
+
+    def _flush(self):
+        """À appeler sous self._lock ; le commit est laissé à l'appelant."""
+        if self._touched:
+            self._conn.executemany("UPDATE llm_cache SET last_access = ? WHERE key = ?",
+                                   [(t, k) for k, t in self._touched.items()])
+            self._touched.clear()
+        for name, n in self._pending.items():
+            if n:
+                self._conn.execute(
+                    "INSERT INTO llm_cache_stats (name, value) VALUES (?, ?) "
+                    "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value", (name, n))
+                self._pending[name] = 0
+
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+
+def get_default_cache() -> Optional[LLMCache]:
+    """Cache partagé du processus, configuré par l'environnement ; None si désactivé."""
+    global _default_cache
+    if str(os.getenv('LLM_CACHE_ENABLED', 'true')).lower() != 'true':
+        return None
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = LLMCache(
+                os.getenv('LLM_CACHE_PATH', 'llm_cache.db'),
+                ttl_seconds=float(os.getenv('LLM_CACHE_TTL', str(30 * 24 * 3600))),
+                max_entries=int(os.getenv('LLM_CACHE_MAX_ENTRIES', '5000')),
+            )
+            atexit.register(_default_cache.flush)
+        return _default_cache
@@ -110,6 +110,13 @@ CREATE INDEX IF NOT EXISTS idx_planning_employee_id ON planning(employee_id);
 CREATE INDEX IF NOT EXISTS idx_planning_task_id     ON planning(task_id);
 CREATE INDEX IF NOT EXISTS idx_absences_employee_id ON absences(employee_id);
 
+-- Fenêtre de planification (load_context / compute_free_intervals) :
+-- index couvrants, les requêtes sont servies sans lire les tables
+CREATE INDEX IF NOT EXISTS idx_planning_date_cover
+  ON planning(date, employee_id, start_time, end_time, task_id);
+CREATE INDEX IF NOT EXISTS idx_absences_approved
+  ON absences(end_date, start_date, employee_id, status) WHERE status = 'Approved';
+
 -- ========================================================
 -- VIEW: Employee Schedule Overview
 -- ========================================================
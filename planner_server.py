@@ -0,0 +1,414 @@
+# -*- coding: utf-8 -*-
+"""
+Démon du planificateur (python Planificateur.py serve) : API HTTP/JSON locale pour le front planning-local.
+
+- Contexte chaud : contexte compact et index des disponibilités (AvailabilityIndex : blocs libres par jour x
+  compétences) restent en mémoire ; plus de démarrage d'interpréteur, d'ensure_db ni de load_context par requête.
+- Rafraîchissement : PRAGMA data_version est interrogé toutes les --poll-interval secondes sur une connexion
+  en lecture seule ; à chaque écriture d'un autre processus (watcher, update_database, apply-plan...) les
+  nouvelles lignes de planning sont d'abord appliquées à l'index courant (sync_planning, immédiat), puis le
+  contexte est reconstruit dans un thread et substitué d'un bloc (mises à jour, suppressions, autres tables).
+  Même chose au changement de jour quand la fenêtre suit la date du jour.
+- Requêtes ponctuelles (disponibilités, santé, petites validations) servies directement par la boucle asyncio ;
+  generate et les grosses validations partent dans un pool de processus (chaque worker garde son propre
+  contexte chaud, rechargé sur data_version).
+
+Routes (JSON, CORS pour le front) :
+    GET  /api/health
+    GET  /api/availability?date=YYYY-MM-DD&skills=1,2&min_hours=3     (ou task_id=12 à la place de skills)
+    GET  /api/availability?task_id=12&hours=2                           (premier bloc libre avant la deadline)
+    POST /api/generate   {"from": "...", "to": "...", "engine": "greedy"|"flow", "time_limit": 60}
+    POST /api/validate   {"plan": [...], "from": "...", "to": "..."}
+    POST /api/refresh
+"""
+
+import json
+import asyncio
+import threading
+from time import perf_counter
+from datetime import date, datetime, timedelta
+from urllib.parse import urlsplit, parse_qs
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List
+
+import db
+import Planificateur as P
+
+DEFAULT_CORS_ORIGINS = ["http://localhost:3000", "http://192.168.1.20:3000"]  # comme serveur.ts
+MAX_BODY_BYTES = 50 * 1024 * 1024
+# Au-delà, la validation part dans le pool de processus au lieu de bloquer la boucle
+INLINE_VALIDATE_ROWS = 500
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def parse_day(value: str, name: str) -> date:
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except (TypeError, ValueError):
+        raise HTTPError(400, f"'{name}' attendu au format YYYY-MM-DD (reçu {value!r}).")
+
+
+def parse_time_limit(value) -> float:
+    try:
+        limit = float(value)
+    except (TypeError, ValueError):
+        limit = float('nan')
+    if not 0 < limit < float('inf'):
+        raise HTTPError(400, f"'time_limit' : nombre de secondes positif attendu (reçu {value!r}).")
+    return limit
+
+
+def parse_hours(value, name: str) -> float:
+    try:
+        hours = float(value)
+    except (TypeError, ValueError):
+        hours = float('nan')
+    if not 0 <= hours < float('inf'):
+        raise HTTPError(400, f"'{name}' : nombre d'heures positif ou nul attendu (reçu {value!r}).")
+    return hours
+
+
+def parse_content_length(value: str) -> int:
+    """Content-Length décimal (absent = 0) ; -1 si invalide (signe, espaces internes, '1_0'...)."""
+    value = (value or '0').strip()
+    return int(value) if value.isascii() and value.isdigit() else -1
+
+
+# --- 1. CONTEXTE CHAUD ---
+class WarmSnapshot:
+    """
+    Contexte d'une version de la base, remplacé d'un bloc à chaque rechargement ; seul l'index des
+    disponibilités évolue entre deux rechargements (lignes de planning ajoutées, depuis la boucle asyncio).
+    """
+
+    __slots__ = ('context', 'index', 'data_version', 'loaded_at', 'load_s')
+
+    def __init__(self, index: P.AvailabilityIndex, data_version: int, load_s: float):
+        self.index = index
+        self.context = context = index.context
+        # matérialisé ici (thread de chargement) plutôt qu'à la première requête
+        context['tasks'], context['absences']
+        self.data_version = data_version
+        self.loaded_at = datetime.now().isoformat(timespec='seconds')
+        self.load_s = load_s
+
+
+class WarmContext:
+    """
+    Contexte chaud de la fenêtre [from_date, from_date + weeks] (from_date None : aujourd'hui, glissant).
+    current : dernier WarmSnapshot ; stale() détecte les écritures (data_version) et le changement de jour.
+    """
+
+    def __init__(self, db_path: str, from_date: date = None, weeks: int = 4, to_date: date = None):
+        self.db_path = db_path
+        self.fixed_from = from_date
+        self.fixed_to = to_date
+        self.weeks = weeks
+        self.current = None
+        self._lock = threading.Lock()
+        self._conn = db.connect(db_path, readonly=True, check_same_thread=False)
+
+    def window(self):
+        start = self.fixed_from or date.today()
+        return start, self.fixed_to or start + timedelta(weeks=self.weeks)
+
+    def data_version(self) -> int:
+        with self._lock:
+            return self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def stale(self) -> bool:
+        snap = self.current
+        if snap is None:
+            return True
+        tw = snap.context['time_window']
+        return self.data_version() != snap.data_version or tw['from'] != P.dstr(self.window()[0])
+
+    def reload(self) -> WarmSnapshot:
+        version = self.data_version()  # lu AVANT le chargement : une écriture pendant le chargement relance
+        from_date, to_date = self.window()
+        t0 = perf_counter()
+        conn = db.connect(self.db_path, readonly=True)
+        try:
+            index = P.load_availability_index(conn, from_date, to_date)
+        finally:
+            conn.close()
+        snap = WarmSnapshot(index, version, perf_counter() - t0)
+        context = snap.context
+        self.current = snap
+        print(f"[OK] Contexte chargé ({P.dstr(from_date)}..{P.dstr(to_date)}, {len(context.emp_ids)} employés, "
+              f"{len(context.task_ids)} tâches) en {snap.load_s:.3f} s, data_version={version}.")
+        return snap
+
+    def sync_planning(self) -> int:
+        """Lignes de planning ajoutées depuis le chargement appliquées à l'index courant (connexion de veille)."""
+        with self._lock:
+            return self.current.index.sync_planning(self._conn)
+
+    def close(self):
+        self._conn.close()
+
+
+# --- 2. TRAVAUX DU POOL DE PROCESSUS ---
+_worker_contexts = {}
+
+
+def _worker_context(db_path: str, from_s: str, to_s: str) -> P.CompactContext:
+    """Contexte chaud propre au worker, rechargé quand data_version change (une connexion par base)."""
+    entry = _worker_contexts.get(db_path)
+    if entry is None:
+        entry = _worker_contexts[db_path] = {'conn': db.connect(db_path, readonly=True), 'contexts': {}}
+    version = entry['conn'].execute("PRAGMA data_version").fetchone()[0]
+    key = (from_s, to_s)
+    cached = entry['contexts'].get(key)
+    if cached is None or cached[0] != version:
+        context = P.load_compact_context(entry['conn'], datetime.strptime(from_s, "%Y-%m-%d").date(),
+                                         datetime.strptime(to_s, "%Y-%m-%d").date())
+        entry['contexts'] = {key: (version, context)}  # une seule fenêtre gardée par worker
+        cached = entry['contexts'][key]
+    return cached[1]
+
+
+def solve_job(db_path: str, from_s: str, to_s: str, engine: str, time_limit: float) -> Dict[str, Any]:
+    t0 = perf_counter()
+    context = _worker_context(db_path, from_s, to_s)
+    result = P.local_plan(context, engine, time_limit)
+    report = P.validate_plan(context, result)
+    return {'plan': result['plan'], 'notes': result['notes'], 'report': report,
+            'solve_s': round(perf_counter() - t0, 4)}
+
+
+def validate_job(db_path: str, from_s: str, to_s: str, plan: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return P.validate_plan(_worker_context(db_path, from_s, to_s), {'plan': plan})
+
+
+# --- 3. REQUÊTES ---
+class PlannerServer:
+    def __init__(self, warm: WarmContext, workers: int = 2, poll_interval: float = 1.0,
+                 cors_origins: List[str] = None):
+        self.warm = warm
+        self.pool = ProcessPoolExecutor(max_workers=max(1, workers))
+        self.workers = max(1, workers)
+        self.poll_interval = poll_interval
+        self.cors_origins = set(cors_origins or DEFAULT_CORS_ORIGINS)
+        self._reloading = None
+        self.requests = 0
+
+    # --- rafraîchissement ---
+    async def refresh(self, force: bool = False):
+        if self._reloading is not None:
+            return await self._reloading
+        if not force and not self.warm.stale():
+            return self.warm.current
+        if not force and self.warm.current is not None:
+            self.warm.sync_planning()  # nouvelles lignes visibles tout de suite, avant la reconstruction
+        loop = asyncio.get_running_loop()
+        self._reloading = loop.run_in_executor(None, self.warm.reload)
+        try:
+            return await self._reloading
+        finally:
+            self._reloading = None
+
+    async def poll(self):
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                await self.refresh()
+            except Exception as e:  # base momentanément illisible : on garde le contexte courant
+                print(f"[WARN] Rafraîchissement du contexte impossible: {e}")
+
+    # --- routes ---
+    async def route(self, method: str, target: str, body: bytes):
+        url = urlsplit(target)
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        payload = {}
+        if body:
+            try:
+                payload = json.loads(body.decode('utf-8'))
+            except ValueError:
+                raise HTTPError(400, "Corps JSON invalide.")
+            if not isinstance(payload, dict):
+                raise HTTPError(400, "Corps JSON : objet attendu.")
+        handler = {
+            ('GET', '/api/health'): self.health,
+            ('GET', '/api/availability'): self.availability,
+            ('POST', '/api/generate'): self.generate,
+            ('POST', '/api/validate'): self.validate,
+            ('POST', '/api/refresh'): self.force_refresh,
+        }.get((method, url.path.rstrip('/') or '/'))
+        if handler is None:
+            raise HTTPError(404, f"Route inconnue : {method} {url.path}")
+        return await handler(query, payload)
+
+    async def health(self, query, payload):
+        snap = self.warm.current
+        return {'status': 'ok', 'data_version': snap.data_version, 'loaded_at': snap.loaded_at,
+                'load_s': round(snap.load_s, 4), 'time_window': snap.context['time_window'],
+                'employees': len(snap.context.emp_ids), 'tasks': len(snap.context.task_ids),
+                'workers': self.workers, 'requests': self.requests}
+
+    async def availability(self, query, payload):
+        """
+        ?date=...&skills=1,2&min_hours=3 : employés compétents libres ce jour-là (bloc contigu >= min_hours) ;
+        ?task_id=12&date=... : idem avec les compétences de la tâche ;
+        ?task_id=12&hours=2[&after=...&before=...] : premier bloc libre pour la tâche (avant sa deadline).
+        """
+        snap = self.warm.current
+        index = snap.index
+        try:
+            task_id = int(query['task_id']) if 'task_id' in query else None
+            skills = [int(x) for x in query.get('skills', '').split(',') if x.strip()]
+        except ValueError:
+            raise HTTPError(400, "'task_id' et 'skills' (ids séparés par des virgules) : nombres entiers.")
+        hours_param = 'hours' if 'date' not in query else 'min_hours'
+        hours = parse_hours(query.get(hours_param, 0), hours_param)
+        if task_id is not None and task_id not in index.task_pos:
+            raise HTTPError(404, f"Tâche {task_id} introuvable (ou terminée).")
+        for name in ('date', 'after', 'before'):
+            if name in query:
+                parse_day(query[name], name)
+        try:
+            if 'date' in query:
+                if task_id is not None:
+                    skills = snap.context.skills_of(snap.context.task_skills[index.task_pos[task_id]])
+                employees = index.free_employees(query['date'], skills, int(round(hours * 60)))
+                result = {'date': query['date'], 'required_skills': skills, 'count': len(employees),
+                          'employees': employees}
+            elif task_id is not None:
+                result = {'block': index.first_free_block(task_id, int(round((hours or 2.0) * 60)),
+                                                          query.get('after'), query.get('before'))}
+            else:
+                raise HTTPError(400, "Paramètre 'date' ou 'task_id' requis.")
+        except ValueError as e:  # date hors de la fenêtre chargée
+            raise HTTPError(400, str(e))
+        result['data_version'] = snap.data_version
+        return result
+
+    def _window(self, payload):
+        tw = self.warm.current.context['time_window']
+        from_s = payload.get('from') or tw['from']
+        to_s = payload.get('to') or tw['to']
+        if parse_day(from_s, 'from') > parse_day(to_s, 'to'):
+            raise HTTPError(400, "'from' doit précéder 'to'.")
+        return from_s, to_s
+
+    async def generate(self, query, payload):
+        engine = payload.get('engine', 'greedy')
+        if engine not in ('greedy', 'flow'):
+            raise HTTPError(400, "'engine' : greedy ou flow.")
+        time_limit = parse_time_limit(payload.get('time_limit', 60.0))
+        from_s, to_s = self._window(payload)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.pool, solve_job, self.warm.db_path, from_s, to_s, engine,
+                                          time_limit)
+
+    async def validate(self, query, payload):
+        plan = payload.get('plan')
+        if not isinstance(plan, list):
+            raise HTTPError(400, "'plan' : liste d'affectations attendue.")
+        from_s, to_s = self._window(payload)
+        snap = self.warm.current
+        tw = snap.context['time_window']
+        if len(plan) <= INLINE_VALIDATE_ROWS and (from_s, to_s) == (tw['from'], tw['to']):
+            try:
+                return P.validate_plan(snap.context, {'plan': plan})
+            except (KeyError, TypeError, ValueError) as e:
+                raise HTTPError(400, f"Affectation invalide : {e!r}")
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.pool, validate_job, self.warm.db_path, from_s, to_s, plan)
+
+    async def force_refresh(self, query, payload):
+        snap = await self.refresh(force=True)
+        return {'status': 'ok', 'data_version': snap.data_version, 'load_s': round(snap.load_s, 4)}
+
+    # --- HTTP/1.1 minimal (keep-alive, Content-Length) ---
+    def _headers(self, status: int, length: int, origin: str, elapsed_ms: float, keep_alive: bool) -> bytes:
+        reason = {200: 'OK', 204: 'No Content', 400: 'Bad Request', 404: 'Not Found',
+                  413: 'Payload Too Large', 500: 'Internal Server Error'}.get(status, 'OK')
+        lines = [f"HTTP/1.1 {status} {reason}",
+                 "Content-Type: application/json; charset=utf-8",
+                 f"Content-Length: {length}",
+                 f"Server-Timing: app;dur={elapsed_ms:.2f}",
+                 f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+        if origin and ('*' in self.cors_origins or origin in self.cors_origins):
+            lines += [f"Access-Control-Allow-Origin: {origin}", "Access-Control-Allow-Credentials: true",
+                      "Access-Control-Allow-Headers: Content-Type", "Access-Control-Allow-Methods: GET, POST, OPTIONS",
+                      "Vary: Origin"]
+        return ("\r\n".join(lines) + "\r\n\r\n").encode('latin-1')
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                parts = line.decode('latin-1').split()
+                if len(parts) != 3:
+                    break
+                method, target, version = parts
+                headers = {}
+                while True:
+                    h = await reader.readline()
+                    if h in (b'\r\n', b'\n', b''):
+                        break
+                    k, _, v = h.decode('latin-1').partition(':')
+                    headers[k.strip().lower()] = v.strip()
+                keep_alive = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+                t0 = perf_counter()
+                length = parse_content_length(headers.get('content-length'))
+                if length < 0:  # corps impossible à délimiter : on ferme après la réponse
+                    status, out, keep_alive = 400, {'error': "En-tête Content-Length invalide."}, False
+                elif length > MAX_BODY_BYTES:
+                    status, out, keep_alive = 413, {'error': "Corps de requête trop volumineux."}, False
+                else:
+                    body = await reader.readexactly(length) if length else b''
+                    self.requests += 1
+                    if method == 'OPTIONS':
+                        status, out = 204, None
+                    else:
+                        try:
+                            status, out = 200, await self.route(method, target, body)
+                        except HTTPError as e:
+                            status, out = e.status, {'error': str(e)}
+                        except Exception as e:
+                            print(f"[ERREUR] {method} {target}: {e!r}")
+                            status, out = 500, {'error': f"Erreur interne : {e}"}
+                data = b'' if out is None else json.dumps(out, ensure_ascii=False).encode('utf-8')
+                writer.write(self._headers(status, len(data), headers.get('origin'),
+                                           (perf_counter() - t0) * 1000, keep_alive) + data)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def run(self, host: str, port: int):
+        await self.refresh(force=True)
+        server = await asyncio.start_server(self.handle, host, port)
+        poller = asyncio.create_task(self.poll())
+        print(f"[OK] Planificateur en écoute sur http://{host}:{port} "
+              f"({self.workers} worker(s), rafraîchissement toutes les {self.poll_interval} s).")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            poller.cancel()
+            self.pool.shutdown(cancel_futures=True)
+            self.warm.close()
+
+
+def serve(db_path: str, host: str = '127.0.0.1', port: int = 5000, from_date: date = None, to_date: date = None,
+          weeks: int = 4, workers: int = 2, poll_interval: float = 1.0, cors_origins: List[str] = None) -> int:
+    warm = WarmContext(db_path, from_date, weeks, to_date)
+    server = PlannerServer(warm, workers, poll_interval, cors_origins)
+    try:
+        asyncio.run(server.run(host, port))
+    except KeyboardInterrupt:
+        print("\n[OK] Arrêt du planificateur.")
+    return 0
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+"""Bases SQLite de test construites depuis main.sql + un jeu de données de tests/data."""
+
+import os
+import sys
+from datetime import date
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+sys.path.insert(0, ROOT)
+
+import db  # noqa: E402
+import Planificateur as P  # noqa: E402
+
+# Fenêtres de planification des jeux de données
+TINY_WINDOW = (date(2025, 1, 6), date(2025, 1, 12))
+SMALL_WINDOW = (date(2025, 1, 6), date(2025, 1, 19))
+
+
+def data_path(name: str) -> str:
+    return os.path.join(DATA, name)
+
+
+def build_db(path: str, seed_sql: str) -> str:
+    conn = db.connect(path)
+    try:
+        P.ensure_db(conn, os.path.join(ROOT, 'main.sql'), data_path(seed_sql))
+    finally:
+        conn.close()
+    return path
+
+
+def read_context(path: str, window):
+    conn = db.connect(path, readonly=True)
+    try:
+        return P.load_compact_context(conn, *window)
+    finally:
+        conn.close()
+
+
+@pytest.fixture
+def tiny_db(tmp_path):
+    return build_db(str(tmp_path / 'tiny.db'), 'tiny_planning.sql')
+
+
+@pytest.fixture
+def small_db(tmp_path):
+    return build_db(str(tmp_path / 'small.db'), 'small_workload.sql')
+
+
+@pytest.fixture
+def tiny_context(tiny_db):
+    return read_context(tiny_db, TINY_WINDOW)
+
+
+@pytest.fixture
+def small_context(small_db):
+    return read_context(small_db, SMALL_WINDOW)
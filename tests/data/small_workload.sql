@@ -0,0 +1,411 @@
+-- Charge synthétique (bench_planner.generate_workload : 20 employés, 60 tâches, 2 semaines depuis 2025-01-06,
+-- graine 7, 8 compétences), figée en SQL pour les tests.
+INSERT INTO "skills" VALUES(1,'Compétence 1');
+INSERT INTO "skills" VALUES(2,'Compétence 2');
+INSERT INTO "skills" VALUES(3,'Compétence 3');
+INSERT INTO "skills" VALUES(4,'Compétence 4');
+INSERT INTO "skills" VALUES(5,'Compétence 5');
+INSERT INTO "skills" VALUES(6,'Compétence 6');
+INSERT INTO "skills" VALUES(7,'Compétence 7');
+INSERT INTO "skills" VALUES(8,'Compétence 8');
+INSERT INTO "employees" VALUES(1,'Prenom1','Nom1','Intern',30,0,NULL,NULL);
+INSERT INTO "employees" VALUES(2,'Prenom2','Nom2','Full-time',35,0,NULL,NULL);
+INSERT INTO "employees" VALUES(3,'Prenom3','Nom3','Part-time',20,1,NULL,NULL);
+INSERT INTO "employees" VALUES(4,'Prenom4','Nom4','Full-time',35,0,NULL,NULL);
+INSERT INTO "employees" VALUES(5,'Prenom5','Nom5','Intern',30,0,NULL,NULL);
+INSERT INTO "employees" VALUES(6,'Prenom6','Nom6','Full-time',35,0,NULL,NULL);
+INSERT INTO "employees" VALUES(7,'Prenom7','Nom7','Part-time',20,1,NULL,NULL);
+INSERT INTO "employees" VALUES(8,'Prenom8','Nom8','Full-time',35,1,NULL,NULL);
+INSERT INTO "employees" VALUES(9,'Prenom9','Nom9','Full-time',35,0,NULL,NULL);
+INSERT INTO "employees" VALUES(10,'Prenom10','Nom10','Intern',30,0,NULL,NULL);
+INSERT INTO "employees" VALUES(11,'Prenom11','Nom11','Full-time',35,0,NULL,NULL);
+INSERT INTO "employees" VALUES(12,'Prenom12','Nom12','Contractor',40,1,NULL,NULL);
+INSERT INTO "employees" VALUES(13,'Prenom13','Nom13','Part-time',20,0,NULL,NULL);
+INSERT INTO "employees" VALUES(14,'Prenom14','Nom14','Contractor',40,1,NULL,NULL);
+INSERT INTO "employees" VALUES(15,'Prenom15','Nom15','Contractor',40,0,NULL,NULL);
+INSERT INTO "employees" VALUES(16,'Prenom16','Nom16','Part-time',20,1,NULL,NULL);
+INSERT INTO "employees" VALUES(17,'Prenom17','Nom17','Full-time',35,0,NULL,NULL);
+INSERT INTO "employees" VALUES(18,'Prenom18','Nom18','Part-time',20,0,NULL,NULL);
+INSERT INTO "employees" VALUES(19,'Prenom19','Nom19','Part-time',20,0,NULL,NULL);
+INSERT INTO "employees" VALUES(20,'Prenom20','Nom20','Contractor',40,0,NULL,NULL);
+INSERT INTO "employee_skills" VALUES(1,1);
+INSERT INTO "employee_skills" VALUES(1,6);
+INSERT INTO "employee_skills" VALUES(2,1);
+INSERT INTO "employee_skills" VALUES(3,5);
+INSERT INTO "employee_skills" VALUES(3,1);
+INSERT INTO "employee_skills" VALUES(4,8);
+INSERT INTO "employee_skills" VALUES(4,1);
+INSERT INTO "employee_skills" VALUES(5,1);
+INSERT INTO "employee_skills" VALUES(5,4);
+INSERT INTO "employee_skills" VALUES(5,2);
+INSERT INTO "employee_skills" VALUES(5,3);
+INSERT INTO "employee_skills" VALUES(6,2);
+INSERT INTO "employee_skills" VALUES(6,5);
+INSERT INTO "employee_skills" VALUES(6,1);
+INSERT INTO "employee_skills" VALUES(7,2);
+INSERT INTO "employee_skills" VALUES(7,1);
+INSERT INTO "employee_skills" VALUES(8,4);
+INSERT INTO "employee_skills" VALUES(8,1);
+INSERT INTO "employee_skills" VALUES(9,3);
+INSERT INTO "employee_skills" VALUES(10,2);
+INSERT INTO "employee_skills" VALUES(10,5);
+INSERT INTO "employee_skills" VALUES(11,3);
+INSERT INTO "employee_skills" VALUES(11,1);
+INSERT INTO "employee_skills" VALUES(12,3);
+INSERT INTO "employee_skills" VALUES(12,1);
+INSERT INTO "employee_skills" VALUES(13,1);
+INSERT INTO "employee_skills" VALUES(13,2);
+INSERT INTO "employee_skills" VALUES(13,6);
+INSERT INTO "employee_skills" VALUES(14,2);
+INSERT INTO "employee_skills" VALUES(14,7);
+INSERT INTO "employee_skills" VALUES(15,1);
+INSERT INTO "employee_skills" VALUES(16,1);
+INSERT INTO "employee_skills" VALUES(16,2);
+INSERT INTO "employee_skills" VALUES(16,3);
+INSERT INTO "employee_skills" VALUES(16,6);
+INSERT INTO "employee_skills" VALUES(16,5);
+INSERT INTO "employee_skills" VALUES(16,4);
+INSERT INTO "employee_skills" VALUES(17,7);
+INSERT INTO "employee_skills" VALUES(17,3);
+INSERT INTO "employee_skills" VALUES(17,2);
+INSERT INTO "employee_skills" VALUES(17,1);
+INSERT INTO "employee_skills" VALUES(17,5);
+INSERT INTO "employee_skills" VALUES(17,6);
+INSERT INTO "employee_skills" VALUES(17,4);
+INSERT INTO "employee_skills" VALUES(18,3);
+INSERT INTO "employee_skills" VALUES(19,3);
+INSERT INTO "employee_skills" VALUES(19,1);
+INSERT INTO "employee_skills" VALUES(19,2);
+INSERT INTO "employee_skills" VALUES(19,5);
+INSERT INTO "employee_skills" VALUES(19,7);
+INSERT INTO "employee_skills" VALUES(19,8);
+INSERT INTO "employee_skills" VALUES(19,6);
+INSERT INTO "employee_skills" VALUES(19,4);
+INSERT INTO "employee_skills" VALUES(20,2);
+INSERT INTO "employee_skills" VALUES(20,1);
+INSERT INTO "employee_availability" VALUES(1,'Mon','09:00','17:00');
+INSERT INTO "employee_availability" VALUES(1,'Tue','09:00','17:00');
+INSERT INTO "employee_availability" VALUES(1,'Wed','09:00','17:00');
+INSERT INTO "employee_availability" VALUES(1,'Thu','09:00','17:00');
+INSERT INTO "employee_availability" VALUES(1,'Fri','09:00','17:00');
+INSERT INTO "employee_availability" VALUES(2,'Mon','08:00','12:00');
+INSERT INTO "employee_availability" VALUES(2,'Mon','13:00','17:00');
+INSERT INTO "employee_availability" VALUES(2,'Tue','08:00','12:00');
+INSERT INTO "employee_availability" VALUES(2,'Tue','13:00','17:00');
+INSERT INTO "employee_availability" VALUES(2,'Wed','08:00','12:00');
+INSERT INTO "employee_availability" VALUES(2,'Wed','13:00','17:00');
+INSERT INTO "employee_availability" VALUES(2,'Thu','08:00','12:00');
+INSERT INTO "employee_availability" VALUES(2,'Thu','13:00','17:00');
+INSERT INTO "employee_availability" VALUES(2,'Fri','08:00','12:00');
+INSERT INTO "employee_availability" VALUES(2,'Fri','13:00','17:00');
+INSERT INTO "employee_availability" VALUES(3,'Mon','09:00','17:00');
+INSERT INTO "employee_availability" VALUES(3,'Tue','09:00','17:00');
+INSERT INTO "employee_availability" VALUES(3,'Wed','09:00','17:00');
+INSERT INTO "employee_availability" VALUES(3,'Thu','09:00','17:00');
+INSERT INTO "employee_availability" VALUES(3,'Fri','09:00','17:00');
+INSERT INTO "employee_availability" VALUES(4,'Mon','06:00','14:00');
+INSERT INTO "employee_availability" VALUES(4,'Tue','06:00','14:00');
+INSERT INTO "employee_availability" VALUES(4,'Wed','06:00','14:00');
+INSERT INTO "employee_availability" VALUES(4,'Thu','06:00','14:00');
+INSERT INTO "employee_availability" VALUES(4,'Sun','06:00','14:00');
+INSERT INTO "employee_availability" VALUES(5,'Mon','09:00','13:00');
+INSERT INTO "employee_availability" VALUES(5,'Tue','09:00','13:00');
+INSERT INTO "employee_availability" VALUES(5,'Thu','09:00','13:00');
+INSERT INTO "employee_availability" VALUES(6,'Tue','14:00','22:00');
+INSERT INTO "employee_availability" VALUES(6,'Wed','14:00','22:00');
+INSERT INTO "employee_availability" VALUES(6,'Fri','14:00','22:00');
+INSERT INTO "employee_availability" VALUES(6,'Sat','14:00','22:00');
+INSERT INTO "employee_availability" VALUES(6,'Sun','14:00','22:00');
+INSERT INTO "employee_availability" VALUES(7,'Mon','08:00','12:00');
+INSERT INTO "employee_availability" VALUES(7,'Mon','13:00','17:00');
+INSERT INTO "employee_availability" VALUES(7,'Tue','08:00','12:00');
+INSERT INTO "employee_availability" VALUES(7,'Tue','13:00','17:00');
+INSERT INTO "employee_availability" VALUES(7,'Wed','08:00','12:00');
+INSERT INTO "employee_availability" VALUES(7,'Wed','13:00','17:00');
+INSERT INTO "employee_availability" VALUES(7,'Thu','08:00','12:00');
+INSERT INTO "employee_availability" VALUES(7,'Thu','13:00','17:00');
+INSERT INTO "employee_availability" VALUES(7,'Fri','08:00','12:00');
+INSERT INTO "employee_availability" VALUES(7,'Fri','13:00','17:00');
+INSERT INTO "employee_availability" VALUES(8,'Mon','08:00','12:00');
+INSERT INTO "employee_availability" VALUES(8,'Mon','13:00','17:00');
+INSERT INTO "employee_availability" VALUES(8,'Tue','08:00','12:00');
+INSERT INTO "employee_availability" VALUES(8,'Tue','13:00','17:00');
+INSERT INTO "employee_availability" VALUES(8,'Wed','08:00','12:00');
+INSERT INTO "employee_availability" VALUES(8,'Wed','13:00','17:00');
+INSERT INTO "employee_availability" VALUES(8,'Thu','08:00','12:00');
+INSERT INTO "employee_availability" VALUES(8,'Thu','13:00','17:00');
+INSERT INTO "employee_availability" VALUES(8,'Fri','08:00','12:00');
+INSERT INTO "employee_availability" VALUES(8,'Fri','13:00','17:00');
+INSERT INTO "employee_availability" VALUES(9,'Mon','09:00','13:00');
+INSERT INTO "employee_availability" VALUES(9,'Tue','09:00','13:00');
+INSERT INTO "employee_availability" VALUES(9,'Thu','09:00','13:00');
+INSERT INTO "employee_availability" VALUES(10,'Mon','09:00','17:00');
+INSERT INTO "employee_availability" VALUES(10,'Tue','09:00','17:00');
+INSERT INTO "employee_availability" VALUES(10,'Wed','09:00','17:00');
+INSERT INTO "employee_availability" VALUES(10,'Thu','09:00','17:00');
+INSERT INTO "employee_availability" VALUES(10,'Fri','09:00','17:00');
+INSERT INTO "employee_availability" VALUES(11,'Mon','09:00','13:00');
+INSERT INTO "employee_availability" VALUES(11,'Tue','09:00','13:00');
+INSERT INTO "employee_availability" VALUES(11,'Thu','09:00','13:00');
+INSERT INTO "employee_availability" VALUES(12,'Mon','08:00','12:00');
+INSERT INTO "employee_availability" VALUES(12,'Mon','13:00','17:00');
+INSERT INTO "employee_availability" VALUES(12,'Tue','08:00','12:00');
+INSERT INTO "employee_availability" VALUES(12,'Tue','13:00','17:00');
+INSERT INTO "employee_availability" VALUES(12,'Wed','08:00','12:00');
+INSERT INTO "employee_availability" VALUES(12,'Wed','13:00','17:00');
+INSERT INTO "employee_availability" VALUES(12,'Thu','08:00','12:00');
+INSERT INTO "employee_availability" VALUES(12,'Thu','13:00','17:00');
+INSERT INTO "employee_availability" VALUES(12,'Fri','08:00','12:00');
+INSERT INTO "employee_availability" VALUES(12,'Fri','13:00','17:00');
+INSERT INTO "employee_availability" VALUES(13,'Mon','09:00','17:00');
+INSERT INTO "employee_availability" VALUES(13,'Tue','09:00','17:00');
+INSERT INTO "employee_availability" VALUES(13,'Wed','09:00','17:00');
+INSERT INTO "employee_availability" VALUES(13,'Thu','09:00','17:00');
+INSERT INTO "employee_availability" VALUES(13,'Fri','09:00','17:00');
+INSERT INTO "employee_availability" VALUES(14,'Tue','06:00','14:00');
+INSERT INTO "employee_availability" VALUES(14,'Wed','06:00','14:00');
+INSERT INTO "employee_availability" VALUES(14,'Thu','06:00','14:00');
+INSERT INTO "employee_availability" VALUES(14,'Fri','06:00','14:00');
+INSERT INTO "employee_availability" VALUES(14,'Sun','06:00','14:00');
+INSERT INTO "employee_availability" VALUES(15,'Mon','09:00','17:00');
+INSERT INTO "employee_availability" VALUES(15,'Tue','09:00','17:00');
+INSERT INTO "employee_availability" VALUES(15,'Wed','09:00','17:00');
+INSERT INTO "employee_availability" VALUES(15,'Thu','09:00','17:00');
+INSERT INTO "employee_availability" VALUES(15,'Fri','09:00','17:00');
+INSERT INTO "employee_availability" VALUES(16,'Mon','09:00','17:00');
+INSERT INTO "employee_availability" VALUES(16,'Tue','09:00','17:00');
+INSERT INTO "employee_availability" VALUES(16,'Wed','09:00','17:00');
+INSERT INTO "employee_availability" VALUES(16,'Thu','09:00','17:00');
+INSERT INTO "employee_availability" VALUES(16,'Fri','09:00','17:00');
+INSERT INTO "employee_availability" VALUES(17,'Mon','09:00','17:00');
+INSERT INTO "employee_availability" VALUES(17,'Tue','09:00','17:00');
+INSERT INTO "employee_availability" VALUES(17,'Wed','09:00','17:00');
+INSERT INTO "employee_availability" VALUES(17,'Thu','09:00','17:00');
+INSERT INTO "employee_availability" VALUES(17,'Fri','09:00','17:00');
+INSERT INTO "employee_availability" VALUES(18,'Mon','09:00','17:00');
+INSERT INTO "employee_availability" VALUES(18,'Tue','09:00','17:00');
+INSERT INTO "employee_availability" VALUES(18,'Wed','09:00','17:00');
+INSERT INTO "employee_availability" VALUES(18,'Thu','09:00','17:00');
+INSERT INTO "employee_availability" VALUES(18,'Fri','09:00','17:00');
+INSERT INTO "employee_availability" VALUES(19,'Mon','09:00','17:00');
+INSERT INTO "employee_availability" VALUES(19,'Tue','09:00','17:00');
+INSERT INTO "employee_availability" VALUES(19,'Wed','09:00','17:00');
+INSERT INTO "employee_availability" VALUES(19,'Thu','09:00','17:00');
+INSERT INTO "employee_availability" VALUES(19,'Fri','09:00','17:00');
+INSERT INTO "employee_availability" VALUES(20,'Mon','09:00','17:00');
+INSERT INTO "employee_availability" VALUES(20,'Tue','09:00','17:00');
+INSERT INTO "employee_availability" VALUES(20,'Wed','09:00','17:00');
+INSERT INTO "employee_availability" VALUES(20,'Thu','09:00','17:00');
+INSERT INTO "employee_availability" VALUES(20,'Fri','09:00','17:00');
+INSERT INTO "tasks" VALUES(1,'Tâche 1',NULL,12,'2025-01-06','Low',NULL,'Pending','Site 1',NULL);
+INSERT INTO "tasks" VALUES(2,'Tâche 2',NULL,11,'2025-01-17','High',NULL,'In progress','Site 2',NULL);
+INSERT INTO "tasks" VALUES(3,'Tâche 3',NULL,1,'2025-01-21','Critical',NULL,'Pending','Site 4',NULL);
+INSERT INTO "tasks" VALUES(4,'Tâche 4',NULL,12,'2025-01-17','Low',16,'Completed','Site 2',NULL);
+INSERT INTO "tasks" VALUES(5,'Tâche 5',NULL,3,'2025-01-26','High',13,'Pending','Site 2',NULL);
+INSERT INTO "tasks" VALUES(6,'Tâche 6',NULL,13,NULL,'Medium',NULL,'Completed','Site 1',NULL);
+INSERT INTO "tasks" VALUES(7,'Tâche 7',NULL,5,'2025-01-20','High',NULL,'In progress','Site 4',NULL);
+INSERT INTO "tasks" VALUES(8,'Tâche 8',NULL,4,NULL,'Medium',NULL,'In progress','Site 4',NULL);
+INSERT INTO "tasks" VALUES(9,'Tâche 9',NULL,8,NULL,'High',NULL,'Pending','Site 5',NULL);
+INSERT INTO "tasks" VALUES(10,'Tâche 10',NULL,14,'2025-01-24','High',NULL,'In progress','Site 2',NULL);
+INSERT INTO "tasks" VALUES(11,'Tâche 11',NULL,5,'2025-01-25','Low',NULL,'Pending','Site 1',NULL);
+INSERT INTO "tasks" VALUES(12,'Tâche 12',NULL,2,'2025-01-09','Medium',NULL,'In progress','Site 1',NULL);
+INSERT INTO "tasks" VALUES(13,'Tâche 13',NULL,7,'2025-01-22','High',NULL,'Pending','Site 5',NULL);
+INSERT INTO "tasks" VALUES(14,'Tâche 14',NULL,5,'2025-01-12','Medium',NULL,'In progress','Site 3',NULL);
+INSERT INTO "tasks" VALUES(15,'Tâche 15',NULL,4,NULL,'High',12,'Pending','Site 2',NULL);
+INSERT INTO "tasks" VALUES(16,'Tâche 16',NULL,16,'2025-01-09','Low',NULL,'Pending','Site 2',NULL);
+INSERT INTO "tasks" VALUES(17,'Tâche 17',NULL,11,'2025-01-19','Low',NULL,'Pending','Site 3',NULL);
+INSERT INTO "tasks" VALUES(18,'Tâche 18',NULL,3,'2025-01-15','Low',NULL,'Pending','Site 2',NULL);
+INSERT INTO "tasks" VALUES(19,'Tâche 19',NULL,9,NULL,'High',NULL,'In progress','Site 3',NULL);
+INSERT INTO "tasks" VALUES(20,'Tâche 20',NULL,2,'2025-01-16','High',3,'Pending','Site 3',NULL);
+INSERT INTO "tasks" VALUES(21,'Tâche 21',NULL,3,NULL,'Medium',1,'In progress','Site 3',NULL);
+INSERT INTO "tasks" VALUES(22,'Tâche 22',NULL,4,NULL,'Critical',NULL,'In progress','Site 2',NULL);
+INSERT INTO "tasks" VALUES(23,'Tâche 23',NULL,10,'2025-01-22','Medium',NULL,'In progress','Site 3',NULL);
+INSERT INTO "tasks" VALUES(24,'Tâche 24',NULL,7,NULL,'Medium',NULL,'In progress','Site 4',NULL);
+INSERT INTO "tasks" VALUES(25,'Tâche 25',NULL,13,'2025-01-23','Critical',NULL,'In progress','Site 2',NULL);
+INSERT INTO "tasks" VALUES(26,'Tâche 26',NULL,5,'2025-01-17','Low',NULL,'Completed','Site 3',NULL);
+INSERT INTO "tasks" VALUES(27,'Tâche 27',NULL,10,'2025-01-15','Low',9,'Pending','Site 4',NULL);
+INSERT INTO "tasks" VALUES(28,'Tâche 28',NULL,2,'2025-01-23','Critical',NULL,'Pending','Site 3',NULL);
+INSERT INTO "tasks" VALUES(29,'Tâche 29',NULL,7,NULL,'Medium',NULL,'Pending','Site 1',NULL);
+INSERT INTO "tasks" VALUES(30,'Tâche 30',NULL,10,'2025-01-18','High',17,'Pending','Site 2',NULL);
+INSERT INTO "tasks" VALUES(31,'Tâche 31',NULL,5,'2025-01-21','Low',NULL,'Pending','Site 5',NULL);
+INSERT INTO "tasks" VALUES(32,'Tâche 32',NULL,1,'2025-01-24','High',NULL,'In progress','Site 2',NULL);
+INSERT INTO "tasks" VALUES(33,'Tâche 33',NULL,15,'2025-01-09','Medium',NULL,'Pending','Site 5',NULL);
+INSERT INTO "tasks" VALUES(34,'Tâche 34',NULL,3,'2025-01-08','High',16,'In progress','Site 3',NULL);
+INSERT INTO "tasks" VALUES(35,'Tâche 35',NULL,15,'2025-01-12','Medium',NULL,'Pending','Site 4',NULL);
+INSERT INTO "tasks" VALUES(36,'Tâche 36',NULL,9,NULL,'High',NULL,'Pending','Site 5',NULL);
+INSERT INTO "tasks" VALUES(37,'Tâche 37',NULL,16,'2025-01-09','Medium',NULL,'Pending','Site 4',NULL);
+INSERT INTO "tasks" VALUES(38,'Tâche 38',NULL,1,'2025-01-08','Medium',17,'Completed','Site 4',NULL);
+INSERT INTO "tasks" VALUES(39,'Tâche 39',NULL,9,'2025-01-10','Critical',17,'In progress','Site 3',NULL);
+INSERT INTO "tasks" VALUES(40,'Tâche 40',NULL,6,'2025-01-21','Low',NULL,'Pending','Site 4',NULL);
+INSERT INTO "tasks" VALUES(41,'Tâche 41',NULL,11,'2025-01-16','Low',NULL,'Pending','Site 4',NULL);
+INSERT INTO "tasks" VALUES(42,'Tâche 42',NULL,10,'2025-01-06','Medium',13,'Completed','Site 5',NULL);
+INSERT INTO "tasks" VALUES(43,'Tâche 43',NULL,2,'2025-01-07','High',NULL,'Pending','Site 2',NULL);
+INSERT INTO "tasks" VALUES(44,'Tâche 44',NULL,12,'2025-01-16','High',NULL,'Pending','Site 1',NULL);
+INSERT INTO "tasks" VALUES(45,'Tâche 45',NULL,14,'2025-01-07','Medium',NULL,'Completed','Site 3',NULL);
+INSERT INTO "tasks" VALUES(46,'Tâche 46',NULL,10,'2025-01-19','Medium',NULL,'Pending','Site 3',NULL);
+INSERT INTO "tasks" VALUES(47,'Tâche 47',NULL,6,'2025-01-18','Low',NULL,'Pending','Site 4',NULL);
+INSERT INTO "tasks" VALUES(48,'Tâche 48',NULL,6,'2025-01-12','Medium',8,'Pending','Site 3',NULL);
+INSERT INTO "tasks" VALUES(49,'Tâche 49',NULL,7,'2025-01-19','Medium',NULL,'Pending','Site 1',NULL);
+INSERT INTO "tasks" VALUES(50,'Tâche 50',NULL,7,'2025-01-22','Low',NULL,'Pending','Site 4',NULL);
+INSERT INTO "tasks" VALUES(51,'Tâche 51',NULL,14,'2025-01-06','High',NULL,'Pending','Site 4',NULL);
+INSERT INTO "tasks" VALUES(52,'Tâche 52',NULL,8,'2025-01-13','Low',NULL,'In progress','Site 1',NULL);
+INSERT INTO "tasks" VALUES(53,'Tâche 53',NULL,5,'2025-01-07','Medium',NULL,'Pending','Site 3',NULL);
+INSERT INTO "tasks" VALUES(54,'Tâche 54',NULL,10,'2025-01-09','Medium',NULL,'Pending','Site 4',NULL);
+INSERT INTO "tasks" VALUES(55,'Tâche 55',NULL,15,NULL,'Medium',NULL,'Pending','Site 2',NULL);
+INSERT INTO "tasks" VALUES(56,'Tâche 56',NULL,10,NULL,'Low',14,'Pending','Site 1',NULL);
+INSERT INTO "tasks" VALUES(57,'Tâche 57',NULL,14,'2025-01-07','Medium',NULL,'Pending','Site 1',NULL);
+INSERT INTO "tasks" VALUES(58,'Tâche 58',NULL,7,'2025-01-12','Medium',NULL,'Pending','Site 3',NULL);
+INSERT INTO "tasks" VALUES(59,'Tâche 59',NULL,16,'2025-01-11','Medium',NULL,'In progress','Site 5',NULL);
+INSERT INTO "tasks" VALUES(60,'Tâche 60',NULL,5,NULL,'Medium',NULL,'Pending','Site 2',NULL);
+INSERT INTO "task_required_skills" VALUES(1,4);
+INSERT INTO "task_required_skills" VALUES(2,1);
+INSERT INTO "task_required_skills" VALUES(2,5);
+INSERT INTO "task_required_skills" VALUES(4,1);
+INSERT INTO "task_required_skills" VALUES(5,2);
+INSERT INTO "task_required_skills" VALUES(6,7);
+INSERT INTO "task_required_skills" VALUES(7,1);
+INSERT INTO "task_required_skills" VALUES(7,3);
+INSERT INTO "task_required_skills" VALUES(8,1);
+INSERT INTO "task_required_skills" VALUES(8,4);
+INSERT INTO "task_required_skills" VALUES(10,1);
+INSERT INTO "task_required_skills" VALUES(11,7);
+INSERT INTO "task_required_skills" VALUES(11,1);
+INSERT INTO "task_required_skills" VALUES(12,5);
+INSERT INTO "task_required_skills" VALUES(12,4);
+INSERT INTO "task_required_skills" VALUES(13,1);
+INSERT INTO "task_required_skills" VALUES(13,6);
+INSERT INTO "task_required_skills" VALUES(14,1);
+INSERT INTO "task_required_skills" VALUES(16,1);
+INSERT INTO "task_required_skills" VALUES(18,6);
+INSERT INTO "task_required_skills" VALUES(18,1);
+INSERT INTO "task_required_skills" VALUES(20,5);
+INSERT INTO "task_required_skills" VALUES(22,3);
+INSERT INTO "task_required_skills" VALUES(24,3);
+INSERT INTO "task_required_skills" VALUES(27,1);
+INSERT INTO "task_required_skills" VALUES(30,3);
+INSERT INTO "task_required_skills" VALUES(31,1);
+INSERT INTO "task_required_skills" VALUES(31,2);
+INSERT INTO "task_required_skills" VALUES(32,3);
+INSERT INTO "task_required_skills" VALUES(32,5);
+INSERT INTO "task_required_skills" VALUES(34,3);
+INSERT INTO "task_required_skills" VALUES(36,1);
+INSERT INTO "task_required_skills" VALUES(37,1);
+INSERT INTO "task_required_skills" VALUES(37,6);
+INSERT INTO "task_required_skills" VALUES(38,8);
+INSERT INTO "task_required_skills" VALUES(39,2);
+INSERT INTO "task_required_skills" VALUES(41,3);
+INSERT INTO "task_required_skills" VALUES(45,3);
+INSERT INTO "task_required_skills" VALUES(46,3);
+INSERT INTO "task_required_skills" VALUES(47,5);
+INSERT INTO "task_required_skills" VALUES(48,1);
+INSERT INTO "task_required_skills" VALUES(48,3);
+INSERT INTO "task_required_skills" VALUES(49,2);
+INSERT INTO "task_required_skills" VALUES(50,3);
+INSERT INTO "task_required_skills" VALUES(51,7);
+INSERT INTO "task_required_skills" VALUES(52,1);
+INSERT INTO "task_required_skills" VALUES(52,5);
+INSERT INTO "task_required_skills" VALUES(53,1);
+INSERT INTO "task_required_skills" VALUES(55,2);
+INSERT INTO "task_required_skills" VALUES(56,3);
+INSERT INTO "task_required_skills" VALUES(57,7);
+INSERT INTO "task_required_skills" VALUES(58,7);
+INSERT INTO "absences" VALUES(1,1,'2025-01-13','2025-01-13',NULL,'Approved');
+INSERT INTO "absences" VALUES(2,2,'2025-01-17','2025-01-17',NULL,'Approved');
+INSERT INTO "absences" VALUES(3,2,'2025-01-07','2025-01-09',NULL,'Pending');
+INSERT INTO "absences" VALUES(4,3,'2025-01-09','2025-01-09',NULL,'Approved');
+INSERT INTO "absences" VALUES(5,3,'2025-01-14','2025-01-16',NULL,'Rejected');
+INSERT INTO "absences" VALUES(6,4,'2025-01-10','2025-01-10',NULL,'Approved');
+INSERT INTO "absences" VALUES(7,5,'2025-01-19','2025-01-19',NULL,'Approved');
+INSERT INTO "absences" VALUES(8,6,'2025-01-13','2025-01-13',NULL,'Approved');
+INSERT INTO "absences" VALUES(9,6,'2025-01-06','2025-01-08',NULL,'Pending');
+INSERT INTO "absences" VALUES(10,7,'2025-01-07','2025-01-07',NULL,'Approved');
+INSERT INTO "absences" VALUES(11,8,'2025-01-14','2025-01-14',NULL,'Approved');
+INSERT INTO "absences" VALUES(12,9,'2025-01-12','2025-01-12',NULL,'Approved');
+INSERT INTO "absences" VALUES(13,10,'2025-01-19','2025-01-19',NULL,'Approved');
+INSERT INTO "absences" VALUES(14,11,'2025-01-06','2025-01-06',NULL,'Approved');
+INSERT INTO "absences" VALUES(15,12,'2025-01-11','2025-01-11',NULL,'Approved');
+INSERT INTO "absences" VALUES(16,13,'2025-01-09','2025-01-09',NULL,'Approved');
+INSERT INTO "absences" VALUES(17,14,'2025-01-06','2025-01-06',NULL,'Approved');
+INSERT INTO "absences" VALUES(18,15,'2025-01-18','2025-01-18',NULL,'Approved');
+INSERT INTO "absences" VALUES(19,16,'2025-01-06','2025-01-06',NULL,'Approved');
+INSERT INTO "absences" VALUES(20,17,'2025-01-07','2025-01-07',NULL,'Approved');
+INSERT INTO "absences" VALUES(21,18,'2025-01-10','2025-01-10',NULL,'Approved');
+INSERT INTO "absences" VALUES(22,18,'2025-01-07','2025-01-09',NULL,'Rejected');
+INSERT INTO "absences" VALUES(23,19,'2025-01-10','2025-01-10',NULL,'Approved');
+INSERT INTO "absences" VALUES(24,20,'2025-01-06','2025-01-06',NULL,'Approved');
+INSERT INTO "planning" VALUES(1,1,20,'2025-01-06','11:00','14:00',NULL,0,'2026-10-17 06:57:24');
+INSERT INTO "planning" VALUES(2,3,53,'2025-01-06','09:00','12:00',NULL,0,'2026-10-17 06:57:24');
+INSERT INTO "planning" VALUES(3,7,59,'2025-01-06','14:00','15:30',NULL,0,'2026-10-17 06:57:24');
+INSERT INTO "planning" VALUES(4,10,52,'2025-01-06','09:00','12:00',NULL,0,'2026-10-17 06:57:24');
+INSERT INTO "planning" VALUES(5,11,50,'2025-01-06','11:30','13:00',NULL,0,'2026-10-17 06:57:24');
+INSERT INTO "planning" VALUES(6,15,51,'2025-01-06','11:30','14:30',NULL,0,'2026-10-17 06:57:24');
+INSERT INTO "planning" VALUES(7,16,13,'2025-01-06','13:00','16:00',NULL,0,'2026-10-17 06:57:24');
+INSERT INTO "planning" VALUES(8,20,35,'2025-01-06','13:00','16:00',NULL,0,'2026-10-17 06:57:24');
+INSERT INTO "planning" VALUES(9,2,17,'2025-01-07','08:00','09:30',NULL,0,'2026-10-17 06:57:24');
+INSERT INTO "planning" VALUES(10,3,27,'2025-01-07','09:30','12:30',NULL,0,'2026-10-17 06:57:24');
+INSERT INTO "planning" VALUES(11,5,15,'2025-01-07','09:30','11:00',NULL,0,'2026-10-17 06:57:24');
+INSERT INTO "planning" VALUES(12,8,35,'2025-01-07','10:30','12:00',NULL,0,'2026-10-17 06:57:24');
+INSERT INTO "planning" VALUES(13,9,19,'2025-01-07','10:00','11:30',NULL,0,'2026-10-17 06:57:24');
+INSERT INTO "planning" VALUES(14,18,5,'2025-01-07','11:30','14:30',NULL,0,'2026-10-17 06:57:24');
+INSERT INTO "planning" VALUES(15,20,52,'2025-01-07','14:00','17:00',NULL,0,'2026-10-17 06:57:24');
+INSERT INTO "planning" VALUES(16,6,59,'2025-01-08','17:30','20:30',NULL,0,'2026-10-17 06:57:24');
+INSERT INTO "planning" VALUES(17,8,4,'2025-01-08','08:00','09:30',NULL,0,'2026-10-17 06:57:24');
+INSERT INTO "planning" VALUES(18,12,24,'2025-01-08','08:00','09:30',NULL,0,'2026-10-17 06:57:24');
+INSERT INTO "planning" VALUES(19,13,39,'2025-01-08','12:30','15:30',NULL,0,'2026-10-17 06:57:24');
+INSERT INTO "planning" VALUES(20,15,41,'2025-01-08','09:30','12:30',NULL,0,'2026-10-17 06:57:24');
+INSERT INTO "planning" VALUES(21,16,3,'2025-01-08','10:30','13:30',NULL,0,'2026-10-17 06:57:24');
+INSERT INTO "planning" VALUES(22,1,53,'2025-01-09','09:00','12:00',NULL,0,'2026-10-17 06:57:24');
+INSERT INTO "planning" VALUES(23,3,20,'2025-01-09','13:30','16:30',NULL,0,'2026-10-17 06:57:24');
+INSERT INTO "planning" VALUES(24,10,35,'2025-01-09','14:00','17:00',NULL,0,'2026-10-17 06:57:24');
+INSERT INTO "planning" VALUES(25,13,43,'2025-01-09','11:00','14:00',NULL,0,'2026-10-17 06:57:24');
+INSERT INTO "planning" VALUES(26,15,57,'2025-01-09','13:30','16:30',NULL,0,'2026-10-17 06:57:24');
+INSERT INTO "planning" VALUES(27,18,13,'2025-01-09','14:00','17:00',NULL,0,'2026-10-17 06:57:24');
+INSERT INTO "planning" VALUES(28,1,28,'2025-01-10','10:00','13:00',NULL,0,'2026-10-17 06:57:24');
+INSERT INTO "planning" VALUES(29,6,50,'2025-01-10','17:30','20:30',NULL,0,'2026-10-17 06:57:24');
+INSERT INTO "planning" VALUES(30,10,37,'2025-01-10','09:30','12:30',NULL,0,'2026-10-17 06:57:24');
+INSERT INTO "planning" VALUES(31,12,33,'2025-01-10','15:30','17:00',NULL,0,'2026-10-17 06:57:24');
+INSERT INTO "planning" VALUES(32,19,9,'2025-01-10','11:00','14:00',NULL,0,'2026-10-17 06:57:24');
+INSERT INTO "planning" VALUES(33,20,21,'2025-01-10','12:30','15:30',NULL,0,'2026-10-17 06:57:24');
+INSERT INTO "planning" VALUES(34,4,58,'2025-01-12','06:30','09:30',NULL,0,'2026-10-17 06:57:24');
+INSERT INTO "planning" VALUES(35,6,51,'2025-01-12','19:00','22:00',NULL,0,'2026-10-17 06:57:24');
+INSERT INTO "planning" VALUES(36,14,55,'2025-01-12','10:30','13:30',NULL,0,'2026-10-17 06:57:24');
+INSERT INTO "planning" VALUES(37,3,34,'2025-01-13','12:00','15:00',NULL,0,'2026-10-17 06:57:24');
+INSERT INTO "planning" VALUES(38,8,57,'2025-01-13','08:00','09:30',NULL,0,'2026-10-17 06:57:24');
+INSERT INTO "planning" VALUES(39,9,54,'2025-01-13','11:30','13:00',NULL,0,'2026-10-17 06:57:24');
+INSERT INTO "planning" VALUES(40,13,27,'2025-01-13','14:00','17:00',NULL,0,'2026-10-17 06:57:24');
+INSERT INTO "planning" VALUES(41,19,1,'2025-01-13','09:00','12:00',NULL,0,'2026-10-17 06:57:24');
+INSERT INTO "planning" VALUES(42,20,16,'2025-01-13','12:30','15:30',NULL,0,'2026-10-17 06:57:24');
+INSERT INTO "planning" VALUES(43,2,52,'2025-01-14','13:30','15:00',NULL,0,'2026-10-17 06:57:24');
+INSERT INTO "planning" VALUES(44,9,41,'2025-01-14','09:00','10:30',NULL,0,'2026-10-17 06:57:24');
+INSERT INTO "planning" VALUES(45,11,33,'2025-01-14','11:30','13:00',NULL,0,'2026-10-17 06:57:24');
+INSERT INTO "planning" VALUES(46,13,51,'2025-01-14','14:00','17:00',NULL,0,'2026-10-17 06:57:24');
+INSERT INTO "planning" VALUES(47,15,9,'2025-01-14','10:30','13:30',NULL,0,'2026-10-17 06:57:24');
+INSERT INTO "planning" VALUES(48,16,52,'2025-01-14','11:00','14:00',NULL,0,'2026-10-17 06:57:24');
+INSERT INTO "planning" VALUES(49,17,51,'2025-01-14','14:00','17:00',NULL,0,'2026-10-17 06:57:24');
+INSERT INTO "planning" VALUES(50,18,54,'2025-01-14','09:30','12:30',NULL,0,'2026-10-17 06:57:24');
+INSERT INTO "planning" VALUES(51,20,58,'2025-01-14','11:30','14:30',NULL,0,'2026-10-17 06:57:24');
+INSERT INTO "planning" VALUES(52,1,17,'2025-01-15','10:00','13:00',NULL,0,'2026-10-17 06:57:24');
+INSERT INTO "planning" VALUES(53,2,38,'2025-01-15','13:30','15:00',NULL,0,'2026-10-17 06:57:24');
+INSERT INTO "planning" VALUES(54,4,3,'2025-01-15','08:30','11:30',NULL,0,'2026-10-17 06:57:24');
+INSERT INTO "planning" VALUES(55,8,21,'2025-01-15','15:30','17:00',NULL,0,'2026-10-17 06:57:24');
+INSERT INTO "planning" VALUES(56,10,8,'2025-01-15','11:00','14:00',NULL,0,'2026-10-17 06:57:24');
+INSERT INTO "planning" VALUES(57,12,55,'2025-01-15','10:30','12:00',NULL,0,'2026-10-17 06:57:24');
+INSERT INTO "planning" VALUES(58,14,35,'2025-01-15','08:00','11:00',NULL,0,'2026-10-17 06:57:24');
+INSERT INTO "planning" VALUES(59,15,17,'2025-01-15','11:30','14:30',NULL,0,'2026-10-17 06:57:24');
+INSERT INTO "planning" VALUES(60,2,53,'2025-01-16','09:00','10:30',NULL,0,'2026-10-17 06:57:24');
+INSERT INTO "planning" VALUES(61,3,56,'2025-01-16','14:00','17:00',NULL,0,'2026-10-17 06:57:24');
+INSERT INTO "planning" VALUES(62,4,48,'2025-01-16','06:00','09:00',NULL,0,'2026-10-17 06:57:24');
+INSERT INTO "planning" VALUES(63,8,33,'2025-01-16','14:30','16:00',NULL,0,'2026-10-17 06:57:24');
+INSERT INTO "planning" VALUES(64,12,4,'2025-01-16','08:00','09:30',NULL,0,'2026-10-17 06:57:24');
+INSERT INTO "planning" VALUES(65,18,24,'2025-01-16','10:30','13:30',NULL,0,'2026-10-17 06:57:24');
+INSERT INTO "planning" VALUES(66,19,9,'2025-01-16','10:00','13:00',NULL,0,'2026-10-17 06:57:24');
+INSERT INTO "planning" VALUES(67,1,7,'2025-01-17','12:30','15:30',NULL,0,'2026-10-17 06:57:24');
+INSERT INTO "planning" VALUES(68,6,52,'2025-01-17','17:00','20:00',NULL,0,'2026-10-17 06:57:24');
+INSERT INTO "planning" VALUES(69,10,42,'2025-01-17','13:30','16:30',NULL,0,'2026-10-17 06:57:24');
+INSERT INTO "planning" VALUES(70,12,11,'2025-01-17','13:30','15:00',NULL,0,'2026-10-17 06:57:24');
+INSERT INTO "planning" VALUES(71,13,35,'2025-01-17','09:00','12:00',NULL,0,'2026-10-17 06:57:24');
+INSERT INTO "planning" VALUES(72,17,40,'2025-01-17','09:00','12:00',NULL,0,'2026-10-17 06:57:24');
+INSERT INTO "planning" VALUES(73,18,27,'2025-01-17','10:00','13:00',NULL,0,'2026-10-17 06:57:24');
+INSERT INTO "planning" VALUES(74,20,12,'2025-01-17','13:30','16:30',NULL,0,'2026-10-17 06:57:24');
+INSERT INTO "planning" VALUES(75,6,41,'2025-01-18','16:00','19:00',NULL,0,'2026-10-17 06:57:24');
+INSERT INTO "planning" VALUES(76,6,1,'2025-01-19','18:00','21:00',NULL,0,'2026-10-17 06:57:24');
@@ -0,0 +1,35 @@
+-- Scénario minimal lisible : fenêtres de dispo qui se chevauchent (parcours créneau par créneau),
+-- absence approuvée, planning existant, remplacement, plafond hebdo, tâche terminée ignorée.
+-- Fenêtre des tests : 2025-01-06 (lundi) .. 2025-01-12.
+INSERT INTO skills (id, name) VALUES (1, 'Soudure'), (2, 'Électricité');
+
+INSERT INTO employees (id, first_name, last_name, contract_type, weekly_hours_max, accept_replacement) VALUES
+  (1, 'Alice', 'Martin', 'Full-time', 35, 0),
+  (2, 'Bruno', 'Petit', 'Part-time', 10, 1),
+  (3, 'Chloé', 'Durand', 'Full-time', 35, 0);
+
+INSERT INTO employee_skills (employee_id, skill_id) VALUES (1, 1), (1, 2), (2, 1), (3, 2);
+
+INSERT INTO employee_availability (employee_id, day_of_week, start_time, end_time) VALUES
+  (1, 'Mon', '08:00', '12:00'),
+  (1, 'Mon', '10:00', '14:00'),
+  (1, 'Tue', '09:00', '17:00'),
+  (2, 'Mon', '09:00', '17:00'),
+  (2, 'Tue', '09:00', '17:00'),
+  (2, 'Wed', '09:00', '17:00'),
+  (3, 'Wed', '08:00', '18:00');
+
+INSERT INTO tasks (id, title, duration_hours, deadline, priority, assigned_to, status) VALUES
+  (1, 'Câblage armoire', 8, '2025-01-08', 'High', NULL, 'Pending'),
+  (2, 'Soudure cuve', 12, '2025-01-10', 'Critical', 1, 'Pending'),
+  (3, 'Inventaire', 3, NULL, 'Low', NULL, 'Pending'),
+  (4, 'Ancienne tâche', 4, '2025-01-07', 'Critical', NULL, 'Completed');
+
+INSERT INTO task_required_skills (task_id, skill_id) VALUES (1, 2), (2, 1);
+
+INSERT INTO absences (employee_id, start_date, end_date, status) VALUES
+  (2, '2025-01-07', '2025-01-07', 'Approved'),
+  (3, '2025-01-08', '2025-01-08', 'Pending');
+
+INSERT INTO planning (employee_id, task_id, date, start_time, end_time) VALUES
+  (3, 4, '2025-01-08', '08:00', '10:00');
@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+"""apply_plan_rows : les conflits ne doivent jamais écraser une affectation validée par les RH."""
+
+import pytest
+
+import db
+import Planificateur as P
+
+
+def row(emp, task, day, start, end):
+    return {'employee_id': emp, 'task_id': task, 'date': day, 'start_time': start, 'end_time': end, 'pause': None}
+
+
+@pytest.fixture
+def conn(tiny_db):
+    conn = db.connect(tiny_db)
+    with conn:
+        conn.executemany(P.PLANNING_INSERT, [
+            (1, 1, '2025-01-07', '09:00', '11:00', None),
+            (2, 1, '2025-01-07', '09:00', '11:00', None),
+        ])
+        conn.execute("UPDATE planning SET validated_by_rh = 1 WHERE employee_id = 2 AND date = '2025-01-07'")
+    yield conn
+    conn.close()
+
+
+def planning(conn):
+    return conn.execute("SELECT employee_id, task_id, date, start_time, end_time, validated_by_rh FROM planning "
+                        "ORDER BY employee_id, date, start_time").fetchall()
+
+
+@pytest.mark.parametrize('chunk_size', [0, 1])
+def test_update_keeps_hr_validated_rows(conn, chunk_size):
+    plan = [
+        row(1, 2, '2025-01-07', '09:00', '12:00'),  # non validée : remplacée
+        row(2, 2, '2025-01-07', '09:00', '12:00'),  # validée RH : conservée
+        row(2, 3, '2025-01-08', '09:00', '10:00'),  # nouvelle
+    ]
+    stats = P.apply_plan_rows(conn, plan, 'update', chunk_size)
+    assert (stats['rows'], stats['written'], stats['unchanged_or_skipped'], stats['protected']) == (3, 2, 0, 1)
+    assert planning(conn) == [
+        (1, 2, '2025-01-07', '09:00', '12:00', 0),
+        (2, 1, '2025-01-07', '09:00', '11:00', 1),
+        (2, 3, '2025-01-08', '09:00', '10:00', 0),
+        (3, 4, '2025-01-08', '08:00', '10:00', 0),
+    ]
+
+
+def test_identical_validated_row_is_unchanged_not_protected(conn):
+    stats = P.apply_plan_rows(conn, [row(2, 1, '2025-01-07', '09:00', '11:00')], 'update')
+    assert (stats['written'], stats['unchanged_or_skipped'], stats['protected']) == (0, 1, 0)
+    assert (2, 1, '2025-01-07', '09:00', '11:00', 1) in planning(conn)
@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+"""load_compact_context : une date ou une heure illisible en base ne doit pas empêcher le chargement."""
+
+import db
+import Planificateur as P
+from conftest import TINY_WINDOW, read_context
+
+
+def test_malformed_rows_are_skipped_and_reported(tiny_db, tiny_context, capsys):
+    conn = db.connect(tiny_db)
+    conn.executescript("""
+        INSERT INTO tasks (id, title, duration_hours, deadline, priority, status) VALUES
+          (5, 'Deadline saisie à la main', 2, '08/01/2025', 'Medium', 'Pending');
+        INSERT INTO task_required_skills (task_id, skill_id) VALUES (5, 2);
+        INSERT INTO planning (employee_id, task_id, date, start_time, end_time) VALUES
+          (1, 1, '2025-01-09 ', '08:00', '10:00'),
+          (2, 1, '2025-01-07', '9h', '10:00');
+    """)
+    conn.close()
+
+    ctx = read_context(tiny_db, TINY_WINDOW)
+    out = capsys.readouterr().out
+    assert '[WARN] 2 ligne(s) de planning ignorée(s)' in out
+    assert '[WARN] Deadline invalide ignorée pour 1 tâche(s) : [5]' in out
+
+    task = next(t for t in ctx['tasks'] if t['id'] == 5)
+    assert task['deadline'] is None
+    assert ctx['preexisting_assignments'] == tiny_context['preexisting_assignments']
+    assert ctx['allowed_slots'] == tiny_context['allowed_slots']
+    assert any(r['task_id'] == 5 for r in P.greedy_plan(ctx)['plan'])
@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+"""Extraction locale du nom du salarié : NOM en capitales (particules comprises), casse du nom de fichier."""
+
+import pytest
+
+import WatchingScript as W
+
+CONTRAT = """CONTRAT DE TRAVAIL A DUREE INDETERMINEE
+ENTRE : La société Exemple SAS, représentée par Monsieur PETIT Paul
+ET : {personne}
+ci-après dénommée le salarié
+Durée hebdomadaire du travail : 35 heures, à temps complet.
+"""
+
+
+@pytest.mark.parametrize('personne, fichier, attendu', [
+    ("Madame DE LA FONTAINE Anne", "Contrat de travail De La Fontaine Anne.pdf", ('Anne', 'De La Fontaine', 0.95)),
+    ("Madame MARTIN DURAND Claire", "Contrat de travail Martin Durand Claire.pdf", ('Claire', 'Martin Durand', 0.95)),
+    ("Madame MARTIN DURAND Claire", "scan_0042.pdf", ('Claire', 'Martin Durand', 0.9)),
+    ("Monsieur DUPONT Jean", "Contrat de travail Dupont Jean.pdf", ('Jean', 'Dupont', 0.95)),
+])
+def test_extract_name(personne, fichier, attendu):
+    assert W._extract_name(CONTRAT.format(personne=personne), fichier) == attendu
+
+
+def test_particle_name_is_extracted_without_llm():
+    texte = CONTRAT.format(personne="Madame DE LA FONTAINE Anne")
+    fields = W.local_fields_for_contract(texte, "Contrat de travail De La Fontaine Anne.pdf", min_confidence=0.8)
+    assert fields['first_name'] == 'Anne'
+    assert fields['last_name'] == 'De La Fontaine'
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""Cache LLM : un serveur chat/completions factice ne doit être appelé qu'une fois pour un même contexte."""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+
+import Planificateur as P
+import llm_cache
+
+
+@pytest.fixture
+def stub_llm():
+    """Serveur local qui répond un plan vide et compte les requêtes reçues."""
+    calls = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            calls.append(self.rfile.read(int(self.headers['Content-Length'])))
+            content = json.dumps({'plan': [], 'notes': 'stub'})
+            body = json.dumps({'choices': [{'message': {'content': content}}],
+                               'usage': {'prompt_tokens': 10, 'completion_tokens': 2}}).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}/chat/completions", calls
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def llm_env(stub_llm, tmp_path, monkeypatch):
+    url, calls = stub_llm
+    monkeypatch.chdir(tmp_path)  # pas de .env.scheduler du dépôt
+    monkeypatch.setenv('SCHED_AI_CALL_ENABLED', 'true')
+    monkeypatch.setenv('SCHED_AI_API_URL', url)
+    monkeypatch.setenv('SCHED_AI_API_KEY', 'test')
+    monkeypatch.setenv('LLM_CACHE_ENABLED', 'true')
+    monkeypatch.setenv('LLM_CACHE_PATH', str(tmp_path / 'llm_cache.db'))
+    monkeypatch.setattr(llm_cache, '_default_cache', None)
+    yield calls
+    if llm_cache._default_cache is not None:
+        llm_cache._default_cache.close()
+
+
+def test_second_call_is_served_from_cache(llm_env, tiny_context):
+    first = P.call_azure_openai(tiny_context)
+    second = P.call_azure_openai(tiny_context)
+
+    assert len(llm_env) == 1
+    assert first['plan'] == second['plan'] == []
+    assert [r['cached'] for r in first['llm_requests']] == [False]
+    assert [r['cached'] for r in second['llm_requests']] == [True]
+    assert second['llm_requests'][0]['prompt_tokens'] == 10
+
+    stats = llm_cache.get_default_cache().stats()
+    assert (stats['hits'], stats['misses'], stats['entries']) == (1, 1, 1)
+    assert (stats['total_hits'], stats['total_misses']) == (1, 1)
+
+
+def test_lookups_are_batched_until_flush(tmp_path):
+    cache = llm_cache.LLMCache(str(tmp_path / 'c.db'))
+    cache.put('k', 'v')
+    before = cache._conn.total_changes
+    assert [cache.get('k') for _ in range(10)] == ['v'] * 10
+    assert cache.get('absent') is None
+    assert cache._conn.total_changes == before  # aucune écriture à la lecture
+    cache.close()
+
+    reopened = llm_cache.LLMCache(str(tmp_path / 'c.db'))
+    stats = reopened.stats()
+    assert (stats['total_hits'], stats['total_misses']) == (10, 1)
+    reopened.close()
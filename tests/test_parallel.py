@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+"""Planification parallèle : chaque minute de demande n'est envoyée qu'à un shard, plan fusionné valide."""
+
+from collections import defaultdict
+
+import pytest
+
+import Planificateur as P
+
+
+def shard_demand(shards):
+    total = defaultdict(float)
+    for shard in shards:
+        for t in shard['tasks']:
+            total[t['id']] += t['duration_hours']
+    return total
+
+
+def test_shards_split_demand_once(small_context):
+    expected = {t['id']: float(t['duration_hours']) for t in small_context['tasks']
+                if not t['deadline'] or t['deadline'] >= small_context['time_window']['from']}
+    assert shard_demand(P.shard_contexts(small_context)) == pytest.approx(expected)
+
+
+def test_whole_tasks_appear_in_one_shard(small_context):
+    shards = P.shard_contexts(small_context, whole_tasks=True)
+    seen = [t['id'] for shard in shards for t in shard['tasks']]
+    assert len(seen) == len(set(seen))
+    durations = {t['id']: t['duration_hours'] for t in small_context['tasks']}
+    assert all(t['duration_hours'] == durations[t['id']] for shard in shards for t in shard['tasks'])
+
+
+def test_parallel_plan_is_valid_and_within_demand(small_context):
+    result = P.parallel_plan(small_context, 'greedy', workers=2)
+    report = P.validate_plan(small_context, result)
+    assert report['errors'] == []
+    placed = defaultdict(int)
+    for p in result['plan']:
+        placed[p['task_id']] += P.hm_to_min(p['end_time']) - P.hm_to_min(p['start_time'])
+    durations = {t['id']: float(t['duration_hours']) * 60 for t in small_context['tasks']}
+    assert all(minutes <= durations[tid] for tid, minutes in placed.items())
+    # au moins la couverture du greedy séquentiel, à quelques créneaux près
+    serial = sum(P.hm_to_min(p['end_time']) - P.hm_to_min(p['start_time'])
+                 for p in P.greedy_plan(small_context)['plan'])
+    assert sum(placed.values()) >= 0.95 * serial
@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+"""stream_plan_outputs : SQL conservé seulement pour un plan valide, jamais de .partial laissé sur disque."""
+
+import os
+
+import pytest
+
+import Planificateur as P
+
+
+def test_valid_plan_keeps_sql(tiny_context, tmp_path):
+    out = tmp_path / 'out'
+    out.mkdir()
+    plan = P.greedy_plan(tiny_context)['plan'][:1]
+    report = P.stream_plan_outputs({'plan': iter(plan)}, tiny_context, str(out / 'plan.json'),
+                                   str(out / 'SQLCommands.txt'))
+    assert report['errors'] == []
+    assert sorted(os.listdir(out)) == ['SQLCommands.txt', 'plan.json']
+
+
+def test_interrupted_engine_leaves_no_partial(tiny_context, tmp_path):
+    sql_path = str(tmp_path / 'SQLCommands.txt')
+    first = P.greedy_plan(tiny_context)['plan'][0]
+
+    def engine():
+        yield first
+        raise RuntimeError("moteur interrompu")
+
+    with pytest.raises(RuntimeError):
+        P.stream_plan_outputs({'plan': engine()}, tiny_context, str(tmp_path / 'plan.json'), sql_path)
+    assert not os.path.exists(sql_path + '.partial')
+    assert not os.path.exists(sql_path)
@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+"""
+validate_plan (backends python et numpy) doit rendre exactement les messages de la validation historique.
+Rapports attendus calculés avec la version d'origine de validate_plan.
+"""
+
+import json
+
+import pytest
+
+import Planificateur as P
+from conftest import data_path
+
+BACKENDS = ['python', pytest.param('numpy', marks=pytest.mark.skipif(P.np is None, reason="NumPy absent"))]
+
+
+def row(emp, task, day, start, end):
+    return {'employee_id': emp, 'task_id': task, 'date': day, 'start_time': start, 'end_time': end}
+
+
+# Une violation par ligne (scénario tiny_planning.sql, fenêtre 2025-01-06..2025-01-12)
+CORRUPT_PLAN = [
+    row(1, 2, '2025-01-07', '12:00', '11:00'),   # fin <= début
+    row(1, 2, '2025-01-13', '09:00', '10:00'),   # hors fenêtre
+    row(99, 2, '2025-01-06', '09:00', '10:00'),  # employé inconnu
+    row(1, 99, '2025-01-06', '09:00', '10:00'),  # tâche inconnue
+    row(3, 2, '2025-01-08', '10:00', '11:00'),   # compétence manquante
+    row(1, 1, '2025-01-08', '09:00', '10:00'),   # pas de dispo le mercredi
+    row(2, 2, '2025-01-07', '09:00', '10:00'),   # absence approuvée
+    row(2, 2, '2025-01-06', '09:00', '16:00'),   # bloc > 6h
+    row(2, 3, '2025-01-06', '15:00', '17:00'),   # chevauchement
+    row(2, 3, '2025-01-08', '09:00', '12:00'),   # plafond hebdo (10h) dépassé
+    row(1, 1, '2025-01-07', '09:00', '13:00'),
+]
+
+CORRUPT_EXPECTED = {
+    'errors': [
+        "[Temps] fin <= début (emp 1 le 2025-01-07).",
+        "[Fenêtre] 2025-01-13 hors fenêtre 2025-01-06..2025-01-12.",
+        "[Références] Tâche ou employé introuvable (task=2, emp=99).",
+        "[Références] Tâche ou employé introuvable (task=99, emp=1).",
+        "[Compétences] Emp 3 n'a pas toutes les compétences pour tâche 2.",
+        "[Disponibilité] Emp 1 non dispo 2025-01-08 09:00-10:00.",
+        "[Absence] Emp 2 absent le 2025-01-07.",
+        "[Règle 6h] Créneau > 6h (emp 2 le 2025-01-06).",
+        "[Chevauchement] Emp 2 2025-01-06 15:00-17:00 chevauche 09:00-16:00.",
+    ],
+    'warnings': [
+        "[Deadline] Tâche 1 incomplète avant deadline: 5.0h / 8.0h.",
+        "[Deadline] Tâche 2 incomplète avant deadline: 9.0h / 12.0h.",
+        "[Deadline] Tâche 3 incomplète avant deadline: 0.0h / 3.0h.",
+        "[Heures hebdo] Emp 2 semaine 2025-W2: 13.0h > 10h. "
+        "Si dépassement, vérifier que ce sont des remplacements autorisés.",
+    ],
+}
+
+
+def corrupt(plan):
+    """Altérations déterministes d'un plan valide : décalages, échanges d'employés, doublons, inversions."""
+    out = []
+    for i, p in enumerate(plan):
+        p = dict(p)
+        if i % 7 == 3:
+            h = int(p['start_time'][:2]) + 1
+            p['start_time'], p['end_time'] = f"{h:02d}{p['start_time'][2:]}", f"{h + 1:02d}{p['end_time'][2:]}"
+        if i % 11 == 5:
+            p['employee_id'] = plan[(i * 5) % len(plan)]['employee_id']
+        if i % 13 == 8:
+            p['start_time'], p['end_time'] = p['end_time'], p['start_time']
+        out.append(p)
+        if i % 17 == 2:
+            out.append(dict(p))
+    return out
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_corrupt_plan_messages(tiny_context, backend):
+    assert P.validate_plan(tiny_context, {'plan': CORRUPT_PLAN}, backend=backend) == CORRUPT_EXPECTED
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_non_working_day(tiny_context, backend):
+    tiny_context.rules['working_days'] = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri']
+    report = P.validate_plan(tiny_context, {'plan': [row(1, 2, '2025-01-11', '09:00', '10:00'),
+                                                     row(1, 1, '2025-01-07', '09:00', '17:00')]}, backend=backend)
+    assert report == {
+        'errors': ["[Jour] 2025-01-11 non autorisé.",
+                   "[Disponibilité] Emp 1 non dispo 2025-01-11 09:00-10:00.",
+                   "[Règle 6h] Créneau > 6h (emp 1 le 2025-01-07)."],
+        'warnings': ["[Deadline] Tâche 2 incomplète avant deadline: 0.0h / 12.0h.",
+                     "[Deadline] Tâche 3 incomplète avant deadline: 0.0h / 3.0h."],
+    }
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_corrupted_seeded_plan(small_context, backend):
+    with open(data_path('greedy_small_expected.json'), encoding='utf-8') as f:
+        plan = corrupt(json.load(f)['plan'])
+    with open(data_path('validate_small_expected.json'), encoding='utf-8') as f:
+        expected = json.load(f)
+    assert P.validate_plan(small_context, {'plan': plan}, backend=backend) == expected
+
+
+def test_streaming_validator_matches(small_context):
+    with open(data_path('greedy_small_expected.json'), encoding='utf-8') as f:
+        plan = corrupt(json.load(f)['plan'])
+    validator = P.PlanValidator(small_context)
+    for p in plan:
+        validator.add(p)
+    assert validator.finish() == P.validate_plan(small_context, {'plan': plan}, backend='python')
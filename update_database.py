@@ -1,11 +1,46 @@
 import sqlite3
 import os
+import csv
+import json
+import time
+import argparse
+
+import db
 
 # --- Configuration ---
 # Assurez-vous que ces noms de fichiers sont corrects
 DB_FILE = "hackaton.db"  # Le nom de votre fichier de base de données
 SCHEMA_FILE = "main.sql"  # Votre fichier de structure de table
-COMMANDS_FILE = "SQLCommands.txt"  # Le fichier généré par votre watcher
+COMMANDS_FILE = "SQLCommands.txt"  # Ancien format du watcher (SQL brut), appliqué une seule fois puis archivé
+APPLIED_SUFFIX = ".applied"  # SQLCommands.txt.applied : commandes déjà appliquées (jamais relues)
+RECORDS_FILE = "ingestion.jsonl"  # Le fichier généré par votre watcher (une ligne JSON par contrat)
+
+EMPLOYEE_UPSERT = """
+    INSERT INTO employees (first_name, last_name, weekly_hours_max, contract_type)
+    VALUES (?, ?, ?, ?)
+    ON CONFLICT(first_name, last_name) DO UPDATE SET
+    weekly_hours_max=excluded.weekly_hours_max,
+    contract_type=excluded.contract_type
+"""
+CONTRACT_TYPES = ('Full-time', 'Part-time', 'Intern', 'Contractor')
+
+# --- Mode chargement en masse (--bulk) ---
+BULK_CHUNK_SIZE = 5000  # lignes par transaction
+# En plus du profil commun de db.py (temp_store=MEMORY, mmap 256 Mo) ; --bulk ouvre la base en WAL (wal=True)
+BULK_PRAGMAS = [
+    ("synchronous", "NORMAL"),      # pas de fsync à chaque commit (sûr en WAL)
+    ("cache_size", -200000),        # ~200 Mo de cache de pages
+    ("wal_autocheckpoint", 10000),  # checkpoints WAL moins fréquents pendant le chargement
+]
+# Clé de conflit des upserts par table (contraintes UNIQUE / PRIMARY KEY de main.sql)
+UPSERT_KEYS = {
+    'employees': ('first_name', 'last_name'),
+    'skills': ('name',),
+    'employee_skills': ('employee_id', 'skill_id'),
+    'employee_availability': ('employee_id', 'day_of_week', 'start_time'),
+    'task_required_skills': ('task_id', 'skill_id'),
+    'planning': ('employee_id', 'date', 'start_time'),
+}
 
 
 # ---------------------
@@ -35,9 +70,94 @@ def create_tables(conn):
     return True
 
 
+def ensure_checkpoint_table(conn):
+    """Table des positions déjà appliquées, par fichier d'ingestion."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS ingestion_checkpoint (
+          source TEXT PRIMARY KEY,
+          byte_offset INTEGER NOT NULL,
+          records INTEGER NOT NULL DEFAULT 0,
+          applied_at TEXT
+        )""")
+
+
+def read_new_records(path, offset):
+    """
+    Lit les lignes complètes ajoutées après `offset` (octets).
+    Renvoie (lignes valides en tuples SQL, lignes rejetées, nouvel offset).
+    Une ligne en cours d'écriture (sans retour à la ligne final) est laissée pour le prochain passage.
+    """
+    rows, rejected = [], []
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        for raw in f:
+            if not raw.endswith(b"\n"):
+                break
+            offset += len(raw)
+            if not raw.strip():
+                continue
+            try:
+                rec = json.loads(raw)
+                hours = rec['weekly_hours_max']
+                if not rec['first_name'] or not rec['last_name']:
+                    raise ValueError("nom ou prénom manquant")
+                if not isinstance(hours, (int, float)) or hours <= 0:
+                    raise ValueError(f"weekly_hours_max invalide ({hours!r})")
+                if rec['contract_type'] not in CONTRACT_TYPES:
+                    raise ValueError(f"contract_type invalide ({rec['contract_type']!r})")
+                rows.append((rec['first_name'], rec['last_name'], hours, rec['contract_type']))
+            except (ValueError, KeyError, TypeError) as e:
+                rejected.append((raw[:120].decode('utf-8', 'replace').strip(), e))
+    return rows, rejected, offset
+
+
+def apply_records(conn, path=RECORDS_FILE):
+    """
+    Applique uniquement les enregistrements ajoutés au fichier d'ingestion depuis le dernier passage :
+    upserts paramétrés (executemany) et avancement du point de reprise dans une seule transaction.
+    Une ligne invalide est signalée et ignorée, elle n'empêche pas l'application des autres.
+    """
+    if not os.path.exists(path):
+        print(f"Aucun fichier d'ingestion '{path}'. Aucune mise à jour à appliquer.")
+        return 0
+    ensure_checkpoint_table(conn)
+    row = conn.execute("SELECT byte_offset FROM ingestion_checkpoint WHERE source = ?", (path,)).fetchone()
+    offset = row[0] if row else 0
+    size = os.path.getsize(path)
+    if size < offset:
+        print(f"[WARN] {path} est plus court que le point de reprise ({size} < {offset}) : relecture complète.")
+        offset = 0
+    if size == offset:
+        print(f"{path} : aucun nouvel enregistrement.")
+        return 0
+
+    t0 = time.perf_counter()
+    rows, rejected, new_offset = read_new_records(path, offset)
+    for line, err in rejected:
+        print(f"[WARN] Enregistrement ignoré ({err}) : {line}")
+    try:
+        with conn:  # une transaction : upserts + point de reprise, ou rien
+            conn.executemany(EMPLOYEE_UPSERT, rows)
+            conn.execute("""
+                INSERT INTO ingestion_checkpoint (source, byte_offset, records, applied_at)
+                VALUES (?, ?, ?, datetime('now'))
+                ON CONFLICT(source) DO UPDATE SET byte_offset = excluded.byte_offset,
+                  records = records + excluded.records, applied_at = excluded.applied_at
+            """, (path, new_offset, len(rows)))
+    except sqlite3.Error as e:
+        print(f"ERREUR SQL lors de l'application des enregistrements : {e}")
+        print("Les modifications ont été annulées (rollback).")
+        return 0
+    print(f"Succès ! {len(rows)} enregistrement(s) de {path} appliqué(s) à {DB_FILE} "
+          f"({new_offset - offset} octets lus en {time.perf_counter() - t0:.3f} s).")
+    return len(rows)
+
+
 def apply_sql_commands(conn):
     """
-    Applique toutes les commandes SQL trouvées dans le fichier SQLCommands.txt.
+    Applique toutes les commandes SQL trouvées dans le fichier SQLCommands.txt, puis l'archive
+    (archive_sql_commands) : les passages suivants ne coûtent plus que les nouveaux enregistrements JSONL.
+    En cas d'erreur le fichier reste en place, à corriger avant le prochain passage.
     """
     print(f"Tentative d'application des commandes depuis {COMMANDS_FILE}...")
     try:
@@ -46,6 +166,7 @@ def apply_sql_commands(conn):
 
         if not sql_script.strip():
             print("Le fichier de commandes SQL est vide. Aucune mise à jour à appliquer.")
+            archive_sql_commands(sql_script)
             return
 
         cursor = conn.cursor()
@@ -54,6 +175,7 @@ def apply_sql_commands(conn):
         cursor.executescript(sql_script)
         conn.commit()
         print(f"Succès ! Les commandes de {COMMANDS_FILE} ont été appliquées à {DB_FILE}.")
+        archive_sql_commands(sql_script)
 
     except FileNotFoundError:
         print(f"ERREUR: Fichier de commandes '{COMMANDS_FILE}' non trouvé.")
@@ -63,25 +185,204 @@ def apply_sql_commands(conn):
         conn.rollback()  # Annule la transaction en cas d'erreur
 
 
-def main():
+def archive_sql_commands(sql_script):
+    """Déplace SQLCommands.txt vers SQLCommands.txt.applied (ajouté à la fin si l'archive existe déjà)."""
+    applied = COMMANDS_FILE + APPLIED_SUFFIX
+    try:
+        if os.path.exists(applied):
+            with open(applied, 'a', encoding='utf-8') as f:
+                f.write(sql_script)
+            os.remove(COMMANDS_FILE)
+        else:
+            os.replace(COMMANDS_FILE, applied)
+    except OSError as e:
+        print(f"[WARN] Impossible d'archiver {COMMANDS_FILE} ({e}) : il sera réappliqué au prochain passage.")
+        return
+    print(f"{COMMANDS_FILE} archivé dans {applied}.")
+
+
+# --- Chargement en masse ---
+
+def drop_secondary_indexes(conn, tables):
+    """
+    Supprime les index explicites des tables chargées et renvoie leurs définitions.
+    Les index implicites (PRIMARY KEY / UNIQUE) restent : les upserts en ont besoin.
+    """
+    placeholders = ",".join("?" * len(tables))
+    saved = conn.execute(
+        f"SELECT name, sql FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL "
+        f"AND tbl_name IN ({placeholders})", list(tables)).fetchall()
+    with conn:
+        for name, _ in saved:
+            conn.execute(f'DROP INDEX IF EXISTS "{name}"')
+    if saved:
+        print(f"{len(saved)} index différé(s) : {', '.join(n for n, _ in saved)}")
+    return saved
+
+
+def rebuild_indexes(conn, saved):
+    """Recrée les index supprimés par drop_secondary_indexes (un seul tri par index)."""
+    if not saved:
+        return
+    t0 = time.perf_counter()
+    with conn:
+        for _, sql in saved:
+            conn.execute(sql)
+    conn.execute("PRAGMA optimize")
+    print(f"{len(saved)} index reconstruit(s) en {time.perf_counter() - t0:.2f} s.")
+
+
+def iter_file_rows(path):
+    """Renvoie (colonnes, itérateur de tuples) pour un fichier .csv (avec en-tête) ou .jsonl."""
+    if path.lower().endswith((".jsonl", ".ndjson")):
+        f = open(path, encoding="utf-8")
+        lines = (json.loads(line) for line in f if line.strip())
+        first = next(lines, None)
+        if first is None:
+            f.close()
+            return [], iter(())
+        columns = list(first)
+
+        def rows():
+            with f:
+                yield tuple(first.get(c) for c in columns)
+                for rec in lines:
+                    yield tuple(rec.get(c) for c in columns)
+        return columns, rows()
+
+    f = open(path, newline="", encoding="utf-8")
+    reader = csv.reader(f)
+    columns = next(reader, [])
+
+    def rows():
+        with f:
+            for row in reader:
+                yield tuple(v if v != "" else None for v in row)
+    return columns, rows()
+
+
+def bulk_insert_sql(conn, table, columns):
+    """INSERT paramétré (upsert sur la clé naturelle de la table) après vérification des noms."""
+    known = {r[1] for r in conn.execute(f'PRAGMA table_info("{table}")')}
+    if not known:
+        raise ValueError(f"table inconnue : {table}")
+    unknown = [c for c in columns if c not in known]
+    if unknown:
+        raise ValueError(f"colonnes inconnues pour {table} : {', '.join(unknown)}")
+    cols = ", ".join(columns)
+    sql = f"INSERT INTO {table} ({cols}) VALUES ({', '.join('?' * len(columns))})"
+    keys = UPSERT_KEYS.get(table)
+    if 'id' in columns:
+        keys = ('id',)
+    if keys and set(keys) <= set(columns):
+        others = [c for c in columns if c not in keys]
+        if others:
+            sql += (f" ON CONFLICT({', '.join(keys)}) DO UPDATE SET "
+                    + ", ".join(f"{c}=excluded.{c}" for c in others))
+        else:
+            sql += f" ON CONFLICT({', '.join(keys)}) DO NOTHING"
+    return sql
+
+
+def bulk_load(conn, table, columns, rows, chunk_size=BULK_CHUNK_SIZE):
+    """
+    Insère `rows` par paquets de `chunk_size` (executemany, une transaction par paquet ;
+    chunk_size=None : une seule transaction).
+    Renvoie le nombre de lignes chargées ; affiche le débit en lignes/s.
+    """
+    sql = bulk_insert_sql(conn, table, columns)
+    total = 0
+    t0 = time.perf_counter()
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if chunk_size and len(chunk) >= chunk_size:
+            with conn:
+                conn.executemany(sql, chunk)
+            total += len(chunk)
+            chunk = []
+    if chunk:
+        with conn:
+            conn.executemany(sql, chunk)
+        total += len(chunk)
+    elapsed = time.perf_counter() - t0
+    rate = total / elapsed if elapsed > 0 else float("inf")
+    print(f"[OK] {table} : {total} ligne(s) en {elapsed:.2f} s ({rate:,.0f} lignes/s)")
+    return total
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Met à jour la base SQLite (schéma, contrats ingérés, chargements en masse)")
+    parser.add_argument("--db", default=DB_FILE, help="Fichier SQLite")
+    parser.add_argument("--bulk", action="store_true",
+                        help="Mode chargement en masse : base passée en WAL, synchronous=NORMAL, cache élargi, "
+                             "paquets transactionnels")
+    parser.add_argument("--load", action="append", default=[], metavar="TABLE=FICHIER",
+                        help="Charge un fichier .csv (avec en-tête) ou .jsonl dans une table (répétable)")
+    parser.add_argument("--chunk-size", type=int, default=BULK_CHUNK_SIZE, help="Lignes par transaction")
+    parser.add_argument("--defer-indexes", action="store_true",
+                        help="Supprime les index secondaires des tables chargées et les reconstruit à la fin")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
     """Point d'entrée principal du script."""
+    global DB_FILE
+    args = parse_args(argv)
+    DB_FILE = args.db
 
     conn = None
+    saved_indexes = []
     try:
         # Connexion (crée le fichier .db s'il n'existe pas)
-        conn = sqlite3.connect(DB_FILE)
+        if args.bulk:
+            conn = db.connect(DB_FILE, pragmas=BULK_PRAGMAS, wal=True)
+        else:
+            conn = db.connect(DB_FILE)
 
         # 1. Créer les tables en premier
         if not create_tables(conn):
             return  # Arrête si le schéma n'a pas pu être appliqué
 
-        # 2. Appliquer les mises à jour
-        apply_sql_commands(conn)
+        loads = []
+        for spec in args.load:
+            table, sep, path = spec.partition("=")
+            if not sep:
+                print(f"ERREUR: --load attend TABLE=FICHIER (reçu : {spec})")
+                return
+            loads.append((table.strip(), path.strip()))
+        if args.defer_indexes and loads:
+            saved_indexes = drop_secondary_indexes(conn, sorted({t for t, _ in loads}))
+
+        # 2. Chargements en masse demandés
+        t0 = time.perf_counter()
+        total = 0
+        for table, path in loads:
+            try:
+                columns, rows = iter_file_rows(path)
+                # hors mode --bulk : tout le fichier dans une seule transaction
+                total += bulk_load(conn, table, columns, rows, args.chunk_size if args.bulk else None)
+            except (OSError, ValueError, sqlite3.Error) as e:
+                print(f"ERREUR lors du chargement de {path} dans {table} : {e}")
+        if loads:
+            rebuild_indexes(conn, saved_indexes)
+            saved_indexes = []
+            elapsed = time.perf_counter() - t0
+            print(f"Chargement terminé : {total} ligne(s) en {elapsed:.2f} s "
+                  f"({total / elapsed if elapsed > 0 else 0:,.0f} lignes/s, index compris).")
+
+        # 3. Appliquer les nouveaux enregistrements du watcher
+        apply_records(conn)
+
+        # 4. Ancien format (SQL brut) : appliqué une fois, puis archivé
+        if os.path.exists(COMMANDS_FILE):
+            apply_sql_commands(conn)
 
     except sqlite3.Error as e:
         print(f"ERREUR de connexion à la base de données : {e}")
     finally:
         if conn:
+            rebuild_indexes(conn, saved_indexes)  # jamais de base laissée sans ses index
             conn.close()
             print(f"Connexion à {DB_FILE} fermée.")
 